@@ -0,0 +1,71 @@
+"""
+Compares writing, reading and deleting keys in a #SqliteDatastore one at a time with the bulk
+`set_many()`, `get_many()` and `delete_many()` operations, and with writing one key at a time inside
+of a single transaction.
+
+    $ python benchmarks/keyvalue_bulk.py [--keys 100000] [--single-keys 10000] [--pooled]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import typing as t
+
+from nr.util.keyvalue.sqlite import SqliteDatastore
+
+
+def rate(count: int, func: t.Callable[[], t.Any]) -> float:
+  tstart = time.perf_counter()
+  func()
+  return count / (time.perf_counter() - tstart)
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--keys', type=int, default=100_000)
+  parser.add_argument('--single-keys', type=int, default=10_000,
+    help='number of keys for the one-at-a-time operations, which commit once per key')
+  parser.add_argument('--pooled', action='store_true')
+  args = parser.parse_args()
+
+  items = {f'key-{i}': os.urandom(64) for i in range(args.keys)}
+  single = dict(list(items.items())[:args.single_keys])
+
+  with tempfile.TemporaryDirectory() as tmpdir:
+    ds = SqliteDatastore(os.path.join(tmpdir, 'bench.db'), pooled=args.pooled)
+    kv = ds.get_namespace('single')
+    bulk = ds.get_namespace('bulk')
+
+    def _set_loop() -> None:
+      for key, value in single.items():
+        kv.set(key, value)
+
+    def _set_transaction() -> None:
+      with kv.transaction():
+        for key, value in items.items():
+          kv.set(key, value)
+
+    def _get_loop() -> None:
+      for key in single:
+        kv.get(key)
+
+    def _delete_loop() -> None:
+      for key in single:
+        kv.delete(key)
+
+    results = [
+      ('set', rate(len(single), _set_loop), rate(len(items), lambda: bulk.set_many(items))),
+      ('get', rate(len(single), _get_loop), rate(len(items), lambda: bulk.get_many(items))),
+      ('delete', rate(len(single), _delete_loop), rate(len(items), lambda: bulk.delete_many(items))),
+    ]
+    transaction = rate(len(items), _set_transaction)
+    ds.close()
+
+  for name, loop, many in results:
+    print(f'{name:<7} one at a time {loop:>10,.0f}/s  bulk {many:>10,.0f}/s  ({many / loop:.1f}x)')
+  print(f'set     in transaction {transaction:>10,.0f}/s  ({transaction / results[0][1]:.1f}x)')
+
+
+if __name__ == '__main__':
+  main()
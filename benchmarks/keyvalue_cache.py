@@ -0,0 +1,47 @@
+"""
+Compares reading a small set of hot keys from a #SqliteNamespace directly and through a
+#CachedKeyValueStore.
+
+    $ python benchmarks/keyvalue_cache.py [--keys 100] [--reads 200000] [--pooled]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from nr.util.keyvalue import CachedKeyValueStore, KeyValueStore
+from nr.util.keyvalue.sqlite import SqliteDatastore
+
+
+def measure(kv: KeyValueStore, keys: int, reads: int) -> float:
+  names = [f'key-{i}' for i in range(keys)]
+  tstart = time.perf_counter()
+  for i in range(reads):
+    kv.get(names[i % keys])
+  return reads / (time.perf_counter() - tstart)
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--keys', type=int, default=100)
+  parser.add_argument('--reads', type=int, default=200_000)
+  parser.add_argument('--pooled', action='store_true')
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as tmpdir:
+    ds = SqliteDatastore(os.path.join(tmpdir, 'bench.db'), pooled=args.pooled)
+    kv = ds.get_namespace('bench')
+    kv.set_many({f'key-{i}': os.urandom(64) for i in range(args.keys)})
+    cached = CachedKeyValueStore(kv)
+
+    direct = measure(kv, args.keys, args.reads)
+    through_cache = measure(cached, args.keys, args.reads)
+    ds.close()
+
+  print(f'direct {direct:>10,.0f} reads/s  cached {through_cache:>10,.0f} reads/s  ({through_cache / direct:.1f}x)')
+  print(cached.get_stats())
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,66 @@
+"""
+Measures the read throughput of #SqliteDatastore with concurrent threads, with a single shared connection
+and in pooled mode (write-ahead logging and per-thread read connections).
+
+    $ python benchmarks/keyvalue_sqlite.py [--keys 10000] [--reads 20000] [--threads 1 2 4 8]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+import typing as t
+
+from nr.util.keyvalue.sqlite import SqliteDatastore
+
+
+def populate(ds: SqliteDatastore, keys: int) -> None:
+  kv = ds.get_namespace('bench')
+  for i in range(keys):
+    kv.set(f'key-{i}', os.urandom(64))
+
+
+def measure_reads(ds: SqliteDatastore, keys: int, reads: int, threads: int) -> float:
+  kv = ds.get_namespace('bench')
+  barrier = threading.Barrier(threads + 1)
+
+  def _reader(offset: int) -> None:
+    barrier.wait()
+    for i in range(reads):
+      kv.get(f'key-{(i * 7919 + offset) % keys}')
+
+  workers = [threading.Thread(target=_reader, args=(n,)) for n in range(threads)]
+  for worker in workers:
+    worker.start()
+  barrier.wait()
+  tstart = time.perf_counter()
+  for worker in workers:
+    worker.join()
+  return reads * threads / (time.perf_counter() - tstart)
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--keys', type=int, default=10_000)
+  parser.add_argument('--reads', type=int, default=20_000, help='reads per thread')
+  parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as tmpdir:
+    stores: t.Dict[str, SqliteDatastore] = {}
+    for pooled in (False, True):
+      ds = SqliteDatastore(os.path.join(tmpdir, f'pooled-{pooled}.db'), pooled=pooled)
+      populate(ds, args.keys)
+      stores['pooled' if pooled else 'shared'] = ds
+
+    for threads in args.threads:
+      results = {mode: measure_reads(ds, args.keys, args.reads, threads) for mode, ds in stores.items()}
+      print(f'{threads:>2} threads  ' + '  '.join(f'{mode} {rate:>9,.0f} reads/s' for mode, rate in results.items()))
+
+    for ds in stores.values():
+      ds.close()
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,76 @@
+"""
+Compares the per-element overhead of a fused `Stream(x).map(f).filter(p).map(g)` chain against the same
+chain built from one generator per stage (the implementation before stage fusion). All variants are
+consumed through a #Stream, so they pay the same `Stream.__next__()` overhead.
+
+    $ python benchmarks/stream_fusion.py [--size N] [--repeat N]
+"""
+
+import argparse
+import time
+import typing as t
+
+from nr.util.stream import Stream
+
+
+def f(x: int) -> int:
+  return x + 1
+
+
+def p(x: int) -> bool:
+  return x & 1 == 0
+
+
+def g(x: int) -> int:
+  return x * 2
+
+
+def unfused(n: int) -> t.Iterator[int]:
+  it: t.Iterator[t.Any] = iter(range(n))
+  it = (f(x) for x in it)
+  it = (x for x in it if p(x))
+  it = (g(x) for x in it)
+  return Stream(it)
+
+
+def fused(n: int) -> t.Iterator[int]:
+  return Stream(range(n)).map(f).filter(p).map(g)
+
+
+def _plain_loop(n: int) -> t.Iterator[int]:
+  for x in range(n):
+    x = f(x)
+    if p(x):
+      yield g(x)
+
+
+def plain_loop(n: int) -> t.Iterator[int]:
+  return Stream(_plain_loop(n))
+
+
+def measure(func: t.Callable[[int], t.Iterator[int]], size: int, repeat: int) -> float:
+  best = float('inf')
+  for _ in range(repeat):
+    tstart = time.perf_counter()
+    for _ in func(size):
+      pass
+    best = min(best, time.perf_counter() - tstart)
+  return best
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--size', type=int, default=1_000_000)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args()
+
+  print(f'map/filter/map over {args.size:,} elements, best of {args.repeat}')
+  baseline = None
+  for name, func in [('unfused', unfused), ('fused', fused), ('plain loop', plain_loop)]:
+    elapsed = measure(func, args.size, args.repeat)
+    baseline = baseline or elapsed
+    print(f'  {name:<12} {elapsed * 1e3:8.1f} ms  {elapsed / args.size * 1e9:6.1f} ns/element  {baseline / elapsed:5.2f}x')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,121 @@
+"""
+Measures the throughput and peak memory of the #nr.util.stream.Stream operators across input sizes.
+
+    $ python benchmarks/stream_operators.py [--sizes 10000,1000000] [--only map,distinct] [--repeat 3]
+    $ python benchmarks/stream_operators.py --json results.json
+    $ python benchmarks/stream_operators.py --compare results.json --tolerance 0.2
+
+Throughput is measured as the best of *repeat* runs without tracing, peak memory in a separate run with
+#tracemalloc enabled. With `--compare`, the script exits with status 1 if any operator got slower by more
+than the tolerance, or if its peak memory grew by more than the tolerance.
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+import typing as t
+
+from nr.util.stream import Reducer, Stream
+
+Case = t.Callable[[t.List[int]], t.Any]
+
+
+def _consume(stream: t.Iterable[t.Any]) -> None:
+  for _ in stream:
+    pass
+
+
+CASES: t.Dict[str, Case] = {
+  'map': lambda data: _consume(Stream(data).map(abs)),
+  'filter': lambda data: _consume(Stream(data).filter(bool)),
+  'map-filter-map': lambda data: _consume(Stream(data).map(abs).filter(bool).map(str)),
+  'batch': lambda data: _consume(Stream(data).batch(1000)),
+  'batch-array': lambda data: _consume(Stream(data).batch(1000, dtype='q', use_numpy=False)),
+  'distinct': lambda data: _consume(Stream(data).distinct()),
+  'distinct-window': lambda data: _consume(Stream(data).distinct(window=1000)),
+  'distinct-bloom': lambda data: _consume(Stream(data).distinct(capacity=len(data), error_rate=0.01)),
+  'groupby': lambda data: _consume(Stream(data).groupby(lambda x: x % 100, list)),
+  'groupby-reducer': lambda data: _consume(Stream(data).groupby(lambda x: x % 100, Reducer.count())),
+  'groupby-hash': lambda data: _consume(Stream(data).groupby(lambda x: x % 100, Reducer.count(), strategy='hash')),
+  'sortby': lambda data: _consume(Stream(data).sortby(lambda x: -x)),
+  'sortby-external': lambda data: _consume(Stream(data).sortby(lambda x: -x, buffer_size=max(1, len(data) // 8))),
+  'concat': lambda data: _consume(Stream(data).batch(100).concat()),
+  'slice': lambda data: _consume(Stream(data).slice(len(data) // 4, len(data) // 2)),
+}
+
+
+def measure_time(case: Case, data: t.List[int], repeat: int) -> float:
+  best = float('inf')
+  for _ in range(repeat):
+    gc.collect()
+    tstart = time.perf_counter()
+    case(data)
+    best = min(best, time.perf_counter() - tstart)
+  return best
+
+
+def measure_memory(case: Case, data: t.List[int]) -> int:
+  gc.collect()
+  tracemalloc.start()
+  try:
+    case(data)
+    return tracemalloc.get_traced_memory()[1]
+  finally:
+    tracemalloc.stop()
+
+
+def compare(results: t.Dict[str, t.Any], baseline: t.Dict[str, t.Any], tolerance: float) -> t.List[str]:
+  regressions = []
+  for key, result in results.items():
+    if key not in baseline:
+      continue
+    for metric in ('seconds', 'peak_bytes'):
+      old, new = baseline[key][metric], result[metric]
+      if old and new > old * (1 + tolerance):
+        regressions.append(f'{key}: {metric} {old:.6g} -> {new:.6g} (+{(new / old - 1) * 100:.0f}%)')
+  return regressions
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--sizes', default='10000,100000,1000000')
+  parser.add_argument('--only', help='comma separated list of operators to run')
+  parser.add_argument('--repeat', type=int, default=3)
+  parser.add_argument('--json', help='write the results to this file')
+  parser.add_argument('--compare', help='compare the results against a file written with --json')
+  parser.add_argument('--tolerance', type=float, default=0.2)
+  args = parser.parse_args()
+
+  names = args.only.split(',') if args.only else list(CASES)
+  sizes = [int(x) for x in args.sizes.split(',')]
+  rnd = random.Random(42)
+  results: t.Dict[str, t.Dict[str, float]] = {}
+
+  print(f'{"operator":<18} {"size":>10} {"time":>10} {"elements/s":>14} {"peak memory":>12}')
+  for size in sizes:
+    data = [rnd.randrange(size) for _ in range(size)]
+    for name in names:
+      seconds = measure_time(CASES[name], data, args.repeat)
+      peak = measure_memory(CASES[name], data)
+      results[f'{name}/{size}'] = {'seconds': seconds, 'peak_bytes': peak}
+      print(f'{name:<18} {size:>10,} {seconds * 1e3:>8.1f}ms {size / seconds:>14,.0f} {peak / 1024:>10,.0f}kB')
+
+  if args.json:
+    with open(args.json, 'w') as fp:
+      json.dump(results, fp, indent=2)
+
+  if args.compare:
+    with open(args.compare) as fp:
+      regressions = compare(results, json.load(fp), args.tolerance)
+    for line in regressions:
+      print('regression:', line)
+    if regressions:
+      sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
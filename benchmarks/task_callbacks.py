@@ -0,0 +1,49 @@
+"""
+Measures the cost of task status transitions when many callbacks are registered on a task, most of
+which only match other statuses.
+
+    $ python benchmarks/task_callbacks.py [--callbacks 0,10,100,1000] [--tasks 2000]
+"""
+
+import argparse
+import time
+
+from nr.util.task import Runnable, Task, TaskStatus
+from nr.util.task._default import Task as DefaultTask
+
+
+class Noop(Runnable[None]):
+
+  def run(self, task: Task) -> None:
+    pass
+
+
+def measure(callbacks: int, tasks: int) -> float:
+  runnable = Noop()
+  total = 0.0
+  for _ in range(tasks):
+    task: DefaultTask[None] = DefaultTask(runnable, 'noop')
+    for index in range(callbacks):
+      task.callbacks.on('end' if index % 2 else TaskStatus.FAILED, lambda task: None)
+    tstart = time.perf_counter()
+    task._update(TaskStatus.QUEUED)
+    task._update(TaskStatus.RUNNING)
+    task._update(TaskStatus.SUCCEEDED)
+    total += time.perf_counter() - tstart
+  return total / tasks
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--callbacks', default='0,10,100,1000')
+  parser.add_argument('--tasks', type=int, default=2000)
+  args = parser.parse_args()
+
+  print(f'{"callbacks":>10} {"3 transitions":>15}')
+  for callbacks in map(int, args.callbacks.split(',')):
+    seconds = measure(callbacks, max(1, args.tasks // max(1, callbacks // 10)))
+    print(f'{callbacks:>10} {seconds * 1e6:>13.1f}µs')
+
+
+if __name__ == '__main__':
+  main()
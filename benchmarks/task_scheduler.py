@@ -0,0 +1,89 @@
+"""
+Measures the CPU time that the #TaskPriorityQueue of the #DefaultExecutor burns while many tasks are
+scheduled for the future and several workers are waiting for them, and the delay with which the tasks
+start after they are due.
+
+    $ python benchmarks/task_scheduler.py [--tasks 100000] [--workers 8] [--delay 20] [--idle 2]
+"""
+
+import argparse
+import dataclasses
+import threading
+import time
+import typing as t
+
+from nr.util.task import Runnable
+from nr.util.task._default import Task, TaskPriorityQueue
+
+
+@dataclasses.dataclass
+class Noop(Runnable[None]):
+
+  def run(self, task: Task) -> None:
+    pass
+
+
+def worker(queue: TaskPriorityQueue, delays: t.List[float]) -> None:
+  while True:
+    task = queue.get()
+    if task is None:
+      break
+    delays.append(time.time() - t.cast(float, task.due))  # type: ignore
+    queue.task_done()
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--tasks', type=int, default=100_000)
+  parser.add_argument('--workers', type=int, default=8)
+  parser.add_argument('--delay', type=float, default=20.0, help='seconds in the future to schedule the tasks')
+  parser.add_argument('--idle', type=float, default=2.0, help='seconds to measure CPU time while idle')
+  args = parser.parse_args()
+
+  queue = TaskPriorityQueue()
+  delays: t.List[float] = []
+  threads = [threading.Thread(target=worker, args=(queue, delays)) for _ in range(args.workers)]
+  for thread in threads:
+    thread.start()
+
+  due = time.time() + args.delay
+  tstart, cpu_start = time.perf_counter(), time.process_time()
+  for i in range(args.tasks):
+    task: Task[None] = Task(Noop(), 'noop')
+    task.due = due + i * 1e-6  # type: ignore
+    queue.put(task.due, task)  # type: ignore
+  elapsed, cpu = time.perf_counter() - tstart, time.process_time() - cpu_start
+  print(f'scheduled {args.tasks:,} tasks in {elapsed:.2f}s ({cpu / args.tasks * 1e6:.1f}us CPU per task)')
+
+  # Trickle in tasks due before all others while the workers wait, forcing the waiting thread(s) to
+  # re-evaluate the earliest deadline.
+  cpu_start, wall_start = time.process_time(), time.perf_counter()
+  for i in range(100):
+    task = Task(Noop(), 'noop')
+    task.due = due - 1 - i * 1e-3  # type: ignore
+    queue.put(task.due, task)  # type: ignore
+    time.sleep(0.01)
+  cpu = time.process_time() - cpu_start
+  print(f'CPU while trickling in 100 earlier tasks: {cpu * 1e3:.1f}ms over {time.perf_counter() - wall_start:.2f}s')
+
+  if time.time() + args.idle >= due:
+    parser.error('--delay is too short to measure the idle time after scheduling the tasks')
+
+  cpu_start, wall_start = time.process_time(), time.perf_counter()
+  time.sleep(args.idle)
+  cpu = time.process_time() - cpu_start
+  wall = time.perf_counter() - wall_start
+  print(f'idle CPU with {args.workers} waiting workers: {cpu:.3f}s over {wall:.2f}s ({cpu / wall * 100:.1f}% of one core)')
+
+  queue.join_total()
+  for _ in threads:
+    queue.put_stop(0)
+  for thread in threads:
+    thread.join()
+
+  delays.sort()
+  print(f'start delay after due: median {delays[len(delays) // 2] * 1e3:.1f}ms, max {delays[-1] * 1e3:.1f}ms')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,62 @@
+"""
+Compares the submit throughput of #DefaultExecutor.execute() in a loop with #DefaultExecutor.execute_many().
+
+    $ python benchmarks/task_submit.py [--tasks 50000] [--workers 8] [--repeat 3]
+"""
+
+import argparse
+import dataclasses
+import gc
+import time
+import typing as t
+
+from nr.util.task import DefaultExecutor, Runnable, Task
+
+
+@dataclasses.dataclass
+class Noop(Runnable[None]):
+
+  def run(self, task: Task) -> None:
+    pass
+
+
+def submit_loop(executor: DefaultExecutor, runnables: t.List[Noop]) -> None:
+  for runnable in runnables:
+    executor.execute(runnable)
+
+
+def submit_many(executor: DefaultExecutor, runnables: t.List[Noop]) -> None:
+  executor.execute_many(runnables)
+
+
+def measure(submit: t.Callable[[DefaultExecutor, t.List[Noop]], None], tasks: int, workers: int, repeat: int) -> float:
+  best = float('inf')
+  runnables = [Noop() for _ in range(tasks)]
+  for _ in range(repeat):
+    executor = DefaultExecutor('Bench', workers)
+    gc.collect()
+    tstart = time.perf_counter()
+    submit(executor, runnables)
+    best = min(best, time.perf_counter() - tstart)
+    executor.join()
+    executor.shutdown()
+  return best
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--tasks', type=int, default=50_000)
+  parser.add_argument('--workers', type=int, default=8)
+  parser.add_argument('--repeat', type=int, default=3)
+  args = parser.parse_args()
+
+  loop = measure(submit_loop, args.tasks, args.workers, args.repeat)
+  many = measure(submit_many, args.tasks, args.workers, args.repeat)
+  print(
+    f'execute() {args.tasks / loop:>9,.0f}/s  execute_many() {args.tasks / many:>9,.0f}/s  '
+    f'({loop / many:.1f}x)'
+  )
+
+
+if __name__ == '__main__':
+  main()
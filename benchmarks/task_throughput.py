@@ -0,0 +1,49 @@
+"""
+Measures the submit and dispatch throughput of the #DefaultExecutor for tasks that do no work, at
+different numbers of workers.
+
+    $ python benchmarks/task_throughput.py [--tasks 50000] [--workers 1,8,32]
+"""
+
+import argparse
+import dataclasses
+import time
+
+from nr.util.task import DefaultExecutor, Runnable, Task
+
+
+@dataclasses.dataclass
+class Noop(Runnable[None]):
+
+  def run(self, task: Task) -> None:
+    pass
+
+
+def measure(tasks: int, workers: int) -> None:
+  executor = DefaultExecutor('Bench', workers)
+  runnable = Noop()
+  tstart = time.perf_counter()
+  for _ in range(tasks):
+    executor.execute(runnable, 'noop')
+  submitted = time.perf_counter() - tstart
+  executor.join()
+  completed = time.perf_counter() - tstart
+  executor.shutdown()
+  print(
+    f'{workers:>3} workers ({executor.get_worker_count():>2} started)  '
+    f'submit {tasks / submitted:>9,.0f}/s  dispatch {tasks / completed:>9,.0f}/s'
+  )
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--tasks', type=int, default=50_000)
+  parser.add_argument('--workers', default='1,8,32')
+  args = parser.parse_args()
+
+  for workers in map(int, args.workers.split(',')):
+    measure(args.tasks, workers)
+
+
+if __name__ == '__main__':
+  main()
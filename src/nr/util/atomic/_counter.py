@@ -21,13 +21,13 @@ class AtomicCounter:
     with self._cond:
       return self._value
 
-  def inc(self) -> None:
+  def inc(self, n: int = 1) -> None:
     """
-    Increment the counter by one.
+    Increment the counter by *n*.
     """
 
     with self._cond:
-      self._value += 1
+      self._value += n
 
   def dec(self) -> None:
     """
@@ -2,4 +2,5 @@
 """ Provides a simplistic API and a couple of implementations for key/value databases. """
 
 from ._api import KeyValueStore, Transaction
+from ._cache import CachedKeyValueStore
 from ._mappingadapter import MappingAdapter
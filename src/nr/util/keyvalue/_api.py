@@ -47,6 +47,47 @@ class KeyValueStore(abc.ABC):
   def delete(self, key: str) -> None:
     ...
 
+  def get_with_expiration(self, key: str) -> tuple[bytes, int | None]:
+    """
+    Returns the value of *key* and the Unix timestamp at which it expires, or `None` if it does not
+    expire. The default implementation calls #get() and reports no expiration.
+    """
+
+    return self.get(key), None
+
+  def get_many(self, keys: t.Iterable[str]) -> t.Dict[str, bytes]:
+    """
+    Returns the values of all *keys* that exist in the store. Keys that do not exist are not included
+    in the result. The default implementation calls #get() for every key, implementations may override
+    it to look up the keys in bulk.
+    """
+
+    result = {}
+    for key in keys:
+      try:
+        result[key] = self.get(key)
+      except KeyError:
+        pass
+    return result
+
+  def set_many(self, items: t.Mapping[str, bytes] | t.Iterable[tuple[str, bytes]], exp: int | None = None) -> None:
+    """
+    Sets all key-value pairs in *items* with the same expiration. The default implementation calls #set()
+    for every item, implementations may override it to write the items in bulk.
+    """
+
+    for key, data in (items.items() if isinstance(items, t.Mapping) else items):
+      self.set(key, data, exp)
+
+  def delete_many(self, keys: t.Iterable[str]) -> None:
+    """
+    Deletes all *keys* from the store. The default implementation calls #delete() for every key,
+    implementations may override it to delete the keys in bulk.
+    """
+
+    for key in keys:
+      self.delete(key)
+
   @abc.abstractmethod
   def keys(self, prefix: str = '') -> t.Iterable[str]:
     ...
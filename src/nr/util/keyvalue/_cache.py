@@ -0,0 +1,192 @@
+
+from __future__ import annotations
+
+import collections
+import math
+import threading
+import time
+import typing as t
+
+from ._api import KeyValueStore
+
+
+class CachedKeyValueStore(KeyValueStore):
+  """
+  A #KeyValueStore that keeps recently read values of another store in memory. The cache is bounded by
+  the number of entries and the total size of the cached values, and evicts the least recently used
+  entries first. Entries are not served past the expiration that the underlying store reports through
+  #KeyValueStore.get_with_expiration(), and not longer than *max_age* seconds if it is set.
+
+  Writes through this object are passed to the underlying store and invalidate the affected keys. Writes
+  that bypass it (e.g. from another process) are only picked up once the entry expires, was evicted or
+  exceeded the *max_age*. The same applies to values that were read inside of a transaction on the
+  underlying store that was later aborted, use #clear() in that case.
+
+  # Arguments
+  store: The store to cache values of.
+  max_entries: The maximum number of cached keys, or `None` for no limit.
+  max_bytes: The maximum total size of the cached values, or `None` for no limit. Values larger than
+    this are not cached.
+  max_age: The number of seconds after which a cached value is read from the *store* again.
+  """
+
+  def __init__(
+    self,
+    store: KeyValueStore,
+    max_entries: int | None = 1024,
+    max_bytes: int | None = None,
+    max_age: float | None = None,
+  ) -> None:
+    self._store = store
+    self._max_entries = max_entries
+    self._max_bytes = max_bytes
+    self._max_age = max_age
+    self._lock = threading.Lock()
+    self._entries: collections.OrderedDict[str, tuple[bytes, int | None, float]] = collections.OrderedDict()
+    self._bytes = 0
+    self._version = 0  # Incremented on every write, such that reads racing with a write are not cached.
+    self._hits = 0
+    self._misses = 0
+    self._evictions = 0
+
+  def __repr__(self) -> str:
+    return f'{type(self).__name__}({self._store!r})'
+
+  def _lookup(self, key: str) -> tuple[bytes, int | None] | None:
+    """
+    Returns the cached value of *key* and its expiration, or `None` if it is not cached or no longer
+    valid. Must be called with the lock held.
+    """
+
+    entry = self._entries.get(key)
+    if entry is None:
+      return None
+    value, exp, cached_at = entry
+    if (exp is not None and math.ceil(time.time()) >= exp) or \
+        (self._max_age is not None and time.monotonic() - cached_at >= self._max_age):
+      self._remove(key)
+      return None
+    self._entries.move_to_end(key)
+    return value, exp
+
+  def _insert(self, key: str, value: bytes, exp: int | None, version: int) -> None:
+    """
+    Caches the *value* of *key* unless a write happened since *version*. Must be called with the lock held.
+    """
+
+    if version != self._version or (self._max_bytes is not None and len(value) > self._max_bytes):
+      return
+    self._remove(key)
+    self._entries[key] = (value, exp, time.monotonic())
+    self._bytes += len(value)
+    while (self._max_entries is not None and len(self._entries) > self._max_entries) or \
+        (self._max_bytes is not None and self._bytes > self._max_bytes):
+      _key, (evicted, _exp, _cached_at) = self._entries.popitem(last=False)
+      self._bytes -= len(evicted)
+      self._evictions += 1
+
+  def _remove(self, key: str) -> None:
+    entry = self._entries.pop(key, None)
+    if entry is not None:
+      self._bytes -= len(entry[0])
+
+  def _invalidate(self, keys: t.Iterable[str]) -> None:
+    with self._lock:
+      self._version += 1
+      for key in keys:
+        self._remove(key)
+
+  def get(self, key: str) -> bytes:
+    return self.get_with_expiration(key)[0]
+
+  def get_with_expiration(self, key: str) -> tuple[bytes, int | None]:
+    with self._lock:
+      entry = self._lookup(key)
+      if entry is not None:
+        self._hits += 1
+        return entry
+      self._misses += 1
+      version = self._version
+
+    value, exp = self._store.get_with_expiration(key)
+    with self._lock:
+      self._insert(key, value, exp, version)
+    return value, exp
+
+  def get_many(self, keys: t.Iterable[str]) -> t.Dict[str, bytes]:
+    """
+    Returns the cached values and reads the remaining keys from the underlying store in bulk. The values
+    read in bulk are not cached, because #KeyValueStore.get_many() does not report their expiration.
+    """
+
+    result: t.Dict[str, bytes] = {}
+    missing: t.List[str] = []
+    with self._lock:
+      for key in keys:
+        entry = self._lookup(key)
+        if entry is None:
+          missing.append(key)
+        else:
+          result[key] = entry[0]
+      self._hits += len(result)
+      self._misses += len(missing)
+    if missing:
+      result.update(self._store.get_many(missing))
+    return result
+
+  def set(self, key: str, data: bytes, exp: int | None = None) -> None:
+    try:
+      self._store.set(key, data, exp)
+    finally:
+      self._invalidate((key,))
+
+  def set_many(self, items: t.Mapping[str, bytes] | t.Iterable[tuple[str, bytes]], exp: int | None = None) -> None:
+    items = dict(items)
+    try:
+      self._store.set_many(items, exp)
+    finally:
+      self._invalidate(items)
+
+  def delete(self, key: str) -> None:
+    try:
+      self._store.delete(key)
+    finally:
+      self._invalidate((key,))
+
+  def delete_many(self, keys: t.Iterable[str]) -> None:
+    keys = list(keys)
+    try:
+      self._store.delete_many(keys)
+    finally:
+      self._invalidate(keys)
+
+  def keys(self, prefix: str = '') -> t.Iterable[str]:
+    return self._store.keys(prefix)
+
+  def count(self, prefix: str = '') -> int:
+    return self._store.count(prefix)
+
+  def clear(self) -> None:
+    """
+    Removes all entries from the cache.
+    """
+
+    with self._lock:
+      self._version += 1
+      self._entries.clear()
+      self._bytes = 0
+
+  def get_stats(self) -> t.Dict[str, int]:
+    """
+    Returns the number of cache hits, misses and evictions, and the number and total size of the cached
+    values.
+    """
+
+    with self._lock:
+      return {
+        'hits': self._hits,
+        'misses': self._misses,
+        'evictions': self._evictions,
+        'entries': len(self._entries),
+        'bytes': self._bytes,
+      }
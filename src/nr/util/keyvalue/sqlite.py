@@ -4,20 +4,41 @@
 from __future__ import annotations
 
 import contextlib
+import itertools
+import logging
 import math
 import sqlite3
 import string
 import threading
 import time
 import typing as t
+import weakref
 
-from ._api import KeyValueStore
+from ._api import KeyValueStore, Transaction
+
+logger = logging.getLogger(__name__)
+
+#: The number of keys to look up per query in #SqliteDatastore.get_many(), safely below the default limit
+#: of 999 bound parameters in older SQLite versions.
+_CHUNK_SIZE = 500
+
+
+def _chunks(iterable: t.Iterable[str], size: int) -> t.Iterator[t.List[str]]:
+  it = iter(iterable)
+  while True:
+    chunk = list(itertools.islice(it, size))
+    if not chunk:
+      break
+    yield chunk
+
+
+def _escape_like(value: str) -> str:
+  return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
 
 
 def _fetch_all(cursor: sqlite3.Cursor) -> t.Iterable[tuple]:
   while True:
     rows = cursor.fetchmany()
-    print(rows)
     if not rows:
       break
     yield from rows
@@ -27,15 +48,59 @@ class SqliteDatastore:
   """
   Provider for key-value datastores backed by an SQLite3 database.
 
-  The #SqliteDatastore is thread-safe, but may be slow to access concurrently due to locking requirements.
+  Writes are committed immediately unless they are grouped with #transaction().
+
+  The #SqliteDatastore is thread-safe. By default, all operations share a single connection and are
+  serialized by a lock. In *pooled* mode, the database is switched to write-ahead logging and every thread
+  reads through its own connection, such that reads run concurrently and are not blocked by writes, while
+  writes still go through a single connection. Pooled mode requires a database file.
+
+  # Arguments
+  filename: The path to the SQLite database file, or `:memory:`.
+  pooled: Enable write-ahead logging and per-thread read connections. Note that this also sets the
+    `synchronous` pragma to `NORMAL`, which means that the most recent commits may be lost (but the
+    database is not corrupted) on power loss.
+
+  # Raises
+  ValueError: If *pooled* is enabled for an in-memory database.
+
+  Expired keys are hidden from reads, but only deleted by #expunge(). Use #start_expiry() to expunge them
+  periodically in a background thread.
   """
 
   NAMESPACE_CHARS = frozenset(string.ascii_letters + string.digits + '._-')
 
-  def __init__(self, filename: str) -> None:
-    self._lock = threading.Lock()
-    self._conn = sqlite3.connect(filename, check_same_thread=False)
+  def __init__(self, filename: str, pooled: bool = False) -> None:
+    if pooled and (filename in ('', ':memory:') or 'mode=memory' in filename):
+      raise ValueError('pooled mode requires a database file, in-memory databases are not shared between connections')
+    self._filename = filename
+    self._pooled = pooled
+    self._lock = threading.RLock()
+    self._conn = sqlite3.connect(filename, check_same_thread=False, isolation_level=None)
     self._created_namespaces: t.Set[str] = set()
+    self._transactions: t.List[SqliteTransaction] = []
+    self._transaction_owner: t.Optional[int] = None
+    self._local = threading.local()
+    self._readers: t.List[t.Tuple[weakref.ref[threading.Thread], sqlite3.Connection]] = []
+    self._readers_lock = threading.Lock()
+    self._expiry_thread: t.Optional[threading.Thread] = None
+    self._expiry_stop = threading.Event()
+    if pooled:
+      self._conn.execute('PRAGMA journal_mode=WAL')
+      self._conn.execute('PRAGMA synchronous=NORMAL')
+
+  def close(self) -> None:
+    """
+    Stop the background expiry and close the database connection and all read connections.
+    """
+
+    self.stop_expiry()
+    with self._readers_lock:
+      readers, self._readers = self._readers, []
+    for _ref, conn in readers:
+      conn.close()
+    with self._lock:
+      self._conn.close()
 
   @staticmethod
   def _get_time(add: int) -> int:
@@ -57,13 +122,133 @@ class SqliteDatastore:
     with self._lock, contextlib.closing(self._conn.cursor()) as cursor:
       yield cursor
 
+  @contextlib.contextmanager
+  def _write_cursor(self) -> t.Iterator[sqlite3.Cursor]:
+    """
+    Returns a cursor for writing to the database. The statements executed with the cursor are committed
+    when the context exits, unless a #transaction() is active in which case they become part of it.
+    """
+
+    with self._locked_cursor() as cursor:
+      if self._transactions:
+        yield cursor
+        return
+      cursor.execute('BEGIN IMMEDIATE')
+      try:
+        yield cursor
+      except BaseException:
+        self._rollback(cursor, None)
+        raise
+      cursor.execute('COMMIT')
+
+  def _rollback(self, cursor: sqlite3.Cursor, savepoint: t.Optional[str]) -> None:
+    """
+    Rolls back the current transaction, or to the given *savepoint*. Namespaces that were created since
+    may have been rolled back as well, so they must be checked again.
+    """
+
+    if savepoint is None:
+      cursor.execute('ROLLBACK')
+    else:
+      cursor.execute(f'ROLLBACK TO "{savepoint}"')
+      cursor.execute(f'RELEASE "{savepoint}"')
+    self._created_namespaces.clear()
+
+  def transaction(self) -> SqliteTransaction:
+    """
+    Begins a transaction that groups all writes until it is committed or aborted, usually by using the
+    returned object as a context manager. Transactions can be nested, in which case the inner transaction
+    is backed by a savepoint that can be rolled back independently of the outer transaction.
+
+    A transaction belongs to the thread that began it. Writes from other threads block until the outermost
+    transaction has ended, and so do reads from other threads unless the store is in pooled mode, in which
+    case they see the data as of the last commit.
+
+    ```py
+    with store.transaction():
+      for key, value in items:
+        store.set('namespace', key, value)
+    ```
+    """
+
+    self._lock.acquire()
+    try:
+      savepoint = f'sp{len(self._transactions)}' if self._transactions else None
+      with contextlib.closing(self._conn.cursor()) as cursor:
+        cursor.execute(f'SAVEPOINT "{savepoint}"' if savepoint else 'BEGIN IMMEDIATE')
+      transaction = SqliteTransaction(self, savepoint)
+      self._transactions.append(transaction)
+      self._transaction_owner = threading.get_ident()
+    except BaseException:
+      self._lock.release()
+      raise
+    return transaction
+
+  def _end_transaction(self, transaction: SqliteTransaction, commit: bool) -> None:
+    if self._transaction_owner != threading.get_ident():
+      raise RuntimeError('transaction is not active in the current thread')
+    with self._lock:
+      if transaction not in self._transactions:
+        raise RuntimeError('transaction has already ended')
+      if self._transactions[-1] is not transaction:
+        raise RuntimeError('cannot end a transaction while a nested transaction is active')
+      try:
+        with contextlib.closing(self._conn.cursor()) as cursor:
+          if commit:
+            cursor.execute(f'RELEASE "{transaction._savepoint}"' if transaction._savepoint else 'COMMIT')
+          else:
+            self._rollback(cursor, transaction._savepoint)
+      finally:
+        self._transactions.pop()
+        if not self._transactions:
+          self._transaction_owner = None
+        self._lock.release()  # Acquired in #transaction().
+
+  def _get_reader(self) -> sqlite3.Connection:
+    """
+    Returns the read connection of the current thread, opening it if necessary. Connections of threads
+    that have exited are closed along the way.
+    """
+
+    conn: t.Optional[sqlite3.Connection] = getattr(self._local, 'conn', None)
+    if conn is None:
+      conn = sqlite3.connect(self._filename, check_same_thread=False)
+      conn.execute('PRAGMA query_only=ON')
+      self._local.conn = conn
+      with self._readers_lock:
+        alive: t.List[t.Tuple[weakref.ref[threading.Thread], sqlite3.Connection]] = []
+        stale: t.List[t.Tuple[weakref.ref[threading.Thread], sqlite3.Connection]] = []
+        for ref, reader in self._readers:
+          owner = ref()
+          (alive if owner is not None and owner.is_alive() else stale).append((ref, reader))
+        alive.append((weakref.ref(threading.current_thread()), conn))
+        self._readers = alive
+      for _ref, reader in stale:
+        reader.close()
+    return conn
+
+  @contextlib.contextmanager
+  def _read_cursor(self) -> t.Iterator[sqlite3.Cursor]:
+    """
+    Returns a cursor for read-only queries. In pooled mode, the cursor belongs to the read connection
+    of the current thread and no lock is acquired, unless the current thread has an active transaction
+    whose changes it needs to see.
+    """
+
+    if not self._pooled or self._transaction_owner == threading.get_ident():
+      with self._locked_cursor() as cursor:
+        yield cursor
+    else:
+      with contextlib.closing(self._get_reader().cursor()) as cursor:
+        yield cursor
+
   def get_namespaces(self) -> t.Iterator[str]:
     """
     Returns an iterator that returns the name of all namespaces known to the Sqlite store. Note
     that new namespaces are created on-deman using #store().
     """
 
-    with self._locked_cursor() as cursor:
+    with self._read_cursor() as cursor:
       yield from self._get_namespaces(cursor)
 
   def get_keys(self, namespace: str, prefix: str) -> t.Iterator[tuple[str, int | None]]:
@@ -72,13 +257,13 @@ class SqliteDatastore:
     timestamp. This excludes any keys that are already expired but not yet expunged.
     """
 
-    with self._locked_cursor() as cursor:
+    with self._read_cursor() as cursor:
       try:
         cursor.execute(f'''
           SELECT key, exp FROM "{namespace}"
-          WHERE key LIKE ? AND (exp IS NULL OR exp < ?)
+          WHERE key LIKE ? ESCAPE '\\' AND (exp IS NULL OR ? < exp)
           ''',
-          (prefix.replace('%', '%%') + '%', self._get_time(0),))
+          (_escape_like(prefix) + '%', self._get_time(0),))
       except sqlite3.OperationalError as exc:
         if 'no such table' in str(exc):
           raise ValueError(f'namespace {namespace!r} does not exist')
@@ -91,14 +276,23 @@ class SqliteDatastore:
       cursor.execute(f'''
         CREATE TABLE IF NOT EXISTS "{namespace}"
         (key TEXT PRIMARY KEY, value BLOB, exp INTEGER)''')
+      # The ":" can not occur in namespace names, so the index name can not clash with a table name.
+      cursor.execute(f'CREATE INDEX IF NOT EXISTS "{namespace}:exp" ON "{namespace}" (exp)')
       self._created_namespaces.add(namespace)
 
   def get(self, namespace: str, key: str) -> bytes:
+    return self.get_with_expiration(namespace, key)[0]
+
+  def get_with_expiration(self, namespace: str, key: str) -> tuple[bytes, int | None]:
+    """
+    Returns the value of the *key* in the *namespace* and the Unix timestamp at which it expires.
+    """
+
     self._validate_namespace(namespace)
-    with self._locked_cursor() as cursor:
+    with self._read_cursor() as cursor:
       try:
         cursor.execute(f'''
-          SELECT value FROM "{namespace}"
+          SELECT value, exp FROM "{namespace}"
             WHERE key = ? AND (? < exp OR exp IS NULL)''',
           (key, self._get_time(0)),
         )
@@ -111,11 +305,11 @@ class SqliteDatastore:
           raise KeyError(f'{namespace} :: {key}')
       if not isinstance(result[0], bytes):
         raise RuntimeError(f'expected data to be bytes, got {type(result[0]).__name__}')
-      return result[0]
+      return result[0], result[1]
 
   def set(self, namespace: str, key: str, value: bytes, expires_in: int | None = None) -> None:
     self._validate_namespace(namespace)
-    with self._locked_cursor() as cursor:
+    with self._write_cursor() as cursor:
 
       # Create the table for the namespace if it does not exist.
       self._ensure_namespace(cursor, namespace)
@@ -128,11 +322,9 @@ class SqliteDatastore:
         (key, value, exp),
       )
 
-      self._conn.commit()
-
   def delete(self, namespace: str, key: str) -> None:
     self._validate_namespace(namespace)
-    with self._locked_cursor() as cursor:
+    with self._write_cursor() as cursor:
 
       # Create the table for the namespace if it does not exist.
       self._ensure_namespace(cursor, namespace)
@@ -140,21 +332,155 @@ class SqliteDatastore:
       # Insert the value into the database.
       cursor.execute(f'DELETE FROM "{namespace}" WHERE key = ?', (key,))
 
-      self._conn.commit()
+  def get_many(self, namespace: str, keys: t.Iterable[str]) -> t.Dict[str, bytes]:
+    """
+    Returns the values of all *keys* in the *namespace* that exist and are not expired. The keys are
+    looked up in chunks of #_CHUNK_SIZE per query.
+    """
+
+    self._validate_namespace(namespace)
+    result: t.Dict[str, bytes] = {}
+    with self._read_cursor() as cursor:
+      now = self._get_time(0)
+      for chunk in _chunks(keys, _CHUNK_SIZE):
+        try:
+          cursor.execute(f'''
+            SELECT key, value FROM "{namespace}"
+              WHERE key IN ({', '.join('?' * len(chunk))}) AND (? < exp OR exp IS NULL)''',
+            (*chunk, now),
+          )
+        except sqlite3.OperationalError as exc:
+          if 'no such table' in str(exc):
+            raise ValueError(f'namespace {namespace!r} does not exist')
+          raise
+        for key, value in _fetch_all(cursor):
+          if not isinstance(value, bytes):
+            raise RuntimeError(f'expected data to be bytes, got {type(value).__name__}')
+          result[key] = value
+    return result
+
+  def set_many(
+    self,
+    namespace: str,
+    items: t.Mapping[str, bytes] | t.Iterable[tuple[str, bytes]],
+    expires_in: int | None = None,
+  ) -> None:
+    """
+    Sets all key-value pairs in *items* in a single transaction.
+    """
+
+    self._validate_namespace(namespace)
+    pairs = items.items() if isinstance(items, t.Mapping) else items
+    exp = self._get_time(expires_in) if expires_in is not None else None
+    with self._write_cursor() as cursor:
+      self._ensure_namespace(cursor, namespace)
+      cursor.executemany(f'''
+        INSERT OR REPLACE INTO "{namespace}"
+        VALUES (?, ?, ?)''',
+        ((key, value, exp) for key, value in pairs),
+      )
+
+  def delete_many(self, namespace: str, keys: t.Iterable[str]) -> None:
+    """
+    Deletes all *keys* from the *namespace* in a single transaction.
+    """
+
+    self._validate_namespace(namespace)
+    with self._write_cursor() as cursor:
+      self._ensure_namespace(cursor, namespace)
+      cursor.executemany(f'DELETE FROM "{namespace}" WHERE key = ?', ((key,) for key in keys))
 
   def get_namespace(self, namespace: str) -> KeyValueStore:
-    with self._locked_cursor() as cursor:
+    with self._write_cursor() as cursor:
       self._ensure_namespace(cursor, namespace)
     return SqliteNamespace(self, namespace)
 
-  def expunge(self, namespace: t.Optional[str] = None) -> None:
-    with self._locked_cursor() as cursor:
+  def expunge(self, namespace: t.Optional[str] = None, limit: t.Optional[int] = None) -> int:
+    """
+    Delete expired keys from the *namespace*, or from all namespaces, and return the number of deleted keys.
+    If a *limit* is specified, at most that many keys are deleted per namespace.
+    """
+
+    deleted = 0
+    with self._write_cursor() as cursor:
       for namespace in [namespace] if namespace else list(self._get_namespaces(cursor)):
-        cursor.execute(f'''
-          DELETE FROM "{namespace}" WHERE exp < ?''',
-          (self._get_time(0),),
-        )
-      self._conn.commit()
+        if limit is None:
+          cursor.execute(f'DELETE FROM "{namespace}" WHERE exp < ?', (self._get_time(0),))
+        else:
+          cursor.execute(f'''
+            DELETE FROM "{namespace}" WHERE rowid IN (
+              SELECT rowid FROM "{namespace}" WHERE exp < ? LIMIT ?)''',
+            (self._get_time(0), limit),
+          )
+        deleted += cursor.rowcount
+    return deleted
+
+  def _expire(self, batch_size: int, max_rate: t.Optional[float]) -> None:
+    """
+    Expunge all namespaces in batches of *batch_size* keys, each in its own transaction, pausing between
+    batches such that at most *max_rate* keys are deleted per second.
+    """
+
+    with self._locked_cursor() as cursor:
+      namespaces = list(self._get_namespaces(cursor))
+    for namespace in namespaces:
+      while not self._expiry_stop.is_set():
+        tstart = time.monotonic()
+        if self.expunge(namespace, batch_size) < batch_size:
+          break
+        if max_rate is not None:
+          self._expiry_stop.wait(batch_size / max_rate - (time.monotonic() - tstart))
+
+  def start_expiry(self, interval: float = 60.0, batch_size: int = 500, max_rate: t.Optional[float] = None) -> None:
+    """
+    Start a background thread that expunges expired keys from all namespaces every *interval* seconds
+    until #stop_expiry() is called. Keys are deleted in batches with a separate transaction each, so
+    that other writes are only blocked briefly.
+
+    # Arguments
+    interval: The number of seconds between two runs.
+    batch_size: The maximum number of keys to delete per transaction.
+    max_rate: The maximum number of keys to delete per second. Unlimited if not set.
+
+    # Raises
+    RuntimeError: If the expiry thread is already running.
+    """
+
+    if self._expiry_thread is not None:
+      raise RuntimeError('expiry thread is already running')
+
+    def _loop() -> None:
+      while not self._expiry_stop.wait(interval):
+        try:
+          self._expire(batch_size, max_rate)
+        except Exception:
+          logger.exception('Unhandled exception while expunging expired keys')
+
+    self._expiry_stop.clear()
+    self._expiry_thread = threading.Thread(target=_loop, name='SqliteDatastore-Expiry', daemon=True)
+    self._expiry_thread.start()
+
+  def stop_expiry(self) -> None:
+    if self._expiry_thread is not None:
+      self._expiry_stop.set()
+      self._expiry_thread.join()
+      self._expiry_thread = None
+
+
+class SqliteTransaction(Transaction):
+  """
+  A transaction or savepoint in a #SqliteDatastore, created with #SqliteDatastore.transaction().
+  """
+
+  def __init__(self, store: SqliteDatastore, savepoint: t.Optional[str]) -> None:
+    self._store = store
+    self._savepoint = savepoint
+
+  def commit(self) -> None:
+    self._store._end_transaction(self, True)
+
+  def abort(self) -> None:
+    self._store._end_transaction(self, False)
 
 
 class SqliteNamespace(KeyValueStore):
@@ -172,6 +498,25 @@ class SqliteNamespace(KeyValueStore):
   def delete(self, key: str) -> None:
     self._store.delete(self._namespace, key)
 
+  def get_with_expiration(self, key: str) -> tuple[bytes, int | None]:
+    return self._store.get_with_expiration(self._namespace, key)
+
+  def get_many(self, keys: t.Iterable[str]) -> t.Dict[str, bytes]:
+    return self._store.get_many(self._namespace, keys)
+
+  def set_many(self, items: t.Mapping[str, bytes] | t.Iterable[tuple[str, bytes]], expires_in: int | None = None) -> None:
+    self._store.set_many(self._namespace, items, expires_in)
+
+  def delete_many(self, keys: t.Iterable[str]) -> None:
+    self._store.delete_many(self._namespace, keys)
+
+  def transaction(self) -> SqliteTransaction:
+    """
+    Begins a transaction in the underlying #SqliteDatastore, see #SqliteDatastore.transaction().
+    """
+
+    return self._store.transaction()
+
   def keys(self, prefix: str = '') -> t.Iterable[str]:
     for key, _exp in self._store.get_keys(self._namespace, prefix):
       yield key
@@ -0,0 +1,18 @@
+""" Provides the #Stream and #AsyncStream classes for fluent, lazy transformations of iterables. """
+
+from ._async import AsyncStream
+from ._distinct import BloomFilter, LRUSet
+from ._reducer import Reducer
+from ._stream import Aggregator, Collector, Stream
+from ._window import Window
+
+__all__ = [
+  'Aggregator',
+  'AsyncStream',
+  'BloomFilter',
+  'Collector',
+  'LRUSet',
+  'Reducer',
+  'Stream',
+  'Window',
+]
@@ -0,0 +1,188 @@
+""" Implements #AsyncStream, the counterpart of #Stream for asynchronous iterables. """
+
+import asyncio
+import collections
+import inspect
+import typing as t
+
+from nr.util.generic import R, T, T_co, U
+
+MaybeAwaitable = t.Union[T, t.Awaitable[T]]
+
+
+async def _resolve(value: MaybeAwaitable[T]) -> T:
+  if inspect.isawaitable(value):
+    return await t.cast(t.Awaitable[T], value)
+  return t.cast(T, value)
+
+
+async def _from_iterable(iterable: t.Iterable[T]) -> t.AsyncIterator[T]:
+  for item in iterable:
+    yield item
+
+
+def _check_concurrency(concurrency: int) -> None:
+  if concurrency < 1:
+    raise ValueError(f'concurrency must be at least 1, got {concurrency}')
+
+
+async def _map(it: t.AsyncIterator[T], func: t.Callable[[T], MaybeAwaitable[R]], concurrency: int) -> t.AsyncIterator[R]:
+  """
+  Apply *func* to every element of *it*, awaiting up to *concurrency* results at the same time while
+  retaining the order of the elements.
+  """
+
+  if concurrency == 1:
+    async for item in it:
+      yield await _resolve(func(item))
+    return
+
+  pending: t.Deque['asyncio.Future[R]'] = collections.deque()
+  try:
+    async for item in it:
+      pending.append(asyncio.ensure_future(_resolve(func(item))))
+      if len(pending) >= concurrency:
+        yield await pending.popleft()
+    while pending:
+      yield await pending.popleft()
+  finally:
+    for future in pending:
+      future.cancel()
+
+
+async def _filter(it: t.AsyncIterator[T], predicate: t.Callable[[T], MaybeAwaitable[bool]], concurrency: int) -> t.AsyncIterator[T]:
+  """
+  Yield the elements of *it* for which *predicate* is true, awaiting up to *concurrency* results of
+  the predicate at the same time while retaining the order of the elements.
+  """
+
+  async def _check(item: T) -> t.Tuple[bool, T]:
+    return bool(await _resolve(predicate(item))), item
+
+  check: t.Callable[[T], MaybeAwaitable[t.Tuple[bool, T]]] = _check
+  async for keep, item in _map(it, check, concurrency):
+    if keep:
+      yield item
+
+
+class AsyncStream(t.Generic[T_co], t.AsyncIterator[T_co]):
+  """
+  An asynchronous stream wraps an async iterable (or a plain iterable) and provides a subset of the
+  #Stream operators. Functions passed to the operators may return awaitables, which will be awaited.
+  """
+
+  def __init__(self, iterable: t.Union[t.AsyncIterable[T_co], t.Iterable[T_co], None] = None) -> None:
+    if iterable is None:
+      iterable = ()
+    if isinstance(iterable, t.AsyncIterable):
+      self._it: t.AsyncIterator[T_co] = iterable.__aiter__()
+    else:
+      self._it = _from_iterable(iterable)
+
+  def __aiter__(self) -> 'AsyncStream[T_co]':
+    return self
+
+  async def __anext__(self) -> T_co:
+    return await self._it.__anext__()
+
+  @t.overload
+  def batch(self, n: int) -> 'AsyncStream[t.List[T_co]]': ...
+
+  @t.overload
+  def batch(self, n: int, collector: t.Callable[[t.List[T_co]], R]) -> 'AsyncStream[R]': ...
+
+  def batch(self, n, collector=None):
+    """
+    Convert the stream into a stream of batches of size *n*. Unlike #Stream.batch(), the elements of
+    a batch are always gathered in a list before they are passed to the *collector*.
+    """
+
+    if n < 1:
+      raise ValueError(f'n must be at least 1, got {n}')
+
+    async def generator():
+      batch = []
+      async for item in self._it:
+        batch.append(item)
+        if len(batch) == n:
+          yield batch if collector is None else collector(batch)
+          batch = []
+      if batch:
+        yield batch if collector is None else collector(batch)
+
+    return AsyncStream(generator())
+
+  @t.overload
+  async def collect(self) -> t.List[T_co]: ...
+
+  @t.overload
+  async def collect(self, collector: t.Callable[[t.List[T_co]], R]) -> R: ...
+
+  async def collect(self, collector=None):
+    """
+    Collects the stream into a list and passes it to the *collector*, if specified.
+    """
+
+    items = [x async for x in self._it]
+    return items if collector is None else collector(items)
+
+  def distinct(self, key: t.Optional[t.Callable[[T_co], MaybeAwaitable[t.Any]]] = None) -> 'AsyncStream[T_co]':
+    """
+    Yields unique items whilst preserving the original order. The *key* may return an awaitable.
+    """
+
+    async def generator() -> t.AsyncIterator[T_co]:
+      seen: t.Set[t.Any] = set()
+      async for item in self._it:
+        key_val = item if key is None else await _resolve(key(item))
+        if key_val not in seen:
+          seen.add(key_val)
+          yield item
+
+    return AsyncStream(generator())
+
+  def filter(self, predicate: t.Callable[[T_co], MaybeAwaitable[bool]], concurrency: int = 1) -> 'AsyncStream[T_co]':
+    """
+    Filter the stream by the *predicate*. Up to *concurrency* awaitables returned by the predicate are
+    awaited at the same time.
+    """
+
+    _check_concurrency(concurrency)
+    return AsyncStream(_filter(self._it, predicate, concurrency))
+
+  @t.overload
+  def groupby(self, key: t.Callable[[T_co], MaybeAwaitable[R]]) -> 'AsyncStream[t.Tuple[R, t.List[T_co]]]': ...
+
+  @t.overload
+  def groupby(self, key: t.Callable[[T_co], MaybeAwaitable[R]], collector: t.Callable[[t.List[T_co]], U]) -> 'AsyncStream[t.Tuple[R, U]]': ...
+
+  def groupby(self, key, collector=None):
+    """
+    Group consecutive elements with the same *key*, like #Stream.groupby(). The elements of a group
+    are gathered in a list before they are passed to the *collector*.
+    """
+
+    async def generator():
+      sentinel = object()
+      current_key: t.Any = sentinel
+      group: t.List[T_co] = []
+      async for item in self._it:
+        key_val = await _resolve(key(item))
+        if current_key is not sentinel and key_val != current_key:
+          yield current_key, group if collector is None else collector(group)
+          group = []
+        current_key = key_val
+        group.append(item)
+      if current_key is not sentinel:
+        yield current_key, group if collector is None else collector(group)
+
+    return AsyncStream(generator())
+
+  def map(self, func: t.Callable[[T_co], MaybeAwaitable[R]], concurrency: int = 1) -> 'AsyncStream[R]':
+    """
+    Apply *func* to every element in the stream. If *func* returns awaitables, up to *concurrency* of
+    them are awaited at the same time. The order of the elements is retained.
+    """
+
+    _check_concurrency(concurrency)
+    return AsyncStream(_map(self._it, func, concurrency))
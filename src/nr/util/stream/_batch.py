@@ -0,0 +1,68 @@
+""" Batching of numeric streams into NumPy arrays or #array.array objects. """
+
+import array
+import itertools
+import typing as t
+
+
+def _get_numpy(use_numpy: t.Optional[bool]) -> t.Any:
+  if use_numpy is False:
+    return None
+  try:
+    import numpy  # type: ignore[import]
+  except ImportError:
+    if use_numpy:
+      raise
+    return None
+  return numpy
+
+
+def array_batches(
+  iterable: t.Iterable[t.Any],
+  n: int,
+  dtype: str = 'd',
+  reuse: bool = False,
+  use_numpy: t.Optional[bool] = None,
+) -> t.Iterator[t.Any]:
+  """
+  Yield batches of up to *n* elements from *iterable* as NumPy arrays of the given *dtype*, or as
+  #array.array objects if NumPy is not available or *use_numpy* is `False`. In the latter case, the
+  *dtype* must be a valid #array.array typecode (e.g. `'d'`, `'f'`, `'i'` or `'q'`), which are also
+  understood by NumPy.
+
+  If *reuse* is enabled and NumPy is used, a single buffer of size *n* is allocated up front and filled
+  for every batch. The yielded arrays are views into that buffer, so a batch is only valid until the next
+  batch is requested. #array.array batches are always allocated anew because filling them directly from
+  the iterator is faster than copying into an existing buffer.
+  """
+
+  if n < 1:
+    raise ValueError(f'n must be at least 1, got {n}')
+
+  numpy = _get_numpy(use_numpy)
+
+  def numpy_generator() -> t.Iterator[t.Any]:
+    it = iter(iterable)
+    buffer = numpy.empty(n, dtype) if reuse else None
+    while True:
+      chunk = list(itertools.islice(it, n))
+      if not chunk:
+        break
+      if buffer is None:
+        yield numpy.array(chunk, dtype)
+      else:
+        buffer[:len(chunk)] = chunk
+        yield buffer[:len(chunk)]
+
+  def array_generator() -> t.Iterator[t.Any]:
+    it = iter(iterable)
+    while True:
+      chunk = array.array(dtype, itertools.islice(it, n))
+      if not chunk:
+        break
+      yield chunk
+
+  if numpy is None:
+    array.array(dtype)  # Validate the typecode early.
+    return array_generator()
+  return numpy_generator()
@@ -0,0 +1,130 @@
+""" Memory-bounded containers to keep track of seen elements in #Stream.distinct(). """
+
+import collections
+import math
+import typing as t
+
+from nr.util.generic import T
+
+_MASK_64 = (1 << 64) - 1
+
+
+class BloomFilter(t.Generic[T]):
+  """
+  A probabilistic set that uses a fixed amount of memory. Membership tests never report false negatives
+  and report false positives at about the specified *error_rate* as long as no more than *capacity*
+  elements have been added. Elements must be hashable, but they are not retained.
+
+  Note that the filter relies on the built-in #hash() function, which is randomized for strings and
+  bytes between Python processes. A filter should not be persisted or shared across processes.
+  """
+
+  def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+    if capacity < 1:
+      raise ValueError(f'capacity must be at least 1, got {capacity}')
+    if not 0 < error_rate < 1:
+      raise ValueError(f'error_rate must be between 0 and 1, got {error_rate}')
+    self._capacity = capacity
+    self._error_rate = error_rate
+    self._nbits = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+    self._nhashes = max(1, int(round(self._nbits / capacity * math.log(2))))
+    self._bits = bytearray((self._nbits + 7) // 8)
+    self._count = 0
+
+  def __repr__(self) -> str:
+    return f'BloomFilter(capacity={self._capacity!r}, error_rate={self._error_rate!r})'
+
+  def __len__(self) -> int:
+    """
+    Returns the number of times #add() has been called.
+    """
+
+    return self._count
+
+  def __contains__(self, item: object) -> bool:
+    return self._probe(item, False)
+
+  def _probe(self, item: object, add: bool) -> bool:
+    """
+    Test the bits for *item*, setting them if *add* is enabled. Returns #True if all bits were set.
+    """
+
+    bits, nbits = self._bits, self._nbits
+    # Kirsch-Mitzenmacher double hashing, deriving all hash functions from two base hashes. Both are derived
+    # from a single #hash() with multiply-xorshift rounds (as in the MurmurHash3 finalizer), which spread the
+    # bits of consecutive hash values such that the two base hashes are not correlated.
+    h = hash(item) & _MASK_64
+    h1 = ((h ^ (h >> 33)) * 0xFF51AFD7ED558CCD) & _MASK_64
+    h1 ^= h1 >> 33
+    h2 = (h1 * 0xC4CEB9FE1A85EC53) & _MASK_64
+    h2 ^= h2 >> 33
+    index, step = h1 % nbits, h2 % nbits or 1
+    found = True
+    for _ in range(self._nhashes):
+      mask = 1 << (index & 7)
+      if not bits[index >> 3] & mask:
+        if not add:
+          return False
+        found = False
+        bits[index >> 3] |= mask
+      index = (index + step) % nbits
+    return found
+
+  @property
+  def capacity(self) -> int:
+    return self._capacity
+
+  @property
+  def error_rate(self) -> float:
+    return self._error_rate
+
+  @property
+  def size_in_bytes(self) -> int:
+    return len(self._bits)
+
+  def add(self, item: T) -> None:
+    self._probe(item, True)
+    self._count += 1
+
+
+class LRUSet(t.MutableSet[T]):
+  """
+  A set that retains only the *maxsize* most recently used elements. Adding an element or finding it
+  with the `in` operator counts as a use.
+  """
+
+  def __init__(self, maxsize: int, iterable: t.Iterable[T] = ()) -> None:
+    if maxsize < 1:
+      raise ValueError(f'maxsize must be at least 1, got {maxsize}')
+    self._maxsize = maxsize
+    self._data: 't.OrderedDict[T, None]' = collections.OrderedDict()
+    for item in iterable:
+      self.add(item)
+
+  def __repr__(self) -> str:
+    return f'LRUSet(maxsize={self._maxsize!r}, {list(self._data)!r})'
+
+  def __contains__(self, item: object) -> bool:
+    if item in self._data:
+      self._data.move_to_end(t.cast(T, item))
+      return True
+    return False
+
+  def __iter__(self) -> t.Iterator[T]:
+    return iter(self._data)
+
+  def __len__(self) -> int:
+    return len(self._data)
+
+  @property
+  def maxsize(self) -> int:
+    return self._maxsize
+
+  def add(self, item: T) -> None:
+    self._data[item] = None
+    self._data.move_to_end(item)
+    if len(self._data) > self._maxsize:
+      self._data.popitem(last=False)
+
+  def discard(self, item: T) -> None:
+    self._data.pop(item, None)
@@ -0,0 +1,39 @@
+""" Fuses consecutive element-wise #Stream stages into a single generator. """
+
+import functools
+import typing as t
+
+#: A stage is a tuple of the operation name and its argument (e.g. the function for a `'map'`).
+Stage = t.Tuple[str, t.Any]
+
+_TEMPLATES = {
+  'map': 'x = f{i}(x)',
+  'filter': 'if not f{i}(x): continue',
+  'dropnone': 'if x is None: continue',
+  'of_type': 'if not isinstance(x, f{i}): continue',
+}
+
+
+@functools.lru_cache(maxsize=128)
+def _compile(ops: t.Tuple[str, ...]) -> t.Callable[..., t.Iterator[t.Any]]:
+  """
+  Generate a generator function that applies the given sequence of operations to every element of an
+  iterable in a single loop. The arguments to the operations are passed as positional arguments after
+  the iterable.
+  """
+
+  args = ''.join(f', f{i}' for i in range(len(ops)))
+  lines = [f'def fused(it{args}):', '  for x in it:']
+  lines += ['    ' + _TEMPLATES[op].format(i=i) for i, op in enumerate(ops)]
+  lines += ['    yield x']
+  namespace: t.Dict[str, t.Any] = {}
+  exec(compile('\n'.join(lines), f'<nr.util.stream fused {"/".join(ops)}>', 'exec'), namespace)
+  return namespace['fused']
+
+
+def fuse(source: t.Iterator[t.Any], stages: t.Sequence[Stage]) -> t.Iterator[t.Any]:
+  """
+  Apply the *stages* to the *source* iterator in a single generator frame.
+  """
+
+  return _compile(tuple(op for op, _ in stages))(source, *(arg for _, arg in stages))
@@ -0,0 +1,102 @@
+""" Implements the parallel stages of a #Stream. """
+
+import collections
+import concurrent.futures
+import functools
+import itertools
+import os
+import typing as t
+
+import typing_extensions as te
+
+from nr.util.generic import R, T
+
+Backend = t.Union[te.Literal['thread', 'process'], concurrent.futures.Executor]
+
+
+def _apply_filter(predicate: t.Callable[[T], bool], item: T) -> t.Tuple[bool, T]:
+  return bool(predicate(item)), item
+
+
+def _apply_flatmap(func: t.Callable[[T], t.Iterable[R]], item: T) -> t.List[R]:
+  return list(func(item))
+
+
+def parallel_map(
+  iterable: t.Iterable[T],
+  func: t.Callable[[T], R],
+  workers: t.Optional[int] = None,
+  backend: Backend = 'thread',
+  window: t.Optional[int] = None,
+  ordered: bool = True,
+) -> t.Iterator[R]:
+  """
+  Apply *func* to every element of *iterable* in a pool of *workers*, keeping at most *window* elements
+  in flight at the same time. If *ordered* is `True`, results are yielded in the order of the input
+  elements, otherwise they are yielded in the order in which they complete.
+
+  A pool that is created from a *backend* name is shut down when the returned iterator is exhausted
+  or closed. An #concurrent.futures.Executor passed as the *backend* is not shut down.
+  """
+
+  if workers is not None and workers < 1:
+    raise ValueError(f'workers must be at least 1, got {workers}')
+  if isinstance(backend, concurrent.futures.Executor):
+    factory: t.Optional[t.Callable[[], concurrent.futures.Executor]] = None
+  elif backend == 'thread':
+    factory = functools.partial(concurrent.futures.ThreadPoolExecutor, workers)
+  elif backend == 'process':
+    factory = functools.partial(concurrent.futures.ProcessPoolExecutor, workers)
+  else:
+    raise ValueError(f'invalid backend: {backend!r}')
+
+  if window is None:
+    window = 2 * (workers or os.cpu_count() or 1)
+  elif window < 1:
+    raise ValueError(f'window must be at least 1, got {window}')
+
+  def generator() -> t.Iterator[R]:
+    executor = factory() if factory is not None else t.cast(concurrent.futures.Executor, backend)
+    it = iter(iterable)
+    queue: t.Deque['concurrent.futures.Future[R]'] = collections.deque()
+    pending: t.Set['concurrent.futures.Future[R]'] = set()
+    try:
+      if ordered:
+        queue.extend(executor.submit(func, x) for x in itertools.islice(it, window))
+        while queue:
+          future = queue.popleft()
+          queue.extend(executor.submit(func, x) for x in itertools.islice(it, 1))
+          yield future.result()
+      else:
+        pending.update(executor.submit(func, x) for x in itertools.islice(it, window))
+        while pending:
+          done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+          pending.update(executor.submit(func, x) for x in itertools.islice(it, len(done)))
+          for future in done:
+            yield future.result()
+    finally:
+      for future in itertools.chain(queue, pending):
+        future.cancel()
+      if factory is not None:
+        executor.shutdown(wait=True)
+
+  return generator()
+
+
+def parallel_filter(iterable: t.Iterable[T], predicate: t.Callable[[T], bool], **kwargs: t.Any) -> t.Iterator[T]:
+  """
+  Like #parallel_map(), but yields only the elements for which *predicate* returns `True`.
+  """
+
+  results = parallel_map(iterable, functools.partial(_apply_filter, predicate), **kwargs)
+  return (item for keep, item in results if keep)
+
+
+def parallel_flatmap(iterable: t.Iterable[T], func: t.Callable[[T], t.Iterable[R]], **kwargs: t.Any) -> t.Iterator[R]:
+  """
+  Like #parallel_map(), but flattens the iterables returned by *func*. Note that the result of *func*
+  is fully materialized in the worker before it is returned.
+  """
+
+  results = parallel_map(iterable, functools.partial(_apply_flatmap, func), **kwargs)
+  return itertools.chain.from_iterable(results)
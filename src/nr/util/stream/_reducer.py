@@ -0,0 +1,181 @@
+""" Incremental aggregations that can be applied to a #Stream without materializing it. """
+
+import dataclasses
+import operator
+import typing as t
+
+from nr.util.generic import K, R, T, V
+from nr.util.singleton import NotSet
+
+A = t.TypeVar('A')
+
+
+def _identity(value: A) -> A:
+  return value
+
+
+def _min_step(key: t.Optional[t.Callable[[T], t.Any]], acc: t.Any, item: T) -> t.Any:
+  if acc is NotSet.Value:
+    return item
+  if key is None:
+    return item if item < acc else acc
+  return item if key(item) < key(acc) else acc
+
+
+def _max_step(key: t.Optional[t.Callable[[T], t.Any]], acc: t.Any, item: T) -> t.Any:
+  if acc is NotSet.Value:
+    return item
+  if key is None:
+    return item if item > acc else acc
+  return item if key(item) > key(acc) else acc
+
+
+def _none_if_not_set(acc: t.Any) -> t.Any:
+  return None if acc is NotSet.Value else acc
+
+
+@dataclasses.dataclass(frozen=True)
+class Reducer(t.Generic[T, A, R]):
+  """
+  Describes an incremental aggregation of elements of type `T` into a result of type `R` through an
+  accumulator of type `A`. Only the accumulator is held in memory while elements are fed into it, which
+  allows aggregating arbitrarily large streams (or groups of a stream) in constant memory.
+
+  A reducer can be used as a collector, e.g. `Stream(values).collect(Reducer.sum())` or as the *collector*
+  argument to #Stream.groupby().
+  """
+
+  #: Creates the initial accumulator.
+  initial: t.Callable[[], A]
+
+  #: Feeds an element into the accumulator, returning the new accumulator.
+  step: t.Callable[[A, T], A]
+
+  #: Converts the final accumulator into the result.
+  finish: t.Callable[[A], R] = _identity  # type: ignore
+
+  def __call__(self, iterable: t.Iterable[T]) -> R:
+    step = self.step
+    acc = self.initial()
+    for item in iterable:
+      acc = step(acc, item)
+    return self.finish(acc)
+
+  @staticmethod
+  def of(aggregator: t.Callable[[A, T], A], initial: t.Callable[[], A]) -> 'Reducer[T, A, A]':
+    """
+    Create a reducer from an *aggregator* function and a factory for the *initial* accumulator.
+    """
+
+    return Reducer(initial, aggregator)
+
+  @staticmethod
+  def count() -> 'Reducer[t.Any, int, int]':
+    """
+    Counts the elements.
+    """
+
+    return Reducer(int, lambda acc, _item: acc + 1)
+
+  @staticmethod
+  def sum(key: t.Optional[t.Callable[[T], t.Any]] = None) -> 'Reducer[T, t.Any, t.Any]':
+    """
+    Sums up the elements, or the value returned by *key* for each element.
+    """
+
+    if key is None:
+      return Reducer(int, operator.add)
+    return Reducer(int, lambda acc, item: acc + key(item))  # type: ignore
+
+  @staticmethod
+  def min(key: t.Optional[t.Callable[[T], t.Any]] = None) -> 'Reducer[T, t.Any, t.Optional[T]]':
+    """
+    Finds the smallest element, optionally compared by *key*. Returns `None` if there are no elements.
+    """
+
+    return Reducer(lambda: NotSet.Value, lambda acc, item: _min_step(key, acc, item), _none_if_not_set)
+
+  @staticmethod
+  def max(key: t.Optional[t.Callable[[T], t.Any]] = None) -> 'Reducer[T, t.Any, t.Optional[T]]':
+    """
+    Finds the largest element, optionally compared by *key*. Returns `None` if there are no elements.
+    """
+
+    return Reducer(lambda: NotSet.Value, lambda acc, item: _max_step(key, acc, item), _none_if_not_set)
+
+  @staticmethod
+  def list() -> 'Reducer[T, t.List[T], t.List[T]]':
+    """
+    Collects the elements into a list. Note that this reducer does not use constant memory.
+    """
+
+    def step(acc: t.List[T], item: T) -> t.List[T]:
+      acc.append(item)
+      return acc
+
+    return Reducer(lambda: [], step)
+
+  @staticmethod
+  def zip(*reducers: 'Reducer[T, t.Any, t.Any]') -> 'Reducer[T, t.List[t.Any], t.Tuple[t.Any, ...]]':
+    """
+    Combines multiple reducers into one that computes all of their results in a single pass and returns
+    them as a tuple.
+    """
+
+    def initial() -> t.List[t.Any]:
+      return [r.initial() for r in reducers]
+
+    def step(acc: t.List[t.Any], item: T) -> t.List[t.Any]:
+      for index, reducer in enumerate(reducers):
+        acc[index] = reducer.step(acc[index], item)
+      return acc
+
+    def finish(acc: t.List[t.Any]) -> t.Tuple[t.Any, ...]:
+      return tuple(r.finish(a) for r, a in zip(reducers, acc))
+
+    return Reducer(initial, step, finish)
+
+
+def reduce_sorted_groups(iterable: t.Iterable[V], key: t.Callable[[V], K], reducer: Reducer[V, A, R]) -> t.Iterator[t.Tuple[K, R]]:
+  """
+  Apply the *reducer* to every run of consecutive elements in *iterable* that share the same *key*.
+  """
+
+  initial, step, finish = reducer.initial, reducer.step, reducer.finish
+  it = iter(iterable)
+  for item in it:
+    current_key = key(item)
+    acc = step(initial(), item)
+    break
+  else:
+    return
+
+  for item in it:
+    key_val = key(item)
+    if key_val != current_key:
+      yield current_key, finish(acc)
+      current_key = key_val
+      acc = initial()
+    acc = step(acc, item)
+
+  yield current_key, finish(acc)
+
+
+def reduce_hashed_groups(iterable: t.Iterable[V], key: t.Callable[[V], K], reducer: Reducer[V, A, R]) -> t.Iterator[t.Tuple[K, R]]:
+  """
+  Apply the *reducer* to all elements in *iterable* that share the same *key*, regardless of their
+  position. The groups are yielded in the order of their first occurrence once the *iterable* is exhausted.
+  """
+
+  initial, step = reducer.initial, reducer.step
+  accumulators: t.Dict[K, A] = {}
+  for item in iterable:
+    key_val = key(item)
+    try:
+      acc = accumulators[key_val]
+    except KeyError:
+      acc = initial()
+    accumulators[key_val] = step(acc, item)
+
+  for key_val, acc in accumulators.items():
+    yield key_val, reducer.finish(acc)
@@ -0,0 +1,73 @@
+""" External merge sort for #Stream.sortby(). """
+
+import heapq
+import itertools
+import pickle
+import tempfile
+import typing as t
+
+from nr.util.generic import T
+
+#: The number of elements that are pickled together when a run is written to disk.
+_BLOCK_SIZE = 1024
+
+
+def _write_run(items: t.List[T], tempdir: t.Optional[str]) -> t.IO[bytes]:
+  fp = tempfile.TemporaryFile(dir=tempdir)
+  try:
+    for offset in range(0, len(items), _BLOCK_SIZE):
+      pickle.dump(items[offset:offset + _BLOCK_SIZE], fp, pickle.HIGHEST_PROTOCOL)
+    fp.seek(0)
+  except:
+    fp.close()
+    raise
+  return fp
+
+
+def _read_run(fp: t.IO[bytes]) -> t.Iterator[T]:
+  while True:
+    try:
+      block = pickle.load(fp)
+    except EOFError:
+      break
+    yield from block
+
+
+def external_sort(
+  iterable: t.Iterable[T],
+  key: t.Optional[t.Callable[[T], t.Any]] = None,
+  reverse: bool = False,
+  buffer_size: int = 100000,
+  tempdir: t.Optional[str] = None,
+) -> t.Iterator[T]:
+  """
+  Sort the elements of *iterable* while holding no more than *buffer_size* elements in memory. Sorted runs
+  of *buffer_size* elements are pickled to temporary files, which are merged lazily when the returned
+  iterator is consumed. If the iterable fits into the buffer, it is sorted in memory instead. The sort is
+  stable, just like #sorted().
+  """
+
+  if buffer_size < 1:
+    raise ValueError(f'buffer_size must be at least 1, got {buffer_size}')
+
+  def generator() -> t.Iterator[T]:
+    it = iter(iterable)
+    runs: t.List[t.IO[bytes]] = []
+    try:
+      while True:
+        chunk = list(itertools.islice(it, buffer_size))
+        if not runs and len(chunk) < buffer_size:
+          chunk.sort(key=key, reverse=reverse)
+          yield from chunk
+          return
+        if not chunk:
+          break
+        chunk.sort(key=key, reverse=reverse)
+        runs.append(_write_run(chunk, tempdir))
+        del chunk
+      yield from heapq.merge(*map(_read_run, runs), key=key, reverse=reverse)
+    finally:
+      for fp in runs:
+        fp.close()
+
+  return generator()
@@ -0,0 +1,610 @@
+
+import collections
+import functools
+import itertools
+import typing as t
+
+import typing_extensions as te
+
+from nr.util.generic import R, T, T_co, U, U_co
+from nr.util.singleton import NotSet
+
+from ._batch import array_batches
+from ._distinct import BloomFilter, LRUSet
+from ._fusion import Stage, fuse
+from ._parallel import Backend, parallel_filter, parallel_flatmap, parallel_map
+from ._reducer import Reducer, reduce_hashed_groups, reduce_sorted_groups
+from ._sort import external_sort
+from ._tee import broadcast, tee
+from ._window import Window, session_windows, sliding_windows, tumbling_windows
+
+if t.TYPE_CHECKING:
+  from nr.util.optional import Optional
+
+Aggregator = t.Callable[[T, U], T]
+Collector = t.Callable[[t.Iterable[T]], R]
+GroupStrategy = te.Literal['sorted', 'hash']
+
+
+class Stream(t.Generic[T_co], t.Iterable[T_co]):
+  """
+  A stream is an iterable with utility methods to transform it.
+  """
+
+  def __init__(self, iterable: t.Optional[t.Iterable[T_co]] = None) -> None:
+    if iterable is None:
+      iterable = ()
+    self._it = iter(iterable)
+    self._original: t.Optional[t.Iterable[T_co]] = iterable
+
+    #: The source iterator and element-wise stages that #_it is composed of, see #_fuse().
+    self._stages: t.Optional[t.Tuple[t.Iterator[t.Any], t.Tuple[Stage, ...]]] = None
+
+  def __iter__(self) -> 'Stream[T_co]':
+    return self
+
+  def __next__(self) -> T_co:
+    self._original = None
+    return next(self._it)
+
+  @t.overload
+  def __getitem__(self, val: slice) -> 'Stream[T_co]': ...
+
+  @t.overload
+  def __getitem__(self, val: int) -> T_co: ...
+
+  def __getitem__(self, val):
+    if isinstance(val, slice):
+      return self.slice(val.start, val.stop, val.step)
+    elif isinstance(val, int):
+      if val >= 0:
+        for index, value in enumerate(self):
+          if index == val:
+            return value
+        raise IndexError('Stream has no element at position {}'.format(val))
+      else:
+        queue = collections.deque(self, maxlen=abs(val))
+        if len(queue) < abs(val):
+          raise IndexError('Stream has no element at position {}'.format(val))
+        return queue[0]
+    else:
+      raise TypeError('{} object is only subscriptable with slices'.format(type(self).__name__))
+
+  def _fuse(self, op: str, arg: t.Any) -> 'Stream[t.Any]':
+    """
+    Internal. Create a new stream that applies the element-wise operation *op* after the stages of this
+    stream. Consecutive stages are compiled into a single generator instead of creating one generator
+    per stage, saving a frame resumption per stage and element. This is safe even if this stream has
+    already been advanced because the stages do not buffer elements.
+    """
+
+    source, stages = self._stages or (self._it, ())
+    stages += ((op, arg),)
+    stream: Stream[t.Any] = Stream(fuse(source, stages))
+    stream._stages = (source, stages)
+    return stream
+
+  def next(self) -> T_co:
+    return next(self._it)
+
+  def append(self, *its: t.Iterable[T_co]) -> 'Stream[T_co]':
+    return Stream(itertools.chain(self._it, *its))
+
+  @t.overload
+  def batch(self, n: int) -> 'Stream[t.List[T_co]]': ...
+
+  @t.overload
+  def batch(self, n: int, collector: Collector[T_co, R]) -> 'Stream[R]': ...
+
+  @t.overload
+  def batch(self, n: int, *, dtype: str, reuse: bool = False, use_numpy: t.Optional[bool] = None) -> 'Stream[t.Any]': ...
+
+  def batch(self, n, collector=None, *, dtype=None, reuse=False, use_numpy=None):
+    """
+    Convert the stream into a stream of batches of size *n*, where each element of the stream
+    contains the result of the *collector* after passing up to *n* elements of the original
+    stream into it.
+
+    If a *dtype* is specified instead of a *collector*, the batches are NumPy arrays, or #array.array
+    objects if NumPy is not installed or *use_numpy* is `False`. With *reuse* enabled, NumPy batches
+    are views into a single preallocated buffer that is overwritten by the next batch.
+    """
+
+    if dtype is not None:
+      if collector is not None:
+        raise ValueError('collector and dtype are mutually exclusive')
+      return Stream(array_batches(self._it, n, dtype, reuse, use_numpy))
+
+    iterable = iter(self._it)
+    if collector is None:
+      collector = list
+
+    def take(first):
+      yield first
+      count = 1
+      while count < n:
+        try:
+          yield next(iterable)
+        except StopIteration:
+          break
+        count += 1
+
+    def generate_batches():
+      while True:
+        try:
+          first = next(iterable)
+        except StopIteration:
+          break
+        yield collector(take(first))
+
+    return Stream(generate_batches())
+
+  def bipartition(self, predicate: t.Callable[[T_co], bool]) -> 't.Tuple[Stream[T_co], Stream[T_co]]':
+    """
+    Use a predicate to partition items into false and true entries.
+    Returns a tuple of two streams with the first containing all elements
+    for which *pred* returned #False and the other containing all elements
+    where *pred* returned #True. Elements are buffered without bounds for
+    the stream that is consumed later, see #tee() for a bounded alternative.
+    """
+
+    t1, t2 = itertools.tee(self._it)
+    return Stream(itertools.filterfalse(predicate, t1)), Stream(filter(predicate, t2))
+
+  def broadcast(self, *sinks: t.Union[Reducer[T_co, t.Any, t.Any], Collector[T_co, t.Any]], maxsize: int = 1024) -> t.Tuple[t.Any, ...]:
+    """
+    Compute the results of multiple *sinks* in a single pass over the stream and return them as a
+    tuple. The sinks may be #Reducer objects, which are fed element by element in the calling thread,
+    or collectors, which each run in a separate thread and read from a shared buffer that holds at most
+    *maxsize* elements. This consumes the stream.
+
+    ```py
+    count, total, top = Stream(values).broadcast(Reducer.count(), Reducer.sum(), lambda it: heapq.nlargest(3, it))
+    ```
+    """
+
+    return broadcast(self._it, sinks, maxsize)
+
+  def call(self: 'Stream[t.Callable[..., R]]', *a: t.Any, **kw: t.Any) -> 'Stream[R]':
+    """
+    Calls every item in *iterable* with the specified arguments.
+    """
+
+    return Stream(x(*a, **kw) for x in self._it)
+
+  @t.overload
+  def collect(self) -> t.List[T_co]: ...
+
+  @t.overload
+  def collect(self, collector: Collector[T_co, R]) -> R: ...
+
+  def collect(self, collector=list):
+    """
+    Collects the stream into a collection.
+    """
+
+    if isinstance(collector, type) and isinstance(self._original, collector):
+      # NOTE(NiklasRosenstein): This is an optimization to retrieve the original underlying
+      #   collection if the stream has not been advanced yet.
+      return self._original
+
+    return collector(self._it)
+
+  def count(self) -> int:
+    """
+    Returns the number of items in the stream. This fully consumes the stream.
+    """
+
+    count = 0
+    while True:
+      try:
+       next(self._it)
+      except StopIteration:
+        break
+      count += 1
+    return count
+
+  @t.overload
+  def concat(s: "Stream[str]") -> "Stream[str]":
+    ...
+
+  @t.overload
+  def concat(s: "Stream[t.Iterable[T]]") -> "Stream[T]":
+    ...
+
+  def concat(self):
+    """
+    Concatenate all values in the stream into a single stream of values.
+    """
+
+    def generator():
+      for it in self:
+        for element in t.cast(t.Iterable, it):
+          yield element
+    return Stream(generator())
+
+  def consume(self, n: t.Optional[int] = None) -> 'Stream[T_co]':
+    """
+    Consume the contents of the stream, up to *n* elements if the argument is specified.
+    """
+
+    if n is not None:
+      for _ in range(n):
+        try:
+          next(self._it)
+        except StopIteration:
+          break
+    else:
+      while True:
+        try:
+          next(self._it)
+        except StopIteration:
+          break
+    return self
+
+  def distinct(self,
+    key: t.Optional[t.Callable[[T_co], t.Any]] = None,
+    skip: t.Union[t.MutableSet[T_co], t.MutableSequence[T_co], BloomFilter[T_co], None] = None,
+    *,
+    window: t.Optional[int] = None,
+    capacity: t.Optional[int] = None,
+    error_rate: float = 0.01,
+  ) -> 'Stream[T_co]':
+    """
+    Yields unique items from *iterable* whilst preserving the original order. If *skip* is
+    specified, it must be a set or sequence of items to skip in the first place (ie. items to
+    exclude from the returned stream). The specified set/sequence is modified in-place. Using a
+    set is highly recommended for performance purposes.
+
+    By default, all keys are remembered, thus memory grows with the number of unique elements. The
+    memory can be bounded by passing an #LRUSet or #BloomFilter as *skip*, or with the following
+    shorthands:
+
+    # Parameters
+    window: Remember only the *window* most recently seen keys (see #LRUSet). Duplicates are only
+      detected if they are close to each other, which is suitable for nearly sorted input.
+    capacity: Remember keys in a #BloomFilter with the given *capacity* and *error_rate*. Elements
+      may be dropped falsely at the *error_rate*, which increases once the *capacity* is exceeded.
+    """
+
+    if (skip is not None) + (window is not None) + (capacity is not None) > 1:
+      raise ValueError('skip, window and capacity are mutually exclusive')
+
+    if key is None:
+      key_func = lambda x: x
+    else:
+      key_func = key
+
+    def generator() -> t.Generator[T_co, None, None]:
+      seen: t.Any
+      if window is not None:
+        seen = LRUSet(window)
+      elif capacity is not None:
+        seen = BloomFilter(capacity, error_rate)
+      else:
+        seen = set() if skip is None else skip
+      mark_visited = seen.append if isinstance(seen, t.MutableSequence) else seen.add
+      check_visited = seen.__contains__
+      for item in self._it:
+        key_val = key_func(item)
+        if not check_visited(key_val):
+          mark_visited(key_val)
+          yield item
+
+    return Stream(generator())
+
+  def dropwhile(self, predicate: t.Callable[[T_co], bool]) -> 'Stream[T_co]':
+    return Stream(itertools.dropwhile(predicate, self._it))
+
+  def dropnone(self: 'Stream[t.Optional[T_co]]') -> 'Stream[T_co]':
+    return self._fuse('dropnone', None)
+
+  def filter(self, predicate: t.Callable[[T_co], bool]) -> 'Stream[T_co]':
+    """
+    Agnostic to Python's built-in `filter()` function.
+    """
+
+    return self._fuse('filter', predicate)
+
+  def first(self) -> t.Optional[T_co]:
+    """
+    Returns the first element of the stream, or `None`.
+    """
+
+    try:
+      return self.next()
+    except StopIteration:
+      return None
+
+  def firstopt(self) -> 'Optional[T_co]':
+    """
+    Returns the first element of the stream as an `Optional`.
+    """
+
+    from nr.util.optional import Optional
+    return Optional(self.first())
+
+  def flatmap(self, func: t.Callable[[T_co], t.Iterable[R]]) -> 'Stream[R]':
+    """
+    Same as #map() but flattens the result.
+    """
+
+    def generator() -> t.Generator[R, None, None]:
+      for x in self._it:
+        for y in func(x):
+          yield y
+    return Stream(generator())
+
+  @t.overload
+  def groupby(self, key: t.Callable[[T_co], R], *, strategy: GroupStrategy = 'sorted') -> 'Stream[t.Tuple[R, t.Iterable[T_co]]]': ...
+
+  @t.overload
+  def groupby(self, key: t.Callable[[T_co], R], collector: t.Callable[[t.Iterable[T_co]], U], *, strategy: GroupStrategy = 'sorted') -> 'Stream[t.Tuple[R, U]]': ...
+
+  def groupby(self, key: t.Callable[[T_co], U], collector: t.Optional[Collector[T_co, R]] = None, *, strategy: GroupStrategy = 'sorted'):
+    """
+    Group elements by their *key*. The elements of each group are passed to the *collector*, if specified.
+
+    With the `'sorted'` *strategy* (the default), only consecutive elements with the same key are grouped,
+    thus the input should be sorted by the key. Groups are produced lazily, one at a time.
+
+    With the `'hash'` *strategy*, elements are grouped regardless of their position and the groups are
+    produced in the order of their first occurrence after the stream has been exhausted.
+
+    If the *collector* is a #Reducer, the group members are fed into it one by one and are never held in
+    memory, making the memory requirement O(1) for the `'sorted'` and O(groups) for the `'hash'` strategy.
+    Otherwise, the `'hash'` strategy keeps all elements in memory.
+    """
+
+    if strategy == 'sorted':
+      if isinstance(collector, Reducer):
+        return Stream(reduce_sorted_groups(self._it, key, collector))
+      elif collector is None:
+        return Stream(itertools.groupby(self._it, key))
+      else:
+        def generator():
+          assert collector is not None
+          g: t.Iterable[T_co]
+          for k, g in itertools.groupby(self._it, key):
+            yield k, collector(g)
+        return Stream(generator())
+    elif strategy == 'hash':
+      if isinstance(collector, Reducer):
+        return Stream(reduce_hashed_groups(self._it, key, collector))
+      groups: t.Iterator[t.Tuple[U, t.List[T_co]]] = reduce_hashed_groups(self._it, key, Reducer.list())
+      if collector is None:
+        return Stream(groups)
+      return Stream((k, collector(g)) for k, g in groups)
+    else:
+      raise ValueError(f'invalid strategy: {strategy!r}')
+
+  def map_batches(
+    self,
+    func: t.Callable[[t.Any], t.Iterable[R]],
+    n: int,
+    dtype: str = 'd',
+    *,
+    use_numpy: t.Optional[bool] = None,
+  ) -> 'Stream[R]':
+    """
+    Apply a vectorized *func* to batches of *n* elements and flatten the results. The batches are
+    created like with #batch() using the *dtype* and a reused buffer, thus *func* may modify the batch
+    in-place and return it, but must not retain a reference to it.
+
+    ```py
+    Stream(values).map_batches(lambda a: numpy.sqrt(a, out=a), 4096)
+    ```
+    """
+
+    batches = array_batches(self._it, n, dtype, True, use_numpy)
+    return Stream(itertools.chain.from_iterable(map(func, batches)))
+
+  def map(self, func: t.Callable[[T_co], R]) -> 'Stream[R]':
+    """
+    Agnostic to Python's built-in `map()` function.
+    """
+
+    return self._fuse('map', func)
+
+  def of_type(self, type: t.Type[U_co]) -> 'Stream[U_co]':
+    """
+    Filters using #isinstance().
+    """
+
+    return self._fuse('of_type', type)
+
+  def pmap(
+    self,
+    func: t.Callable[[T_co], R],
+    workers: t.Optional[int] = None,
+    backend: Backend = 'thread',
+    window: t.Optional[int] = None,
+    ordered: bool = True,
+  ) -> 'Stream[R]':
+    """
+    Like #map(), but applies *func* to the elements in a pool of workers. The source stream is only
+    advanced as far as needed to keep *window* elements in flight.
+
+    # Parameters
+    func: The function to apply. Must be picklable if the *backend* is `'process'`.
+    workers: The number of workers in the pool that is created for the *backend*.
+    backend: Either `'thread'`, `'process'` or a #concurrent.futures.Executor. A pool that is created
+      from a backend name is shut down when the stream is exhausted or closed, an executor that is
+      passed explicitly is left running.
+    window: The maximum number of elements that are processed at the same time. Defaults to twice
+      the number of *workers* (or CPUs, if not specified).
+    ordered: Whether to retain the order of elements. If disabled, results are returned as soon as
+      they become available.
+    """
+
+    return Stream(parallel_map(self._it, func, workers=workers, backend=backend, window=window, ordered=ordered))
+
+  def pfilter(
+    self,
+    predicate: t.Callable[[T_co], bool],
+    workers: t.Optional[int] = None,
+    backend: Backend = 'thread',
+    window: t.Optional[int] = None,
+    ordered: bool = True,
+  ) -> 'Stream[T_co]':
+    """
+    Like #filter(), but evaluates the *predicate* in a pool of workers. See #pmap() for the parameters.
+    """
+
+    return Stream(parallel_filter(self._it, predicate, workers=workers, backend=backend, window=window, ordered=ordered))
+
+  def pflatmap(
+    self,
+    func: t.Callable[[T_co], t.Iterable[R]],
+    workers: t.Optional[int] = None,
+    backend: Backend = 'thread',
+    window: t.Optional[int] = None,
+    ordered: bool = True,
+  ) -> 'Stream[R]':
+    """
+    Like #flatmap(), but applies *func* in a pool of workers. The iterable returned by *func* is
+    materialized in the worker. See #pmap() for the parameters.
+    """
+
+    return Stream(parallel_flatmap(self._it, func, workers=workers, backend=backend, window=window, ordered=ordered))
+
+  @t.overload
+  def reduce(self, aggregator: Aggregator[T_co, T_co]) -> T_co: ...
+
+  @t.overload
+  def reduce(self, aggregator: Aggregator[R, T_co], initial: R) -> R: ...
+
+  def reduce(self, aggregator, initial=NotSet.Value):
+    if initial is NotSet.Value:
+      return functools.reduce(aggregator, self._it)
+    else:
+      return functools.reduce(aggregator, self._it, initial)
+
+  def session_window(
+    self,
+    gap: float,
+    timestamp: t.Callable[[T_co], float],
+    reducer: t.Optional[Reducer[T_co, t.Any, t.Any]] = None,
+  ) -> 'Stream[Window]':
+    """
+    Aggregate the elements into sessions that are separated by more than *gap* between the *timestamp*s
+    of consecutive elements. Each #Window starts at the first element's timestamp and ends *gap* after
+    the last element's timestamp. See #tumbling_window() for the *reducer*.
+    """
+
+    return Stream(session_windows(self._it, gap, timestamp, reducer or Reducer.list()))
+
+  @t.overload
+  def slice(self, stop: int) -> 'Stream[T_co]': ...
+
+  @t.overload
+  def slice(self, start: int, stop: int, step: int = 1) -> 'Stream[T_co]': ...
+
+  def slice(self, start, stop=None, step=None):
+    return Stream(itertools.islice(self._it, start, stop, step))
+
+  def sliding_window(
+    self,
+    size: float,
+    slide: float,
+    timestamp: t.Callable[[T_co], float],
+    reducer: t.Optional[Reducer[T_co, t.Any, t.Any]] = None,
+  ) -> 'Stream[Window]':
+    """
+    Aggregate the elements into overlapping windows of *size* that start at every multiple of *slide*.
+    Each element is fed into up to `ceil(size / slide)` windows, which are produced in order of their
+    start once the *timestamp* of an element passes their end. See #tumbling_window() for the *reducer*.
+    """
+
+    if size <= 0 or slide <= 0:
+      raise ValueError('size and slide must be positive')
+    return Stream(sliding_windows(self._it, size, slide, timestamp, reducer or Reducer.list()))
+
+  def sortby(
+    self,
+    by: t.Union[str, t.Callable[[T_co], t.Any]],
+    reverse: bool = False,
+    *,
+    buffer_size: t.Optional[int] = None,
+    tempdir: t.Optional[str] = None,
+  ) -> 'Stream[T_co]':
+    """
+    Creates a new sorted stream. Internally the #sorted() built-in function is used so a new list
+    will be created temporarily, unless a *buffer_size* is specified.
+
+    # Parameters
+    by (str, callable): Specify by which dimension to sort the stream. If a string is specified,
+      it will be used to retrieve a key or attribute from the values in the stream. In the case of
+      a callable, it will be used directly as the `key` argument to #sorted().
+    reverse: Sort in descending order.
+    buffer_size: If specified, at most *buffer_size* elements are held in memory at a time. Larger
+      streams are sorted in runs that are pickled to temporary files and merged lazily as the
+      returned stream is consumed. The elements must be picklable.
+    tempdir: The directory to create temporary files in. Defaults to the system temp directory.
+    """
+
+    if isinstance(by, str):
+      lookup_attr = by
+      def by(item):
+        if isinstance(item, t.Mapping):
+          return item[lookup_attr]
+        else:
+          return getattr(item, lookup_attr)
+
+    by = t.cast(t.Callable[[T_co], t.Any], by)
+    if buffer_size is not None:
+      return Stream(external_sort(self._it, by, reverse, buffer_size, tempdir))
+    return Stream(sorted(self._it, key=by, reverse=reverse))
+
+  def sort(
+    self: 'Stream[T]',
+    reverse: bool = False,
+    *,
+    buffer_size: t.Optional[int] = None,
+    tempdir: t.Optional[str] = None,
+  ) -> 'Stream[T]':
+    """
+    Sorts the stream by its elements. See #sortby() for the parameters.
+    """
+
+    if buffer_size is not None:
+      return Stream(external_sort(self._it, None, reverse, buffer_size, tempdir))
+    return Stream(sorted(t.cast(t.Iterable[t.Any], self._it), reverse=reverse))
+
+  def takewhile(self, predicate: t.Callable[[T_co], bool]) -> 'Stream[T_co]':
+    return Stream(itertools.takewhile(predicate, self._it))
+
+  def tee(self, n: int = 2, maxsize: t.Optional[int] = None, block: bool = False) -> 't.Tuple[Stream[T_co], ...]':
+    """
+    Split the stream into *n* independent streams. Unlike #itertools.tee(), the number of elements that
+    are buffered for streams that lag behind can be bounded with *maxsize*. When the buffer is full, the
+    stream that is ahead raises a #BufferError, or if *block* is enabled, waits until the other streams
+    catch up (which requires that they are consumed in different threads). Streams that are garbage
+    collected no longer hold back the others.
+    """
+
+    return tuple(Stream(it) for it in tee(self._it, n, maxsize, block))
+
+  def tumbling_window(
+    self,
+    size: float,
+    timestamp: t.Callable[[T_co], float],
+    reducer: t.Optional[Reducer[T_co, t.Any, t.Any]] = None,
+  ) -> 'Stream[Window]':
+    """
+    Aggregate the elements into consecutive, non-overlapping windows of *size* based on their *timestamp*,
+    like #batch() does based on the number of elements. The windows are aligned to multiples of *size*
+    and windows without elements are skipped.
+
+    Each window's elements are fed into the *reducer* as they arrive, so a window only uses as much
+    memory as the reducer's accumulator. The default reducer collects the elements into a list. The
+    timestamps must be non-decreasing, otherwise a #ValueError is raised.
+
+    ```py
+    Stream(events).tumbling_window(60, lambda e: e.time, Reducer.sum(lambda e: e.bytes))
+    ```
+    """
+
+    if size <= 0:
+      raise ValueError('size must be positive')
+    return Stream(tumbling_windows(self._it, size, timestamp, reducer or Reducer.list()))
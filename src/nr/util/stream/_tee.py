@@ -0,0 +1,168 @@
+""" Splitting a single iterable into multiple consumers with bounded buffering. """
+
+import collections
+import threading
+import typing as t
+
+from nr.util.generic import T
+
+from ._reducer import Reducer
+
+
+class _TeeBuffer(t.Generic[T]):
+  """
+  Internal. A buffer shared between the consumers of #tee(). Elements are pulled from the source on demand
+  and dropped as soon as all active consumers have read them.
+  """
+
+  def __init__(self, it: t.Iterator[T], n: int, maxsize: t.Optional[int], block: bool) -> None:
+    self._it = it
+    self._maxsize = maxsize
+    self._block = block
+    # NOTE: The lock must be reentrant, as pulling from the source can trigger the garbage collection of a
+    #       #TeeIterator, which closes it while the lock is held by #next() in the same thread.
+    self._cond = threading.Condition(threading.RLock())
+    self._buffer: t.Deque[T] = collections.deque()
+    self._offset = 0
+    self._positions: t.Dict[int, int] = dict.fromkeys(range(n), 0)
+    self._exhausted = False
+
+  def _trim(self) -> None:
+    if not self._positions:
+      self._buffer.clear()
+      return
+    # NOTE: Dropping an element can re-enter this method through the garbage collection of a #TeeIterator,
+    #       thus the offset is re-checked for every element.
+    target = min(self._positions.values())
+    trimmed = False
+    while self._offset < target and self._buffer:
+      self._buffer.popleft()
+      self._offset += 1
+      trimmed = True
+    if trimmed:
+      self._cond.notify_all()
+
+  def next(self, index: int) -> T:
+    with self._cond:
+      position = self._positions.get(index)
+      if position is None:
+        raise StopIteration
+      while position - self._offset >= len(self._buffer):
+        if self._exhausted:
+          raise StopIteration
+        if self._maxsize is not None and len(self._buffer) >= self._maxsize:
+          if not self._block:
+            raise BufferError(f'tee buffer is full ({self._maxsize} elements), consume the streams more evenly')
+          self._cond.wait()
+          continue
+        try:
+          self._buffer.append(next(self._it))
+        except StopIteration:
+          self._exhausted = True
+          self._cond.notify_all()
+          raise
+      item = self._buffer[position - self._offset]
+      self._positions[index] = position + 1
+      if position == self._offset:
+        self._trim()
+      return item
+
+  def close(self, index: int) -> None:
+    with self._cond:
+      if self._positions.pop(index, None) is not None:
+        self._trim()
+
+
+class TeeIterator(t.Iterator[T]):
+  """
+  An iterator returned by #tee(). Closing the iterator (which also happens when it is garbage collected)
+  releases the elements it has not yet consumed.
+  """
+
+  def __init__(self, buffer: _TeeBuffer[T], index: int) -> None:
+    self._buffer = buffer
+    self._index = index
+
+  def __del__(self) -> None:
+    self.close()
+
+  def __iter__(self) -> 'TeeIterator[T]':
+    return self
+
+  def __next__(self) -> T:
+    return self._buffer.next(self._index)
+
+  def close(self) -> None:
+    self._buffer.close(self._index)
+
+
+def tee(iterable: t.Iterable[T], n: int = 2, maxsize: t.Optional[int] = None, block: bool = False) -> t.Tuple[TeeIterator[T], ...]:
+  """
+  Split *iterable* into *n* independent iterators, similar to #itertools.tee(). At most *maxsize* elements
+  are buffered for the consumers that lag behind. When the buffer is full, the leading consumer raises a
+  #BufferError, or if *block* is enabled, waits until the slowest consumer catches up. Blocking requires
+  that the iterators are consumed from different threads, otherwise it will deadlock.
+
+  An iterator that is closed (or garbage collected) no longer holds back the other iterators.
+  """
+
+  if n < 1:
+    raise ValueError(f'n must be at least 1, got {n}')
+  if maxsize is not None and maxsize < 1:
+    raise ValueError(f'maxsize must be at least 1, got {maxsize}')
+  buffer = _TeeBuffer(iter(iterable), n, maxsize, block)
+  return tuple(TeeIterator(buffer, index) for index in range(n))
+
+
+def broadcast(iterable: t.Iterable[T], sinks: t.Sequence[t.Callable[[t.Iterable[T]], t.Any]], maxsize: int) -> t.Tuple[t.Any, ...]:
+  """
+  Pass the elements of *iterable* to all *sinks* in a single pass and return their results. All #Reducer
+  sinks are fed in the calling thread. Every other sink is a collector that is called with an iterator in
+  a separate thread; the iterators share a buffer of at most *maxsize* elements, so a fast sink waits for
+  the slower ones. The first exception raised by a sink is re-raised after all sinks have finished.
+  """
+
+  results: t.List[t.Any] = [None] * len(sinks)
+  reducers = [(index, sink) for index, sink in enumerate(sinks) if isinstance(sink, Reducer)]
+  collectors = [(index, sink) for index, sink in enumerate(sinks) if not isinstance(sink, Reducer)]
+
+  def assign(sink_results: t.Sequence[t.Any], indices: t.Sequence[int]) -> None:
+    for index, value in zip(indices, sink_results):
+      results[index] = value
+
+  combined = Reducer.zip(*(sink for _, sink in reducers))
+  if not collectors:
+    assign(combined(iterable), [index for index, _ in reducers])
+    return tuple(results)
+
+  branches = tee(iterable, len(collectors) + (1 if reducers else 0), maxsize, block=True)
+  errors: t.List[BaseException] = []
+
+  def run(index: int, collector: t.Callable[[t.Iterable[T]], t.Any], branch: TeeIterator[T]) -> None:
+    try:
+      results[index] = collector(branch)
+    except BaseException as exc:
+      errors.append(exc)
+    finally:
+      branch.close()
+
+  threads = [
+    threading.Thread(target=run, args=(index, collector, branch), daemon=True)
+    for (index, collector), branch in zip(collectors[:-1] if not reducers else collectors, branches)
+  ]
+  for thread in threads:
+    thread.start()
+
+  try:
+    if reducers:
+      assign(combined(branches[-1]), [index for index, _ in reducers])
+    else:
+      run(collectors[-1][0], collectors[-1][1], branches[-1])
+  finally:
+    branches[-1].close()
+    for thread in threads:
+      thread.join()
+
+  if errors:
+    raise errors[0]
+  return tuple(results)
@@ -0,0 +1,123 @@
+""" Tumbling, sliding and session windows over event timestamps. """
+
+import collections
+import math
+import typing as t
+
+from nr.util.generic import T
+
+from ._reducer import Reducer, reduce_sorted_groups
+
+Timestamp = t.Callable[[T], float]
+
+
+class Window(t.NamedTuple):
+  """
+  The result of aggregating the elements that fall into the time range from #start (inclusive) to
+  #end (exclusive).
+  """
+
+  start: float
+  end: float
+  value: t.Any
+
+
+def _ordered_timestamps(timestamp: Timestamp[T]) -> Timestamp[T]:
+  """
+  Wraps *timestamp* such that it raises a #ValueError if it returns a value smaller than the last one.
+  """
+
+  last = -math.inf
+
+  def wrapper(item: T) -> float:
+    nonlocal last
+    ts = timestamp(item)
+    if ts < last:
+      raise ValueError(f'timestamps must be non-decreasing, got {ts!r} after {last!r}')
+    last = ts
+    return ts
+
+  return wrapper
+
+
+def tumbling_windows(iterable: t.Iterable[T], size: float, timestamp: Timestamp[T], reducer: Reducer[T, t.Any, t.Any]) -> t.Iterator[Window]:
+  """
+  Aggregate the elements of *iterable* into consecutive, non-overlapping windows of *size*, aligned to
+  multiples of *size*. Windows without elements are skipped.
+  """
+
+  ordered = _ordered_timestamps(timestamp)
+
+  def window_start(item: T) -> float:
+    ts = ordered(item)
+    return ts - ts % size
+
+  for start, value in reduce_sorted_groups(iterable, window_start, reducer):
+    yield Window(start, start + size, value)
+
+
+def sliding_windows(
+  iterable: t.Iterable[T],
+  size: float,
+  slide: float,
+  timestamp: Timestamp[T],
+  reducer: Reducer[T, t.Any, t.Any],
+) -> t.Iterator[Window]:
+  """
+  Aggregate the elements of *iterable* into windows of *size* that start at every multiple of *slide*.
+  Every element is fed into up to `ceil(size / slide)` windows. Windows without elements are skipped.
+  """
+
+  initial, step, finish = reducer.initial, reducer.step, reducer.finish
+  ordered = _ordered_timestamps(timestamp)
+  windows: t.Deque[t.List[t.Any]] = collections.deque()  # [start, accumulator]
+  next_index: t.Optional[int] = None
+
+  for item in iterable:
+    ts = ordered(item)
+    while windows and windows[0][0] + size <= ts:
+      start, acc = windows.popleft()
+      yield Window(start, start + size, finish(acc))
+
+    # Open the windows that contain the timestamp and have not been opened yet. Window starts are
+    # computed from an integer index to avoid accumulating floating point errors.
+    index = math.floor((ts - size) / slide) + 1
+    if next_index is not None:
+      index = max(index, next_index)
+    while index * slide <= ts:
+      windows.append([index * slide, initial()])
+      index += 1
+    next_index = index
+
+    for window in windows:
+      window[1] = step(window[1], item)
+
+  for start, acc in windows:
+    yield Window(start, start + size, finish(acc))
+
+
+def session_windows(iterable: t.Iterable[T], gap: float, timestamp: Timestamp[T], reducer: Reducer[T, t.Any, t.Any]) -> t.Iterator[Window]:
+  """
+  Aggregate the elements of *iterable* into sessions that end when no element arrives for more than *gap*.
+  A session window starts at the timestamp of its first element and ends *gap* after its last element.
+  """
+
+  initial, step, finish = reducer.initial, reducer.step, reducer.finish
+  ordered = _ordered_timestamps(timestamp)
+  start: t.Optional[float] = None
+  last = -math.inf
+  acc: t.Any = None
+
+  for item in iterable:
+    ts = ordered(item)
+    if start is not None and ts - last > gap:
+      yield Window(start, last + gap, finish(acc))
+      start = None
+    if start is None:
+      start = ts
+      acc = initial()
+    acc = step(acc, item)
+    last = ts
+
+  if start is not None:
+    yield Window(start, last + gap, finish(acc))
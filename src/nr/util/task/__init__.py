@@ -4,13 +4,27 @@ Provides generalized APIs to orchestrate background tasks.
 """
 
 from ._api import Executor, Runnable, Task, TaskCallback, TaskStatus
-from ._default import DefaultExecutor
+from ._asyncio import AsyncioExecutor
+from ._default import DefaultExecutor, TaskRejectedError
+from ._graph import GraphRun, execute_graph
+from ._metrics import Histogram, LoggingMetricsExporter, MetricsExporter, TaskMetrics
+from ._process import ProcessExecutor, RemoteError
 
 __all__ = [
+  'AsyncioExecutor',
   'Executor',
   'Runnable',
   'TaskStatus',
   'TaskCallback',
   'Task',
   'DefaultExecutor',
+  'TaskRejectedError',
+  'ProcessExecutor',
+  'RemoteError',
+  'Histogram',
+  'LoggingMetricsExporter',
+  'MetricsExporter',
+  'TaskMetrics',
+  'GraphRun',
+  'execute_graph',
 ]
@@ -138,24 +138,33 @@ class TaskCallbacks(abc.ABC):
     # `'end'` but also match #TaskStatus.RUNNING.
     """
 
-    statuses: t.Sequence[TaskStatus]
+    statuses = self._get_statuses(state)
+
+    def condition(t: 'Task') -> bool:
+      return t.status in statuses
+
+    self.add(condition, callback, once, group)
+
+  @staticmethod
+  def _get_statuses(
+    state: t.Union[TaskStatus, t.Sequence[TaskStatus], te.Literal['start'], te.Literal['end']],
+  ) -> t.Sequence[TaskStatus]:
+    """
+    Internal. Returns the statuses that the *state* argument of #on() matches.
+    """
+
     if isinstance(state, str):
       end_statuses = (TaskStatus.SUCCEEDED, TaskStatus.FAILED, TaskStatus.IGNORED)
       if state == 'start':
-        statuses = (TaskStatus.RUNNING,) + end_statuses
+        return (TaskStatus.RUNNING,) + end_statuses
       elif state == 'end':
-        statuses = end_statuses
+        return end_statuses
       else:
         raise ValueError(f'invalid state: {state!r}')
     elif isinstance(state, TaskStatus):
-      statuses = (state,)
+      return (state,)
     else:
-      statuses = state
-
-    def condition(t: 'Task') -> bool:
-      return t.status in statuses
-
-    self.add(condition, callback, once, group)
+      return state
 
 
 class Executor(abc.ABC):
@@ -191,6 +200,15 @@ class Executor(abc.ABC):
     The #Task object for this runnable.
     """
 
+  def execute_many(self, runnables: t.Iterable[Runnable[T]], at: t.Optional[float] = None) -> t.List['Task[T]']:
+    """
+    Execute all *runnables* with the same *at* timestamp and return their tasks in the same order. The
+    default implementation calls #execute() for every runnable, implementations may override it to
+    submit the tasks in bulk.
+    """
+
+    return [self.execute(runnable, at=at) for runnable in runnables]
+
   @abc.abstractmethod
   def shutdown(self, cancel_running_taks: bool = True, block: bool = True) -> None:
     """
@@ -287,3 +305,36 @@ class Task(abc.ABC, t.Generic[T]):
     status is one of #TaskStatus.SUCCEEDED, #TaskStatus.FAILED or #TaskStatus.IGNORED. Returns `True`
     if the join is complete, `False` if the timeout was exceeded.
     """
+
+  def __await__(self) -> t.Generator[t.Any, None, t.Optional[T]]:
+    """
+    Wait for the task to complete in an #asyncio event loop and return its #result. The task wakes up the
+    loop through a callback when it completes, so no thread is blocked while waiting.
+    """
+
+    return self._wait_async().__await__()
+
+  async def _wait_async(self) -> t.Optional[T]:
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    future: 'asyncio.Future[None]' = loop.create_future()
+    group = f'_await-{id(future)}'
+
+    def _set_done() -> None:
+      if not future.done():
+        future.set_result(None)
+
+    def _callback(task: 'Task') -> None:
+      try:
+        loop.call_soon_threadsafe(_set_done)
+      except RuntimeError:
+        pass  # The event loop is closed.
+
+    self.callbacks.add(lambda task: task.status.completed, _callback, once=True, group=group)
+    try:
+      await future
+    except asyncio.CancelledError:
+      self.callbacks.remove(group=group)
+      raise
+    return self.result
@@ -0,0 +1,248 @@
+"""
+Provides the #AsyncioExecutor which runs coroutine runnables in an #asyncio event loop.
+"""
+
+import asyncio
+import dataclasses
+import inspect
+import logging
+import sys
+import threading
+import time
+import typing as t
+
+from nr.util.generic import T
+
+from . import _api as api
+from ._default import Task
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncioTask(Task[T]):
+  """
+  A task that runs in an #AsyncioExecutor. Cancelling the task sets the cancelled flag and also cancels
+  the coroutine, so a runnable should use #asyncio.sleep() rather than the blocking #sleep() method.
+  """
+
+  def __init__(self, runnable: api.Runnable[T], name: str, executor: 'AsyncioExecutor') -> None:
+    super().__init__(runnable, name)
+    self._executor = executor
+    self._handle: t.Optional[asyncio.Handle] = None
+    self._future: t.Optional['asyncio.Future[None]'] = None
+
+  def cancel(self) -> None:
+    super().cancel()
+    self._executor._call_soon(self._executor._cancel, self)
+
+
+@dataclasses.dataclass  # type: ignore
+class AsyncioExecutor(api.Executor):
+  """
+  An executor that runs tasks in an #asyncio event loop. The #api.Runnable.run() method of a runnable may
+  be a coroutine function, in which case its result is awaited. Runnables that are not coroutines run
+  directly in the event loop and should return quickly.
+
+  If no *loop* is specified, the executor runs its own event loop in a background thread that is started
+  when the first task is executed and stopped on #shutdown(). Tasks can be submitted from any thread.
+  """
+
+  #: The name of the executor.
+  name: str
+
+  #: The event loop to run tasks in. If not set, the executor creates and runs its own loop.
+  loop: t.Optional[asyncio.AbstractEventLoop] = None
+
+  #: The maximum number of tasks that run concurrently. Unlimited if not set.
+  max_concurrency: t.Optional[int] = None
+
+  def __post_init__(self) -> None:
+    self._cond = threading.Condition()
+    self._pending: t.Set[AsyncioTask[t.Any]] = set()
+    self._running: t.Set[AsyncioTask[t.Any]] = set()
+    self._semaphore: t.Optional[asyncio.Semaphore] = None
+    self._thread: t.Optional[threading.Thread] = None
+    self._shutdown = False
+
+  def _run_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+    asyncio.set_event_loop(loop)
+    try:
+      loop.run_forever()
+    finally:
+      loop.run_until_complete(loop.shutdown_asyncgens())
+      loop.close()
+
+  def _get_loop(self) -> asyncio.AbstractEventLoop:
+    if self.loop is None:
+      self.loop = asyncio.new_event_loop()
+      self._thread = threading.Thread(target=self._run_loop, args=(self.loop,), name=f'{self.name}-EventLoop', daemon=True)
+      self._thread.start()
+    return self.loop
+
+  def _in_loop(self) -> bool:
+    try:
+      return asyncio.get_running_loop() is self.loop
+    except RuntimeError:
+      return False
+
+  def _call_soon(self, callback: t.Callable[..., t.Any], *args: t.Any) -> None:
+    if self.loop is None:
+      return
+    try:
+      self.loop.call_soon_threadsafe(callback, *args)
+    except RuntimeError:
+      pass  # The event loop is closed.
+
+  def _finish(self, task: AsyncioTask[t.Any], status: api.TaskStatus, result: t.Any = None, error: t.Optional[api.ExcInfoType] = None) -> None:
+    with self._cond:
+      if task not in self._pending and task not in self._running:
+        return
+      self._pending.discard(task)
+      self._running.discard(task)
+    try:
+      task._update(status, result, error)
+    finally:
+      with self._cond:
+        self._cond.notify_all()
+    if status == api.TaskStatus.FAILED and not task._error_consumed:
+      logger.error('Unhandled exception in task "%s"', task.name, exc_info=error)
+
+  def _schedule(self, task: AsyncioTask[t.Any], at: t.Optional[float]) -> None:
+    loop = t.cast(asyncio.AbstractEventLoop, self.loop)
+    if task.cancelled() or self._shutdown:
+      self._finish(task, api.TaskStatus.IGNORED)
+    elif at is not None and at > time.time():
+      task._handle = loop.call_later(at - time.time(), self._start, task)
+    else:
+      self._start(task)
+
+  def _start(self, task: AsyncioTask[t.Any]) -> None:
+    task._handle = None
+    if task.cancelled() or self._shutdown:
+      self._finish(task, api.TaskStatus.IGNORED)
+      return
+    if self.max_concurrency is not None and self._semaphore is None:
+      self._semaphore = asyncio.Semaphore(self.max_concurrency)
+    task._future = asyncio.ensure_future(self._run(task), loop=self.loop)
+
+  def _cancel(self, task: AsyncioTask[t.Any]) -> None:
+    """
+    Stops a task from the event loop. Tasks that have not started are marked as ignored.
+    """
+
+    if task._handle is not None:
+      task._handle.cancel()
+      task._handle = None
+      self._finish(task, api.TaskStatus.IGNORED)
+    elif task._future is not None:
+      task._future.cancel()
+
+  async def _run(self, task: AsyncioTask[t.Any]) -> None:
+    if self._semaphore is not None:
+      try:
+        await self._semaphore.acquire()
+      except asyncio.CancelledError:
+        self._finish(task, api.TaskStatus.IGNORED)
+        return
+
+    try:
+      with self._cond:
+        self._pending.discard(task)
+        self._running.add(task)
+      await self._run_task(task)
+    finally:
+      if self._semaphore is not None:
+        self._semaphore.release()
+
+  async def _run_task(self, task: AsyncioTask[t.Any]) -> None:
+    logger.info('Running task "%s"', task.name)
+    try:
+      task._worker_id = f'{self.name}-EventLoop'
+      task._update(api.TaskStatus.RUNNING)
+      result = task.runnable.run(task)
+      if inspect.isawaitable(result):
+        result = await result
+    except asyncio.CancelledError:
+      self._finish(task, api.TaskStatus.CANCELLED)
+    except Exception:
+      self._finish(task, api.TaskStatus.FAILED, error=t.cast(api.ExcInfoType, sys.exc_info()))
+    else:
+      if task.cancelled():
+        self._finish(task, api.TaskStatus.CANCELLED)
+      else:
+        self._finish(task, api.TaskStatus.SUCCEEDED, result)
+    finally:
+      logger.info('Finished task "%s"', task.name)
+
+  def execute(
+    self,
+    runnable: api.Runnable[T],
+    name: t.Optional[str] = None,
+    at: t.Optional[float] = None,
+  ) -> AsyncioTask[T]:
+    assert isinstance(runnable, api.Runnable), f'expected instance of Runnable, got {type(runnable).__name__} instead'
+
+    with self._cond:
+      if self._shutdown:
+        raise RuntimeError('task manager is shut down')
+      task = AsyncioTask(runnable, name or repr(runnable), self)
+      self._pending.add(task)
+      loop = self._get_loop()
+
+    task._update(api.TaskStatus.QUEUED)
+    loop.call_soon_threadsafe(self._schedule, task, at)
+    return task
+
+  def get_worker_count(self) -> int:
+    """
+    Returns the #max_concurrency, or the number of running tasks if the concurrency is unlimited.
+    """
+
+    with self._cond:
+      return self.max_concurrency if self.max_concurrency is not None else len(self._running)
+
+  def get_idle_worker_count(self) -> int:
+    with self._cond:
+      return max(0, self.max_concurrency - len(self._running)) if self.max_concurrency is not None else 0
+
+  def _wait_idle(self) -> None:
+    if self._in_loop():
+      raise RuntimeError(f'cannot block on {type(self).__name__} "{self.name}" from its event loop, await the tasks instead')
+    with self._cond:
+      self._cond.wait_for(lambda: not self._pending and not self._running)
+
+  def shutdown(self, cancel_running_tasks: bool = True, block: bool = True) -> None:
+    """
+    Shut down the executor. Tasks that have not started yet are marked as #api.TaskStatus.IGNORED. If
+    the executor runs its own event loop, the loop is stopped after all running tasks have completed.
+    Blocking is not possible from inside the event loop.
+    """
+
+    with self._cond:
+      if self._shutdown:
+        raise RuntimeError('shut down already initiated or completed')
+      self._shutdown = True
+      pending = list(self._pending)
+      running = list(self._running)
+
+    logger.info('Shutting down executor "%s"', self.name)
+
+    for task in pending:
+      self._call_soon(self._cancel, task)
+    if cancel_running_tasks:
+      for task in running:
+        task.cancel()
+
+    def _join() -> None:
+      self._wait_idle()
+      if self._thread is not None:
+        self._call_soon(t.cast(asyncio.AbstractEventLoop, self.loop).stop)
+        self._thread.join()
+
+    if block:
+      _join()
+    elif self._thread is not None:
+      threading.Thread(target=_join, name=f'{self.name}-Shutdown', daemon=True).start()
+
+  def join(self) -> None:
+    self._wait_idle()
@@ -3,7 +3,10 @@
 Provides the #DefaultTaskManager which operates locally to run tasks in a pool of threads.
 """
 
+import concurrent.futures
 import dataclasses
+import heapq
+import itertools
 import logging
 import queue
 import sys
@@ -13,18 +16,43 @@ import typing as t
 import uuid
 import weakref
 
+import typing_extensions as te
+
 from nr.util.atomic import AtomicCounter
 from nr.util.generic import T
 
 from . import _api as api
+from ._metrics import TaskMetrics
 
 logger = logging.getLogger(__name__)
 
+#: Called with the task, its previous status and its new status after every status change of a #Task.
+TaskObserver = t.Callable[['Task', api.TaskStatus, api.TaskStatus], None]
+
+#: What the #DefaultExecutor does when its queue is full, see #DefaultExecutor.rejection_policy.
+RejectionPolicy = te.Literal['block', 'reject', 'caller_runs']
+
+
+class TaskRejectedError(RuntimeError):
+  """
+  Raised by #DefaultExecutor.execute() if the queue is full and the task cannot be accepted.
+  """
+
 
 class TaskCallbacks(api.TaskCallbacks):
+  """
+  Callbacks registered with #on() are indexed by the statuses they match, such that a status change only
+  scans the callbacks for the new status and the callbacks that were registered with an arbitrary
+  condition via #add().
+  """
+
+  #: Used to generate keys for entries, which also preserves the order in which callbacks were added.
+  _keys = itertools.count()
 
   class _Entry(t.NamedTuple):
-    condition: api.TaskCallbackCondition
+    key: int
+    condition: t.Optional[api.TaskCallbackCondition]
+    statuses: t.Tuple[api.TaskStatus, ...]
     callback: api.TaskCallback
     once: bool
     group: t.Optional[str]
@@ -32,12 +60,15 @@ class TaskCallbacks(api.TaskCallbacks):
   def __init__(self, task: 'Task') -> None:
     self._task = weakref.ref(task)
     self._lock = task._lock
-    self._callbacks: t.Dict[str, TaskCallbacks._Entry] = {}
+    self._by_status: t.Dict[api.TaskStatus, t.Dict[int, TaskCallbacks._Entry]] = {}
+    self._generic: t.Dict[int, TaskCallbacks._Entry] = {}
 
   def __repr__(self) -> str:
     task = self._task()
     assert task is not None
-    return f'<_TaskCallbacks task={task.name!r} size={len(self._callbacks)}>'
+    with self._lock:
+      keys = set(self._generic).union(*self._by_status.values())
+    return f'<_TaskCallbacks task={task.name!r} size={len(keys)}>'
 
   def add(
     self,
@@ -52,6 +83,9 @@ class TaskCallbacks(api.TaskCallbacks):
     will be invoked. If it returns `True` at the time when #add() is used, the *callback* is invoked
     immediately and will not be added to the collection.
 
+    Prefer #on() if the condition only depends on the task status, as those callbacks are only
+    checked when the task changes to one of the matching statuses.
+
     # Arguments
     condition: The condition on which to invoke them *callback*.
     callback: The callback to invoke when the task status is updated and the *condition* matches.
@@ -66,7 +100,30 @@ class TaskCallbacks(api.TaskCallbacks):
     with self._lock:
       run_now = condition(task)
       if not run_now:
-        self._callbacks[str(uuid.uuid4())] = TaskCallbacks._Entry(condition, callback, once, group)
+        entry = TaskCallbacks._Entry(next(self._keys), condition, (), callback, once, group)
+        self._generic[entry.key] = entry
+
+    if run_now:
+      callback(task)
+
+  def on(
+    self,
+    state: t.Union[api.TaskStatus, t.Sequence[api.TaskStatus], te.Literal['start'], te.Literal['end']],
+    callback: api.TaskCallback,
+    once: bool = True,
+    group: t.Optional[str] = None,
+  ) -> None:
+    assert callable(callback)
+    task = self._task()
+    assert task is not None
+    statuses = tuple(self._get_statuses(state))
+
+    with self._lock:
+      run_now = task._status in statuses
+      if not run_now:
+        entry = TaskCallbacks._Entry(next(self._keys), None, statuses, callback, once, group)
+        for status in statuses:
+          self._by_status.setdefault(status, {})[entry.key] = entry
 
     if run_now:
       callback(task)
@@ -77,55 +134,93 @@ class TaskCallbacks(api.TaskCallbacks):
     """
 
     with self._lock:
-      self._callbacks = {k: e for k, e in self._callbacks.items() if e.group != group}
+      self._generic = {k: e for k, e in self._generic.items() if e.group != group}
+      self._by_status = {
+        status: {k: e for k, e in bucket.items() if e.group != group}
+        for status, bucket in self._by_status.items()
+      }
+
+  def _discard(self, entry: 'TaskCallbacks._Entry') -> bool:
+    """
+    Internal. Remove the *entry* from the collection. Returns `False` if it was already removed. Must be
+    called with the lock held.
+    """
 
-  def _invoke(self) -> None:
+    if entry.condition is not None:
+      return self._generic.pop(entry.key, None) is not None
+    found = False
+    for status in entry.statuses:
+      found = self._by_status.get(status, {}).pop(entry.key, None) is not None or found
+    return found
+
+  def _invoke(self, status: api.TaskStatus) -> None:
     """
-    Internal. Invokes all callbacks based on their condition.
+    Internal. Invokes the callbacks for the given *status* and the callbacks with a matching condition.
     """
 
+    if not self._generic and not self._by_status.get(status):
+      return
+
     task = self._task()
     assert task is not None
 
     with self._lock:
-      callbacks = self._callbacks.copy()
+      entries = list(self._by_status.get(status, {}).values())
+      entries.extend(self._generic.values())
+
+    selected: t.List[TaskCallbacks._Entry] = []
+    for entry in entries:
+      if entry.condition is not None:
+        try:
+          if not entry.condition(task):
+            continue
+        except:
+          task.logger.exception(f'Unhandled exception in callback condition of task "%s": %s', task.name, entry.condition)
+          continue
+      selected.append(entry)
+
+    # Claim the callbacks that should only run once, in case the callbacks are invoked concurrently.
+    if any(entry.once for entry in selected):
+      with self._lock:
+        selected = [entry for entry in selected if not entry.once or self._discard(entry)]
 
-    remove: t.Set[str] = set()
-    for key, entry in callbacks.items():
-      try:
-        do_run = entry.condition(task)
-      except:
-        task.logger.exception(f'Unhandled exception in callback condition of task "%s": %s', task.name, entry.condition)
-        continue
-      if not do_run:
-        continue
-      if entry.once:
-        remove.add(key)
+    selected.sort(key=lambda entry: entry.key)
+    for entry in selected:
       try:
         entry.callback(task)
       except:
         task.logger.exception(f'Unhandled exception in callback of task "%s": %s', task.name, entry.callback)
 
-    with self._lock:
-      self._callbacks = {k: e for k, e in self._callbacks.items() if k not in remove}
-
 
 class Task(api.Task[T]):
 
-  def __init__(self, runnable: api.Runnable[T], name: str) -> None:
+  def __init__(
+    self,
+    runnable: api.Runnable[T],
+    name: str,
+    observer: t.Optional[TaskObserver] = None,
+    callback_executor: t.Optional[concurrent.futures.Executor] = None,
+  ) -> None:
     self._lock = threading.RLock()
     self._cond = threading.Condition(self._lock)
     self._runnable = runnable
     self._id = type(self).__module__ + '.' + type(self).__name__ + '.' + str(uuid.uuid4())
     self._worker_id: t.Optional[str] = None
     self._name = name
-    self._logger = self._create_logger()
+    self._logger: t.Optional[logging.Logger] = None
     self._callbacks = TaskCallbacks(self)
-    self._cancelled = threading.Event()
+    self._cancelled = False
     self._status = api.TaskStatus.PENDING
     self._error: t.Optional[api.ExcInfoType] = None
     self._error_consumed: bool = False
     self._result: t.Optional[T] = None
+    self._observer = observer
+    self._callback_executor = callback_executor
+
+    #: The time at which the task was queued, started and completed (as per #time.time()).
+    self.queued_at: t.Optional[float] = None
+    self.started_at: t.Optional[float] = None
+    self.finished_at: t.Optional[float] = None
 
   def _create_logger(self) -> logging.Logger:
     fqn = type(self).__module__ + '.' + type(self).__name__
@@ -134,10 +229,11 @@ class Task(api.Task[T]):
   def _update(self, status: api.TaskStatus, result: t.Optional[T] = None, error: t.Optional[api.ExcInfoType] = None) -> None:
     """
     Update the status of the task. This should be used only by the executor engine where the task
-    is queued. A status change will immediately invoke the registered #callbacks. Some status
-    transitions are not allowed (ex. from #api.TaskStatus.SUCCEEDED to #api.TaskStatus.RUNNING). In this
-    case, a #RuntimeError will be raised. Similarly, if the *status* is #api.TaskStatus.FAILED but
-    no *error* is given, a #RuntimeError will be raised as well.
+    is queued. A status change records the time of the change, notifies the observer and invokes the
+    registered #callbacks, either immediately or on the callback executor. Some status transitions
+    are not allowed (ex. from #api.TaskStatus.SUCCEEDED to #api.TaskStatus.RUNNING). In this case, a
+    #RuntimeError will be raised. Similarly, if the *status* is #api.TaskStatus.FAILED but no *error*
+    is given, a #RuntimeError will be raised as well.
     """
 
     if status == api.TaskStatus.FAILED and error is None:
@@ -149,14 +245,35 @@ class Task(api.Task[T]):
     with self._cond:
       if (self._status.completed and self._status != status) or (self._status == api.TaskStatus.RUNNING and status.idle):
         raise RuntimeError(f'changing the task status from {self._status.name} to {status.name} is not allowed')
-      invoke_callbacks = status != self._status
+      previous = self._status
+      invoke_callbacks = status != previous
+      if invoke_callbacks:
+        if status == api.TaskStatus.QUEUED:
+          self.queued_at = time.time()
+        elif status == api.TaskStatus.RUNNING:
+          self.started_at = time.time()
+        elif status.completed:
+          self.finished_at = time.time()
       self._status = status
       self._error = error
       self._result = result
       self._cond.notify_all()
 
     if invoke_callbacks:
-      self.callbacks._invoke()
+      if self._observer is not None:
+        try:
+          self._observer(self, previous, status)
+        except:
+          logger.exception('Unhandled exception in observer of task "%s"', self.name)
+      if self._callback_executor is None:
+        self.callbacks._invoke(status)
+      elif self.callbacks._generic or self.callbacks._by_status.get(status):
+        try:
+          self._callback_executor.submit(self.callbacks._invoke, status)
+        except RuntimeError:
+          # The callback executor was shut down, the callbacks must not be lost.
+          logger.warning('Callback executor rejected the callbacks of task "%s", invoking them directly', self.name)
+          self.callbacks._invoke(status)
 
   @property
   def runnable(self) -> api.Runnable: return self._runnable
@@ -171,7 +288,11 @@ class Task(api.Task[T]):
   def name(self) -> str: return self._name
 
   @property
-  def logger(self) -> logging.Logger: return self._logger
+  def logger(self) -> logging.Logger:
+    # NOTE: The logger is created lazily because #logging.getLogger() registers every logger name globally.
+    if self._logger is None:
+      self._logger = self._create_logger()
+    return self._logger
 
   @property
   def callbacks(self) -> TaskCallbacks: return self._callbacks
@@ -235,7 +356,9 @@ class Task(api.Task[T]):
     waiting for the timeout to kick in).
     """
 
-    self._cancelled.set()
+    with self._cond:
+      self._cancelled = True
+      self._cond.notify_all()
 
   def cancelled(self) -> bool:
     """
@@ -243,9 +366,7 @@ class Task(api.Task[T]):
     should use this to check if execution should continue or not.
     """
 
-    if self._cancelled is None:
-      raise RuntimeError('Task is not connected to a worker')
-    return self._cancelled.is_set()
+    return self._cancelled
 
   def sleep(self, duration: float) -> bool:
     """
@@ -256,9 +377,8 @@ class Task(api.Task[T]):
     Returns `True` if the task has been cancelled (saving a subsequent call to #cancelled()).
     """
 
-    if self._cancelled is None:
-      raise RuntimeError('Task is not connected to a worker')
-    return not self._cancelled.wait(duration)
+    with self._cond:
+      return not self._cond.wait_for(lambda: self._cancelled, duration)
 
   def join(self, timeout: t.Optional[float] = None) -> bool:
     with self._cond:
@@ -266,11 +386,18 @@ class Task(api.Task[T]):
 
 
 class TaskPriorityQueue:
+  """
+  A queue of tasks ordered by the time at which they are due. Only one of the threads waiting in #get()
+  (the "leader") waits until the earliest task is due, all other threads wait until they are notified.
+  Tasks that are scheduled for the future thus do not cause waiting threads to wake up repeatedly.
+  """
 
   def __init__(self) -> None:
-    self._q: 'queue.PriorityQueue[t.Tuple[float, t.Optional[Task]]]' = queue.PriorityQueue()
+    self._heap: t.List[t.Tuple[float, int, t.Optional[Task]]] = []
+    self._seq = itertools.count()
     self._max_time: t.Optional[float] = None
     self._cond = threading.Condition(threading.Lock())
+    self._leader: t.Optional[threading.Thread] = None
     self._total = AtomicCounter()
     self._current = AtomicCounter()
 
@@ -280,45 +407,130 @@ class TaskPriorityQueue:
 
   def current(self) -> int: return self._current.get()
 
+  def ready(self, limit: t.Optional[int] = None) -> int:
+    """
+    Returns the number of tasks that are due, unlike #pending() which also counts tasks that are scheduled
+    for later. Counting stops at *limit*, such that the cost does not depend on the size of the queue.
+    """
+
+    now = time.time()
+    count = 0
+    with self._cond:
+      heap = self._heap
+      # Walk the heap from the top and skip the subtrees of entries that are not due yet.
+      stack = [0]
+      while stack and (limit is None or count < limit):
+        index = stack.pop()
+        if index < len(heap) and heap[index][0] <= now:
+          if heap[index][2] is not None:
+            count += 1
+          stack += (2 * index + 1, 2 * index + 2)
+    return count
+
   def max_time(self) -> t.Optional[float]:
     with self._cond:
       return self._max_time
 
   def task_done(self) -> None:
-    self._q.task_done()
     self._current.dec()
     self._total.dec()
 
+  def _push(self, at: float, task: t.Optional[Task]) -> None:
+    entry = (at, next(self._seq), task)
+    heapq.heappush(self._heap, entry)
+    if self._heap[0] is entry:
+      # The new entry is due before all others, the current leader must re-evaluate its timeout.
+      self._leader = None
+      self._cond.notify()
+
   def put(self, at: float, task: Task) -> None:
     assert isinstance(at, float)
     assert isinstance(task, Task)
     with self._cond:
-      self._q.put((at, task))
+      self._push(at, task)
       self._total.inc()
       self._max_time = at if self._max_time is None else max (at, self._max_time)
-      self._cond.notify()
+
+  def put_many(self, at: float, tasks: t.Sequence[Task]) -> None:
+    """
+    Put all *tasks* into the queue with the same timestamp while acquiring the lock only once.
+    """
+
+    assert isinstance(at, float)
+    if not tasks:
+      return
+    with self._cond:
+      head = self._heap[0] if self._heap else None
+      entries = [(at, seq, task) for seq, task in zip(self._seq, tasks)]
+      if len(entries) > len(self._heap):
+        self._heap.extend(entries)
+        heapq.heapify(self._heap)
+      else:
+        for entry in entries:
+          heapq.heappush(self._heap, entry)
+      if self._heap[0] is not head:
+        self._leader = None
+        self._cond.notify(len(entries))
+      self._total.inc(len(entries))
+      self._max_time = at if self._max_time is None else max(at, self._max_time)
 
   def put_stop(self, at: float) -> None:
     with self._cond:
-      self._q.put((at, None))
-      self._cond.notify_all()
+      self._push(at, None)
 
-  def get(self) -> t.Optional[Task]:
-    while True:
-      at, task = self._q.get()
-      if task is None:
-        self._q.task_done()
-        return None
+  def get(self, timeout: t.Optional[float] = None) -> t.Optional[Task]:
+    """
+    Return the next task that is due, or `None` if a stop signal is due. Raises #queue.Empty if no task
+    became due within *timeout* seconds.
+    """
 
-      t = time.time()
-      if at <= t or task.cancelled():
-        self._current.inc()
-        return task
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with self._cond:
+      try:
+        while True:
+          remaining = None if deadline is None else deadline - time.monotonic()
+          if remaining is not None and remaining <= 0:
+            raise queue.Empty
+
+          if not self._heap:
+            self._cond.wait(remaining)
+            continue
+
+          at, _, task = self._heap[0]
+          delay = at - time.time()
+          if task is None or delay <= 0 or task.cancelled():
+            heapq.heappop(self._heap)
+            if task is not None:
+              self._current.inc()
+            return task
+
+          if self._leader is not None:
+            self._cond.wait(remaining)
+            continue
+
+          thread = threading.current_thread()
+          self._leader = thread
+          try:
+            self._cond.wait(delay if remaining is None else min(delay, remaining))
+          finally:
+            if self._leader is thread:
+              self._leader = None
+      finally:
+        # Hand over the leadership if there are still tasks that need to be waited for.
+        if self._leader is None and self._heap:
+          self._cond.notify()
 
-      with self._cond:
-        self._q.task_done()
-        self._q.put((at, task))
-        self._cond.wait(timeout=at - t)
+  def drain(self) -> t.List[Task]:
+    """
+    Remove all tasks from the queue, including tasks that are not due yet, as if they had been retrieved
+    with #get(). Stop signals are discarded.
+    """
+
+    with self._cond:
+      tasks = [task for _, _, task in sorted(self._heap) if task is not None]
+      self._heap.clear()
+      self._current.inc(len(tasks))
+      return tasks
 
   def join_total(self) -> None:
     self._total.join()
@@ -327,6 +539,27 @@ class TaskPriorityQueue:
     self._current.join()
 
 
+def _run_task(task: Task, worker_id: str) -> None:
+  """
+  Run a task in the current thread and update its status.
+  """
+
+  logger.info('Running task "%s"', task.name)
+
+  try:
+    task._worker_id = worker_id
+    task._update(api.TaskStatus.RUNNING)
+    result = task.runnable.run(task)
+  except:
+    task._update(api.TaskStatus.FAILED, error=t.cast(api.ExcInfoType, sys.exc_info()))
+    if not task._error_consumed:
+      logger.exception('Unhandled exception in task "%s"', task.name)
+  else:
+    task._update(api.TaskStatus.CANCELLED if task.cancelled() else api.TaskStatus.SUCCEEDED, result)
+  finally:
+    logger.info('Finished task "%s"', task.name)
+
+
 @dataclasses.dataclass
 class Worker:
   """
@@ -340,6 +573,15 @@ class Worker:
   #: The queue to retrieve new tasks from.
   queue: TaskPriorityQueue
 
+  #: The number of seconds after which an idle worker calls #on_idle.
+  idle_timeout: t.Optional[float] = None
+
+  #: Called when the worker has been idle for #idle_timeout seconds. If it returns `True`, the worker stops.
+  on_idle: t.Optional[t.Callable[['Worker'], bool]] = None
+
+  #: Called when the worker has received a task from the queue, before it runs the task.
+  on_task: t.Optional[t.Callable[['Worker'], None]] = None
+
   def __post_init__(self) -> None:
     self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
     self._lock = threading.Lock()
@@ -358,9 +600,16 @@ class Worker:
 
   def _mainloop(self) -> None:
     while True:
-      task = self.queue.get()
+      try:
+        task = self.queue.get(self.idle_timeout)
+      except queue.Empty:
+        if self.on_idle is not None and self.on_idle(self):
+          break
+        continue
       if task is None:
         break
+      if self.on_task is not None:
+        self.on_task(self)
       if task.cancelled():
         task._update(api.TaskStatus.IGNORED)
         self.queue.task_done()
@@ -375,20 +624,7 @@ class Worker:
         self.queue.task_done()
 
   def _run_task(self, task: Task) -> None:
-    logger.info('Running task "%s"', task.name)
-
-    try:
-      task._worker_id = self.name
-      task._update(api.TaskStatus.RUNNING)
-      result = task.runnable.run(task)
-    except:
-      task._update(api.TaskStatus.FAILED, t.cast(api.ExcInfoType, sys.exc_info()))
-      if not task._error_consumed:
-        logger.exception('Unhandled exception in task "%s"', task.name)
-    else:
-      task._update(api.TaskStatus.CANCELLED if task.cancelled() else api.TaskStatus.SUCCEEDED, result)
-    finally:
-      logger.info('Finished task "%s"', task.name)
+    _run_task(task, self.name)
 
   def get_current_task(self) -> t.Optional[Task]:
     with self._lock:
@@ -409,22 +645,65 @@ class DefaultExecutor(api.Executor):
   #: The maximum number of workers to spawn. Defaults to 8,
   max_workers: int = 8
 
+  #: The number of workers that are started immediately and kept alive when they are idle.
+  min_workers: int = 0
+
+  #: The number of seconds after which an idle worker is stopped, as long as more than #min_workers are
+  #: alive. If set to `None`, workers are never stopped before #shutdown().
+  idle_timeout: t.Optional[float] = 60.0
+
+  #: Collects metrics about the tasks and workers of the executor.
+  metrics: t.Optional[TaskMetrics] = None
+
+  #: The maximum number of tasks that are queued and not yet picked up by a worker, including tasks
+  #: that are scheduled for later. If not set, the queue is unbounded.
+  queue_size: t.Optional[int] = None
+
+  #: What to do when a task is submitted while the queue is full: `'block'` until there is space in
+  #: the queue (or raise a #TaskRejectedError after #submit_timeout), `'reject'` the task with a
+  #: #TaskRejectedError, or run the task in the thread that submits it (`'caller_runs'`), which also
+  #: slows down the producer. Tasks that are scheduled for later are never run by the caller, as they
+  #: would run too early; `'caller_runs'` blocks like `'block'` for them instead.
+  rejection_policy: RejectionPolicy = 'block'
+
+  #: The maximum number of seconds to block when the queue is full. If not set, block indefinitely.
+  submit_timeout: t.Optional[float] = None
+
+  #: If set, task callbacks are invoked on this executor instead of in the worker thread that changes
+  #: the task status, so slow callbacks do not hold up the workers. Use an executor with a single thread
+  #: to retain the order in which the callbacks of a task are invoked.
+  callback_executor: t.Optional[concurrent.futures.Executor] = None
+
   def __post_init__(self) -> None:
+    if not 0 <= self.min_workers <= self.max_workers:
+      raise ValueError(f'min_workers must be between 0 and max_workers ({self.max_workers}), got {self.min_workers}')
+    if self.queue_size is not None and self.queue_size < 1:
+      raise ValueError(f'queue_size must be at least 1, got {self.queue_size}')
+    if self.rejection_policy not in ('block', 'reject', 'caller_runs'):
+      raise ValueError(f'invalid rejection_policy: {self.rejection_policy!r}')
+
     #: A list of the workers assigned to the pool that is bounded by #max_size.
     self._pool_workers: t.List[Worker] = []
 
+    #: Used to generate unique worker names, as workers come and go.
+    self._worker_ids = itertools.count()
+
     #: The queue that is used to send tasks to the workers.
     self._queue = TaskPriorityQueue()
 
-    #: A counter for all tasks submitted to the task manager that have not yet completed.
-    self._all_tasks = AtomicCounter()
-
-    #: A counter for all currently active tasks.
-    self._active_tasks = AtomicCounter()
+    #: The number of tasks that occupy a slot in the bounded queue.
+    self._queued = 0
+    self._queued_cond = threading.Condition()
+    self._rejected = AtomicCounter()
 
+    self._observer = self._task_updated if self.metrics is not None or self.queue_size is not None else None
     self._lock = threading.Lock()
     self._shutdown = False
 
+    with self._lock:
+      for _ in range(self.min_workers):
+        self._spawn_pool_worker()
+
   def execute(
     self,
     runnable: api.Runnable[T],
@@ -432,41 +711,176 @@ class DefaultExecutor(api.Executor):
     at: t.Optional[float] = None,
   ) -> Task[T]:
     """
-    Queue a task for execution in the worker pool. If there is a free slot in the pool and all
-    existing workers are busy, a new worker will be spawned immediately.
+    Queue a task for execution in the worker pool. If there is a free slot in the pool and there are
+    more queued tasks than idle workers, a new worker will be spawned immediately.
     """
 
     assert isinstance(runnable, api.Runnable), f'expected instance of Runnable, got {type(runnable).__name__} instead'
     if self._shutdown:
       raise RuntimeError('task manager is shut down')
 
-    task = Task(runnable, name or repr(runnable))
+    task = Task(runnable, name or repr(runnable), self._observer, self.callback_executor)
+    if self.queue_size is not None and not self._reserve(1, at):
+      _run_task(task, threading.current_thread().name)
+      return task
     task._update(api.TaskStatus.QUEUED)
     self._queue.put(at or time.time(), task)
-    size = self._all_tasks.get()
-    if size >= len(self._pool_workers) and size < self.max_workers:
-      self._spawn_pool_worker()
+    self._spawn_workers()
     return task
 
+  def execute_many(
+    self,
+    runnables: t.Iterable[api.Runnable[T]],
+    at: t.Optional[float] = None,
+  ) -> t.List[api.Task[T]]:
+    """
+    Queue a task for every runnable. All tasks are added to the queue at once, which is considerably
+    faster than calling #execute() for every runnable when submitting many tasks.
+
+    With a bounded queue, the tasks are queued in chunks as space becomes available. With the `'reject'`
+    policy, the runnables are only accepted if they fit into the queue all at once.
+    """
+
+    if self._shutdown:
+      raise RuntimeError('task manager is shut down')
+
+    tasks: t.List[Task[T]] = []
+    for runnable in runnables:
+      assert isinstance(runnable, api.Runnable), f'expected instance of Runnable, got {type(runnable).__name__} instead'
+      tasks.append(Task(runnable, repr(runnable), self._observer, self.callback_executor))
+
+    offset = 0
+    while offset < len(tasks):
+      count = len(tasks) - offset if self.queue_size is None else self._reserve(len(tasks) - offset, at)
+      if count == 0:
+        _run_task(tasks[offset], threading.current_thread().name)
+        offset += 1
+        continue
+      chunk = tasks[offset:offset + count]
+      for task in chunk:
+        task._update(api.TaskStatus.QUEUED)
+      self._queue.put_many(at or time.time(), chunk)
+      self._spawn_workers()
+      offset += count
+    return t.cast(t.List[api.Task[T]], tasks)
+
+  def _reserve(self, count: int, at: t.Optional[float]) -> int:
+    """
+    Reserve space for up to *count* tasks scheduled *at* the given time in the bounded queue, according to
+    the #rejection_policy. Returns the number of reserved slots, which is zero if the task should run in the
+    caller's thread.
+    """
+
+    assert self.queue_size is not None
+    policy = self.rejection_policy
+    if policy == 'caller_runs' and at is not None and at > time.time():
+      policy = 'block'
+    with self._queued_cond:
+      if policy == 'block':
+        self._queued_cond.wait_for(lambda: self._shutdown or self._queued < t.cast(int, self.queue_size), self.submit_timeout)
+      if self._shutdown:
+        raise RuntimeError('task manager is shut down')
+      free = self.queue_size - self._queued
+      if free <= 0 or (policy == 'reject' and free < count):
+        caller_runs = policy == 'caller_runs'
+        if self.metrics is not None:
+          self.metrics.task_rejected(caller_runs)
+        if caller_runs:
+          return 0
+        self._rejected.inc()
+        raise TaskRejectedError(f'queue of {type(self).__name__} "{self.name}" is full ({self.queue_size} tasks)')
+      count = min(count, free)
+      self._queued += count
+      return count
+
+  def _task_updated(self, task: Task, previous: api.TaskStatus, status: api.TaskStatus) -> None:
+    if previous == api.TaskStatus.QUEUED and self.queue_size is not None:
+      with self._queued_cond:
+        self._queued -= 1
+        self._queued_cond.notify()
+    if self.metrics is not None:
+      self.metrics.task_updated(task, previous, status)
+
+  def _spawn_workers(self) -> None:
+    """
+    Spawn workers for the tasks that are due and cannot be picked up by an idle worker, up to #max_workers.
+    Tasks that are scheduled for later only need a single worker to wait for them. This is called again
+    whenever a worker receives a task, to spawn more workers if more tasks have become due by then.
+    """
+
+    # NOTE: Workers are only removed from the pool, so there is nothing to do if the pool is full.
+    if len(self._pool_workers) >= self.max_workers:
+      return
+
+    with self._lock:
+      # NOTE: #shutdown() sends one stop signal for every worker in the pool, a worker that is spawned
+      #       after that would never stop.
+      if self._shutdown:
+        return
+      idle = len(self._pool_workers) - self._queue.current()
+      free = self.max_workers - len(self._pool_workers)
+      missing = min(self._queue.ready(idle + free) - idle, free)
+      if not self._pool_workers and self._queue.pending() > 0:
+        missing = max(missing, 1)
+      for _ in range(missing):
+        self._spawn_pool_worker()
+
   def _spawn_pool_worker(self) -> None:
-    worker = Worker(f'{self.name}-Worker-{len(self._pool_workers)}', self._queue)
+    index = next(self._worker_ids)
+    name = f'{self.name}-Worker-{index}'
+    worker = Worker(name, self._queue, self.idle_timeout, self._reap_pool_worker, lambda _: self._spawn_workers())
+    if self.metrics is not None:
+      self.metrics.worker_started(name)
     worker.start()
     self._pool_workers.append(worker)
 
+  def _reap_pool_worker(self, worker: Worker) -> bool:
+    """
+    Called by a worker that has been idle for #idle_timeout seconds. Removes the worker from the pool
+    and returns `True` if it should stop.
+    """
+
+    with self._lock:
+      # NOTE: Tasks are queued before #_spawn_workers() acquires the lock, so if the worker is removed
+      #       while a task is being queued, the lock guarantees that a replacement will be spawned.
+      if self._shutdown or len(self._pool_workers) <= self.min_workers or self._queue.ready(1) > 0:
+        return False
+      # The last worker waits for the tasks that are scheduled for later.
+      if len(self._pool_workers) == 1 and self._queue.pending() > 0:
+        return False
+      self._pool_workers.remove(worker)
+    if self.metrics is not None:
+      self.metrics.worker_stopped(worker.name)
+    return True
+
   def get_worker_count(self) -> int:
     return len(self._pool_workers)
 
   def get_idle_worker_count(self) -> int:
     return len(self._pool_workers) - self._queue.current()
 
+  def get_rejected_count(self) -> int:
+    """
+    Returns the number of submissions that were rejected with a #TaskRejectedError because the queue
+    was full.
+    """
+
+    return self._rejected.get()
+
   def shutdown(self, cancel_running_tasks: bool = True, block: bool = True) -> None:
-    if self._shutdown:
-      raise RuntimeError('shut down already initiated or completed')
-    self._shutdown = True
+    with self._lock:
+      if self._shutdown:
+        raise RuntimeError('shut down already initiated or completed')
+      self._shutdown = True
+      workers = list(self._pool_workers)
+
+    # Wake up producers that are blocked on a full queue.
+    with self._queued_cond:
+      self._queued_cond.notify_all()
 
     logger.info('Sending shutdown signal to workers')
 
-    for worker in self._pool_workers:
+    for worker in workers:
       if cancel_running_tasks:
         task = worker.get_current_task()
         if task is not None:
@@ -477,5 +891,9 @@ class DefaultExecutor(api.Executor):
     if block:
       self._queue.join_current()
 
+    if self.metrics is not None:
+      for worker in workers:
+        self.metrics.worker_stopped(worker.name)
+
   def join(self) -> None:
     self._queue.join_total()
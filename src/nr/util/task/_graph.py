@@ -0,0 +1,209 @@
+"""
+Execute a #DiGraph of runnables on an #api.Executor, respecting the dependencies between the nodes.
+"""
+
+import functools
+import logging
+import threading
+import typing as t
+
+from nr.util.digraph import DiGraph, K
+from nr.util.digraph.algorithm.topological_sort import topological_sort
+
+from . import _api as api
+
+logger = logging.getLogger(__name__)
+
+
+class GraphRun(t.Generic[K]):
+  """
+  Tracks the execution of a graph started with #execute_graph(). A node is dispatched to the executor as
+  soon as all of its predecessors succeeded. If a node does not succeed (i.e. it failed, was cancelled
+  or ignored), all of its descendants are skipped, while independent branches of the graph continue to
+  run unless *fail_fast* is enabled.
+  """
+
+  def __init__(self, executor: api.Executor, graph: DiGraph[K, api.Runnable, t.Any], fail_fast: bool) -> None:
+    self._executor = executor
+    self._graph = graph
+    self._fail_fast = fail_fast
+    self._cond = threading.Condition()
+    self._tasks: t.Dict[K, api.Task] = {}
+    self._dispatched: t.Set[K] = set()
+    self._skipped: t.Set[K] = set()
+    self._waiting = {node_id: len(graph.predecessors(node_id)) for node_id in graph.nodes}
+    self._remaining = len(self._waiting)
+    self._cancelled = False
+
+  def __repr__(self) -> str:
+    with self._cond:
+      return f'<GraphRun nodes={len(self._waiting)} dispatched={len(self._tasks)} skipped={len(self._skipped)} ' \
+        f'remaining={self._remaining}>'
+
+  def _start(self) -> None:
+    with self._cond:
+      ready = [node_id for node_id, count in self._waiting.items() if count == 0]
+      self._dispatched.update(ready)
+    self._dispatch(ready)
+
+  def _dispatch(self, node_ids: t.Iterable[K]) -> None:
+    """
+    Execute the given nodes, which must have been added to #_dispatched before.
+    """
+
+    for node_id in node_ids:
+      with self._cond:
+        if self._cancelled:
+          self._skipped.add(node_id)
+          self._remaining -= 1
+          self._cond.notify_all()
+          continue
+
+      try:
+        task = self._executor.execute(self._graph.nodes[node_id], str(node_id))
+      except Exception:
+        logger.exception('Unable to dispatch node %r, skipping it and its descendants', node_id)
+        with self._cond:
+          self._skipped.add(node_id)
+          self._remaining -= 1
+          self._skip(self._graph.successors(node_id))
+          self._cond.notify_all()
+        continue
+
+      with self._cond:
+        self._tasks[node_id] = task
+        cancelled = self._cancelled
+      if cancelled:
+        task.cancel()
+      task.callbacks.add(lambda task: task.status.completed, functools.partial(self._on_completed, node_id))
+
+  def _skip(self, node_ids: t.Iterable[K]) -> None:
+    """
+    Mark the given nodes and all of their descendants as skipped. Must be called with the lock held.
+    """
+
+    stack = list(node_ids)
+    while stack:
+      node_id = stack.pop()
+      if node_id in self._skipped or node_id in self._dispatched:
+        continue
+      self._skipped.add(node_id)
+      self._remaining -= 1
+      stack.extend(self._graph.successors(node_id))
+
+  def _on_completed(self, node_id: K, task: api.Task) -> None:
+    ready: t.List[K] = []
+    cancel: t.List[api.Task] = []
+    with self._cond:
+      self._remaining -= 1
+      if task.status == api.TaskStatus.SUCCEEDED and not self._cancelled:
+        for successor in self._graph.successors(node_id):
+          self._waiting[successor] -= 1
+          if self._waiting[successor] == 0 and successor not in self._skipped:
+            ready.append(successor)
+        self._dispatched.update(ready)
+      else:
+        self._skip(self._graph.successors(node_id))
+        if self._fail_fast and not self._cancelled:
+          self._cancelled = True
+          self._skip(node for node in self._waiting if node not in self._dispatched)
+          cancel = [other for other in self._tasks.values() if not other.status.completed]
+      self._cond.notify_all()
+    for other in cancel:
+      other.cancel()
+    self._dispatch(ready)
+
+  @property
+  def tasks(self) -> t.Dict[K, api.Task]:
+    """
+    Returns the tasks of the nodes that have been dispatched so far.
+    """
+
+    with self._cond:
+      return dict(self._tasks)
+
+  @property
+  def skipped(self) -> t.Set[K]:
+    """
+    Returns the nodes that were not dispatched because a predecessor did not succeed or the run was
+    cancelled.
+    """
+
+    with self._cond:
+      return set(self._skipped)
+
+  @property
+  def failed(self) -> t.List[K]:
+    """
+    Returns the nodes whose task failed.
+    """
+
+    with self._cond:
+      return [node_id for node_id, task in self._tasks.items() if task.status == api.TaskStatus.FAILED]
+
+  def done(self) -> bool:
+    """
+    Returns `True` if every node has either completed or was skipped.
+    """
+
+    with self._cond:
+      return self._remaining == 0
+
+  def succeeded(self) -> bool:
+    """
+    Returns `True` if every node completed successfully.
+    """
+
+    with self._cond:
+      return self._remaining == 0 and not self._skipped and \
+        all(task.status == api.TaskStatus.SUCCEEDED for task in self._tasks.values())
+
+  def cancel(self) -> None:
+    """
+    Cancel the tasks that are currently running and skip all nodes that have not been dispatched yet.
+    """
+
+    with self._cond:
+      self._cancelled = True
+      self._skip(node for node in self._waiting if node not in self._dispatched)
+      tasks = [task for task in self._tasks.values() if not task.status.completed]
+      self._cond.notify_all()
+    for task in tasks:
+      task.cancel()
+
+  def join(self, timeout: t.Optional[float] = None) -> bool:
+    """
+    Block until every node has completed or was skipped. Returns `False` if the *timeout* was exceeded.
+    """
+
+    with self._cond:
+      return self._cond.wait_for(lambda: self._remaining == 0, timeout)
+
+
+def execute_graph(
+  executor: api.Executor,
+  graph: DiGraph[K, api.Runnable, t.Any],
+  fail_fast: bool = False,
+) -> GraphRun[K]:
+  """
+  Execute the runnables in the nodes of *graph* on the *executor*. Every node is dispatched as soon as
+  all of its predecessors have succeeded, such that independent branches of the graph run in parallel.
+  The tasks are named after the string representation of their node IDs.
+
+  # Arguments
+  executor: The executor to dispatch the runnables to.
+  graph: A directed acyclic graph with #api.Runnable values. An edge from A to B means that B depends on A.
+  fail_fast: Cancel the whole run as soon as any node does not succeed, instead of only skipping the
+    descendants of that node.
+
+  # Raises
+  RuntimeError: If the *graph* contains a cycle.
+  """
+
+  for node_id in topological_sort(graph):
+    runnable = graph.nodes[node_id]
+    assert isinstance(runnable, api.Runnable), f'expected Runnable for node {node_id!r}, got {type(runnable).__name__}'
+
+  run = GraphRun(executor, graph, fail_fast)
+  run._start()
+  return run
@@ -0,0 +1,274 @@
+"""
+Instrumentation for executors: latency histograms, task counters, queue depth and worker utilization.
+"""
+
+import abc
+import bisect
+import logging
+import threading
+import time
+import typing as t
+
+from . import _api as api
+
+#: Bucket upper bounds in seconds for latency histograms, from 10µs to 100s.
+DEFAULT_BUCKETS: t.Tuple[float, ...] = tuple(m * 10.0 ** e for e in range(-5, 2) for m in (1, 2.5, 5)) + (100.0,)
+
+
+class Histogram:
+  """
+  A thread-safe histogram with fixed buckets. Percentiles are estimated as the upper bound of the bucket
+  that contains them, clamped to the largest observed value.
+  """
+
+  def __init__(self, buckets: t.Sequence[float] = DEFAULT_BUCKETS) -> None:
+    if list(buckets) != sorted(buckets):
+      raise ValueError('buckets must be sorted')
+    self._bounds = list(buckets)
+    self._counts = [0] * (len(self._bounds) + 1)
+    self._lock = threading.Lock()
+    self._count = 0
+    self._sum = 0.0
+    self._min = float('inf')
+    self._max = float('-inf')
+
+  def __repr__(self) -> str:
+    return f'Histogram(count={self._count!r}, sum={self._sum!r})'
+
+  def observe(self, value: float) -> None:
+    index = bisect.bisect_left(self._bounds, value)
+    with self._lock:
+      self._counts[index] += 1
+      self._count += 1
+      self._sum += value
+      if value < self._min:
+        self._min = value
+      if value > self._max:
+        self._max = value
+
+  def _percentile(self, q: float) -> t.Optional[float]:
+    if not self._count:
+      return None
+    rank = q * self._count
+    cumulative = 0
+    for bound, count in zip(self._bounds, self._counts):
+      cumulative += count
+      if cumulative >= rank:
+        return min(bound, self._max)
+    return self._max
+
+  def percentile(self, q: float) -> t.Optional[float]:
+    """
+    Returns the estimated *q*-th percentile (between 0 and 1), or `None` if no values were observed.
+    """
+
+    with self._lock:
+      return self._percentile(q)
+
+  def snapshot(self) -> t.Dict[str, t.Any]:
+    """
+    Returns the count, sum, minimum, maximum, mean, p50, p90 and p99 of the observed values, and the count
+    per bucket keyed by the upper bound of the bucket (`inf` for values above the last bound).
+    """
+
+    with self._lock:
+      return {
+        'count': self._count,
+        'sum': self._sum,
+        'min': self._min if self._count else None,
+        'max': self._max if self._count else None,
+        'mean': self._sum / self._count if self._count else None,
+        'p50': self._percentile(0.5),
+        'p90': self._percentile(0.9),
+        'p99': self._percentile(0.99),
+        'buckets': dict(zip(self._bounds + [float('inf')], self._counts)),
+      }
+
+
+class MetricsExporter(abc.ABC):
+  """
+  Receives snapshots from #TaskMetrics.export().
+  """
+
+  @abc.abstractmethod
+  def export(self, snapshot: t.Dict[str, t.Any]) -> None: ...
+
+
+class LoggingMetricsExporter(MetricsExporter):
+  """
+  Logs a one-line summary of every snapshot.
+  """
+
+  def __init__(self, logger: t.Optional[logging.Logger] = None, level: int = logging.INFO) -> None:
+    self._logger = logger or logging.getLogger(__name__)
+    self._level = level
+
+  def export(self, snapshot: t.Dict[str, t.Any]) -> None:
+    def ms(value: t.Optional[float]) -> str:
+      return '-' if value is None else f'{value * 1000:.1f}ms'
+    tasks, wait, run = snapshot['tasks'], snapshot['wait_time'], snapshot['run_time']
+    self._logger.log(
+      self._level,
+      'tasks: %d submitted, %d succeeded, %d failed, %d cancelled, %d ignored, %d rejected | queued: %d, '
+        'running: %d | wait p50/p99: %s/%s | run p50/p99: %s/%s | busy: %.0f%%',
+      tasks['submitted'], tasks['succeeded'], tasks['failed'], tasks['cancelled'], tasks['ignored'], tasks['rejected'],
+      snapshot['queue_depth'], snapshot['running'], ms(wait['p50']), ms(wait['p99']), ms(run['p50']),
+      ms(run['p99']), snapshot['busy_ratio'] * 100,
+    )
+
+
+class TaskMetrics:
+  """
+  Collects metrics from the status transitions of the tasks of an executor: the time tasks wait in the
+  queue and the time they run, the number of tasks per final status, the number of queued (including
+  tasks scheduled for later) and running tasks, the number of submissions rejected because the queue
+  was full, and the ratio of time that every worker spent running tasks since it was started.
+
+  Pass an instance to the `metrics` option of the #DefaultExecutor. A single instance can be shared by
+  multiple executors.
+  """
+
+  def __init__(
+    self,
+    exporters: t.Sequence[MetricsExporter] = (),
+    buckets: t.Sequence[float] = DEFAULT_BUCKETS,
+  ) -> None:
+    self.wait_time = Histogram(buckets)
+    self.run_time = Histogram(buckets)
+    self._exporters = list(exporters)
+    self._lock = threading.Lock()
+    self._counts = {
+      'submitted': 0, 'succeeded': 0, 'failed': 0, 'cancelled': 0, 'ignored': 0, 'rejected': 0, 'caller_runs': 0,
+    }
+    self._queued = 0
+    self._running = 0
+    self._workers: t.Dict[str, t.List[float]] = {}  # [started_at, busy_seconds, running_since or 0]
+    self._export_thread: t.Optional[threading.Thread] = None
+    self._export_stop = threading.Event()
+
+  def worker_started(self, worker_id: str) -> None:
+    with self._lock:
+      self._workers[worker_id] = [time.monotonic(), 0.0, 0.0]
+
+  def worker_stopped(self, worker_id: str) -> None:
+    with self._lock:
+      self._workers.pop(worker_id, None)
+
+  def task_rejected(self, caller_runs: bool) -> None:
+    """
+    Record a submission that was rejected because the queue was full. If *caller_runs* is enabled, the
+    task was instead executed in the thread that submitted it.
+    """
+
+    with self._lock:
+      self._counts['caller_runs' if caller_runs else 'rejected'] += 1
+
+  def task_updated(self, task: api.Task, previous: api.TaskStatus, status: api.TaskStatus) -> None:
+    """
+    Record the transition of *task* from the *previous* to the new *status*. The timestamps of the
+    transitions are taken from the `queued_at`, `started_at` and `finished_at` attributes of the task.
+    """
+
+    queued_at: t.Optional[float] = getattr(task, 'queued_at', None)
+    started_at: t.Optional[float] = getattr(task, 'started_at', None)
+    finished_at: t.Optional[float] = getattr(task, 'finished_at', None)
+
+    with self._lock:
+      if previous == api.TaskStatus.QUEUED:
+        self._queued -= 1
+      elif previous == api.TaskStatus.RUNNING:
+        self._running -= 1
+        worker = self._workers.get(task.worker_id or '')
+        if worker is not None:
+          worker[2] = 0.0
+
+      if previous == api.TaskStatus.PENDING:
+        self._counts['submitted'] += 1
+
+      if status == api.TaskStatus.QUEUED:
+        self._queued += 1
+      elif status == api.TaskStatus.RUNNING:
+        self._running += 1
+        worker = self._workers.get(task.worker_id or '')
+        if worker is not None:
+          worker[2] = time.monotonic()
+      elif status.completed:
+        self._counts[status.name.lower()] += 1
+
+      if previous == api.TaskStatus.RUNNING and started_at is not None and finished_at is not None:
+        worker = self._workers.get(task.worker_id or '')
+        if worker is not None:
+          worker[1] += finished_at - started_at
+
+    if status == api.TaskStatus.RUNNING and queued_at is not None and started_at is not None:
+      self.wait_time.observe(max(0.0, started_at - queued_at))
+    elif previous == api.TaskStatus.RUNNING and started_at is not None and finished_at is not None:
+      self.run_time.observe(finished_at - started_at)
+
+  def snapshot(self) -> t.Dict[str, t.Any]:
+    """
+    Returns the current metrics as a dictionary of plain values.
+    """
+
+    now = time.monotonic()
+    with self._lock:
+      workers = {}
+      total_alive = total_busy = 0.0
+      for worker_id, (started_at, busy, running_since) in self._workers.items():
+        alive = now - started_at
+        busy += now - running_since if running_since else 0.0
+        total_alive += alive
+        total_busy += busy
+        workers[worker_id] = {'busy_seconds': busy, 'busy_ratio': min(1.0, busy / alive) if alive > 0 else 0.0}
+      result = {
+        'timestamp': time.time(),
+        'tasks': dict(self._counts),
+        'queue_depth': self._queued,
+        'running': self._running,
+        'workers': workers,
+        'busy_ratio': min(1.0, total_busy / total_alive) if total_alive > 0 else 0.0,
+      }
+    result['wait_time'] = self.wait_time.snapshot()
+    result['run_time'] = self.run_time.snapshot()
+    return result
+
+  def add_exporter(self, exporter: MetricsExporter) -> None:
+    with self._lock:
+      self._exporters.append(exporter)
+
+  def export(self) -> None:
+    """
+    Pass a #snapshot() to all exporters.
+    """
+
+    with self._lock:
+      exporters = list(self._exporters)
+    if exporters:
+      snapshot = self.snapshot()
+      for exporter in exporters:
+        exporter.export(snapshot)
+
+  def start_export(self, interval: float) -> None:
+    """
+    Start a background thread that calls #export() every *interval* seconds until #stop_export() is called.
+    """
+
+    if self._export_thread is not None:
+      raise RuntimeError('export thread is already running')
+
+    def _loop() -> None:
+      while not self._export_stop.wait(interval):
+        try:
+          self.export()
+        except Exception:
+          logging.getLogger(__name__).exception('Unhandled exception in metrics exporter')
+
+    self._export_stop.clear()
+    self._export_thread = threading.Thread(target=_loop, name='TaskMetrics-Export', daemon=True)
+    self._export_thread.start()
+
+  def stop_export(self) -> None:
+    if self._export_thread is not None:
+      self._export_stop.set()
+      self._export_thread.join()
+      self._export_thread = None
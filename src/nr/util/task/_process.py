@@ -0,0 +1,517 @@
+"""
+Provides the #ProcessExecutor which runs tasks in a pool of worker processes.
+"""
+
+import dataclasses
+import logging
+import multiprocessing
+import multiprocessing.connection
+import multiprocessing.context
+import pickle
+import threading
+import time
+import traceback
+import typing as t
+import weakref
+
+from nr.util.generic import T
+
+from . import _api as api
+from ._default import Task, TaskPriorityQueue
+
+logger = logging.getLogger(__name__)
+
+#: The interval in seconds in which the #ProcessExecutor checks if its worker processes are still alive.
+_HEALTH_CHECK_INTERVAL = 1.0
+
+
+class RemoteTraceback(Exception):
+  """
+  Attached as the `__cause__` of exceptions that were raised in a worker process to retain the original
+  traceback, similar to #concurrent.futures.ProcessPoolExecutor.
+  """
+
+  def __init__(self, tb: str) -> None:
+    self.tb = tb
+
+  def __str__(self) -> str:
+    return self.tb
+
+
+class RemoteError(Exception):
+  """
+  Raised in place of an exception from a worker process that could not be pickled.
+  """
+
+
+class _WorkerTask(api.Task[T]):
+  """
+  The task object that is passed to a #api.Runnable in a worker process. It only supports the operations
+  that a runnable needs, namely #cancelled() and #sleep().
+  """
+
+  def __init__(self, id: str, name: str, worker_id: str, seq: int, cancel_event: t.Any, cancel_seq: t.Any) -> None:
+    self._id = id
+    self._name = name
+    self._worker_id = worker_id
+    self._seq = seq
+    self._cancel_event = cancel_event
+    self._cancel_seq = cancel_seq
+    self._logger = logging.getLogger(f'{Task.__module__}.{Task.__name__}[{name}]')
+
+  @property
+  def id(self) -> str: return self._id
+
+  @property
+  def worker_id(self) -> t.Optional[str]: return self._worker_id
+
+  @property
+  def name(self) -> str: return self._name
+
+  @property
+  def logger(self) -> logging.Logger: return self._logger
+
+  @property
+  def callbacks(self) -> api.TaskCallbacks:
+    raise RuntimeError('task callbacks are not available in a worker process')
+
+  @property
+  def status(self) -> api.TaskStatus: return api.TaskStatus.RUNNING
+
+  @property
+  def error(self) -> t.Optional[api.ExcInfoType]: return None
+
+  @property
+  def error_consumed(self) -> bool: return False
+
+  @property
+  def result(self) -> t.Optional[T]:
+    raise RuntimeError(f'Task has status {api.TaskStatus.RUNNING.name}')
+
+  def consume_error(self, origin: t.Optional[str] = None) -> None:
+    raise RuntimeError(f'task status must be FAILED to call Task.consume_error() but is {api.TaskStatus.RUNNING.name}')
+
+  def cancel(self) -> None:
+    with self._cancel_seq.get_lock():
+      self._cancel_seq.value = self._seq
+      self._cancel_event.set()
+
+  def cancelled(self) -> bool:
+    return self._cancel_event.is_set() and self._cancel_seq.value == self._seq
+
+  def sleep(self, duration: float) -> bool:
+    deadline = time.monotonic() + duration
+    while self._cancel_event.wait(max(0.0, deadline - time.monotonic())):
+      if self.cancelled():
+        return False
+      # The event was set for a task that previously ran in this worker.
+      with self._cancel_seq.get_lock():
+        if self._cancel_seq.value != self._seq:
+          self._cancel_event.clear()
+    return True
+
+  def join(self, timeout: t.Optional[float] = None) -> bool:
+    raise RuntimeError('a task cannot be joined from its worker process')
+
+
+def _encode_error(exc: BaseException) -> t.Tuple[t.Optional[bytes], str, str]:
+  tb = ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+  try:
+    payload: t.Optional[bytes] = pickle.dumps(exc)
+  except Exception:
+    payload = None
+  return payload, tb, repr(exc)
+
+
+def _decode_error(payload: t.Optional[bytes], tb: str, description: str) -> api.ExcInfoType:
+  exc: BaseException
+  try:
+    exc = pickle.loads(payload) if payload is not None else RemoteError(description)
+  except Exception:
+    exc = RemoteError(description)
+  exc.__cause__ = RemoteTraceback(tb)
+  return type(exc), exc, None
+
+
+def _worker_main(index: int, worker_id: str, call_queue: t.Any, result_conn: t.Any, cancel_event: t.Any, cancel_seq: t.Any) -> None:
+  """
+  The main loop of a worker process. Receives `(seq, task_id, name, pickled_runnable)` tuples from its
+  *call_queue* until it receives `None`, and reports `(seq, status, payload)` tuples to its *result_conn*.
+
+  Every worker has its own connection to send results on, which is written to synchronously. A worker
+  that exits unexpectedly thus neither loses messages that it has sent nor blocks the other workers.
+  """
+
+  while True:
+    item = call_queue.get()
+    if item is None:
+      break
+
+    seq, task_id, name, payload = item
+    with cancel_seq.get_lock():
+      if cancel_seq.value != seq:
+        cancel_event.clear()
+
+    result_conn.send((seq, api.TaskStatus.RUNNING, None))
+    task: _WorkerTask[t.Any] = _WorkerTask(task_id, name, worker_id, seq, cancel_event, cancel_seq)
+    try:
+      runnable: api.Runnable[t.Any] = pickle.loads(payload)
+      result = pickle.dumps(runnable.run(task))
+    except BaseException as exc:
+      result_conn.send((seq, api.TaskStatus.FAILED, _encode_error(exc)))
+    else:
+      status = api.TaskStatus.CANCELLED if task.cancelled() else api.TaskStatus.SUCCEEDED
+      result_conn.send((seq, status, result))
+
+
+class _ProcessTask(Task[T]):
+
+  def __init__(self, runnable: api.Runnable[T], name: str, executor: 'ProcessExecutor', seq: int) -> None:
+    super().__init__(runnable, name)
+    self._executor = weakref.ref(executor)
+    self._seq = seq
+
+  def cancel(self) -> None:
+    """
+    Set the cancelled flag on the task and forward it to the worker process that runs the task.
+    """
+
+    super().cancel()
+    executor = self._executor()
+    if executor is not None:
+      executor._forward_cancel(self)
+
+
+@dataclasses.dataclass
+class _WorkerProcess:
+  index: int
+  process: t.Any
+  call_queue: t.Any
+  result_conn: t.Any
+  cancel_event: t.Any
+  cancel_seq: t.Any
+
+  #: Set when all messages of the worker have been received and its connection is closed.
+  exited: bool = False
+
+  #: The sequence number of the task that was dispatched to the worker. This is set by the parent before
+  #: the task is sent to the worker, such that the task can be failed if the worker exits unexpectedly.
+  seq: t.Optional[int] = None
+
+
+@dataclasses.dataclass  # type: ignore
+class ProcessExecutor(api.Executor):
+  """
+  An executor that runs tasks in a pool of worker processes, allowing CPU bound runnables to execute in
+  parallel. Runnables and their results must be picklable and, depending on the *start_method*, the
+  runnable classes must be importable by the worker processes. Exceptions raised in a worker process are
+  re-created in the parent with a #RemoteTraceback as their cause, or a #RemoteError if they cannot be
+  pickled.
+
+  Cancelling a #Task is forwarded to the worker process, where #Task.cancelled() and #Task.sleep() of the
+  task passed to the runnable behave like they do for the #DefaultExecutor. Task callbacks are invoked in
+  the parent process.
+  """
+
+  #: The name of the executor. This is used as the prefix for worker process names.
+  name: str
+
+  #: The maximum number of worker processes to spawn.
+  max_workers: int = dataclasses.field(default_factory=lambda: multiprocessing.cpu_count())
+
+  #: The #multiprocessing start method for worker processes. Defaults to `'spawn'`, which is safe to use
+  #: while other threads are running (unlike `'fork'`).
+  start_method: str = 'spawn'
+
+  def __post_init__(self) -> None:
+    # NOTE: All concrete contexts have the same interface, but #multiprocessing.get_context() is typed
+    #       to return the #BaseContext which does not expose the #Process class.
+    self._ctx = t.cast(multiprocessing.context.SpawnContext, multiprocessing.get_context(self.start_method))
+    self._wakeup_reader, self._wakeup_writer = self._ctx.Pipe(duplex=False)
+    self._lock = threading.Lock()
+    self._idle_cond = threading.Condition(self._lock)
+    self._seq = 0
+    self._tasks: t.Dict[int, _ProcessTask[t.Any]] = {}
+    self._payloads: t.Dict[int, bytes] = {}
+    self._workers: t.List[_WorkerProcess] = []
+    self._idle: t.List[int] = []
+    self._queue = TaskPriorityQueue()
+    self._shutdown = False
+    self._dispatcher = threading.Thread(target=self._dispatch_loop, name=f'{self.name}-Dispatcher', daemon=True)
+    self._collector = threading.Thread(target=self._collect_loop, name=f'{self.name}-Collector', daemon=True)
+    self._started = False
+
+  def _spawn_worker(self, index: int) -> _WorkerProcess:
+    """
+    Start a new worker process. Must be called with the lock held.
+    """
+
+    worker_id = f'{self.name}-Worker-{index}'
+    call_queue = self._ctx.Queue()
+    result_reader, result_writer = self._ctx.Pipe(duplex=False)
+    cancel_event = self._ctx.Event()
+    cancel_seq = self._ctx.Value('q', -1)
+    process = self._ctx.Process(
+      target=_worker_main,
+      args=(index, worker_id, call_queue, result_writer, cancel_event, cancel_seq),
+      name=worker_id,
+      daemon=True,
+    )
+    process.start()
+    # Only the worker holds the write end, such that the read end reports EOF when the worker exits.
+    result_writer.close()
+    self._wakeup()
+    return _WorkerProcess(index, process, call_queue, result_reader, cancel_event, cancel_seq)
+
+  def _wakeup(self, stop: bool = False) -> None:
+    """
+    Wake up the collector to pick up changes to the worker processes, or to *stop*. Must be called with
+    the lock held.
+    """
+
+    self._wakeup_writer.send(stop)
+
+  def _acquire_worker(self) -> t.Optional[_WorkerProcess]:
+    """
+    Wait for an idle worker process, spawning a new one if the pool is not full. Returns `None` if the
+    executor was shut down while waiting. Must be called with the lock held.
+    """
+
+    while not self._shutdown:
+      if self._idle:
+        return self._workers[self._idle.pop()]
+      if len(self._workers) < self.max_workers:
+        worker = self._spawn_worker(len(self._workers))
+        self._workers.append(worker)
+        return worker
+      self._idle_cond.wait()
+    return None
+
+  def _release_worker(self, worker: _WorkerProcess) -> None:
+    with self._idle_cond:
+      worker.seq = None
+      self._idle.append(worker.index)
+      self._idle_cond.notify()
+
+  def _dispatch_loop(self) -> None:
+    while True:
+      task = self._queue.get()
+      if task is None:
+        break
+      task = t.cast(_ProcessTask[t.Any], task)
+      if task.cancelled():
+        self._complete(task._seq, api.TaskStatus.IGNORED)
+        continue
+      with self._lock:
+        worker = self._acquire_worker()
+        # The task may have been cancelled while waiting for a worker, in which case the worker stays idle.
+        dispatch = worker is not None and not task.cancelled()
+        if dispatch:
+          assert worker is not None
+          worker.seq = task._seq
+          payload = self._payloads.pop(task._seq)
+        elif worker is not None:
+          self._idle.append(worker.index)
+      if worker is None:
+        self._complete(task._seq, api.TaskStatus.IGNORED)
+        break
+      if not dispatch:
+        self._complete(task._seq, api.TaskStatus.IGNORED)
+        continue
+      worker.call_queue.put((task._seq, task.id, task.name, payload))
+
+  def _complete(self, seq: int, status: api.TaskStatus, result: t.Any = None, error: t.Optional[api.ExcInfoType] = None) -> None:
+    with self._lock:
+      task = self._tasks.pop(seq)
+      self._payloads.pop(seq, None)
+    try:
+      task._update(status, result, error)
+    except Exception:
+      logger.exception('Unhandled exception while updating task "%s"', task.name)
+    if status == api.TaskStatus.FAILED and not task._error_consumed:
+      assert error is not None
+      logger.error('Unhandled exception in task "%s"', task.name, exc_info=error)
+    logger.info('Finished task "%s"', task.name)
+    self._queue.task_done()
+
+  def _handle_message(self, worker: _WorkerProcess, seq: int, status: api.TaskStatus, payload: t.Any) -> None:
+    with self._lock:
+      # Messages of a worker that exited unexpectedly can be received after its task was failed.
+      if worker.seq != seq:
+        return
+      task = self._tasks[seq]
+
+    if status == api.TaskStatus.RUNNING:
+      logger.info('Running task "%s"', task.name)
+      task._worker_id = worker.process.name
+      task._update(api.TaskStatus.RUNNING)
+      if task.cancelled():
+        self._forward_cancel(task)
+      return
+
+    if status == api.TaskStatus.FAILED:
+      self._complete(seq, status, error=_decode_error(*payload))
+    else:
+      try:
+        result = pickle.loads(payload)
+      except Exception as exc:
+        self._complete(seq, api.TaskStatus.FAILED, error=(type(exc), exc, exc.__traceback__))
+      else:
+        # Like the #DefaultExecutor, the return value of a cancelled runnable is discarded.
+        self._complete(seq, status, result if status == api.TaskStatus.SUCCEEDED else None)
+    self._release_worker(worker)
+
+  def _receive(self, worker: _WorkerProcess) -> None:
+    """
+    Handle the messages that are available from the *worker*. Marks the worker as exited if its
+    connection reports EOF.
+    """
+
+    while not worker.exited and worker.result_conn.poll():
+      try:
+        message = worker.result_conn.recv()
+      except (EOFError, OSError):
+        worker.exited = True
+        worker.result_conn.close()
+        break
+      try:
+        self._handle_message(worker, *message)
+      except Exception:
+        logger.exception('Unhandled exception in collector of "%s"', self.name)
+
+  def _check_workers(self) -> None:
+    """
+    Fail the tasks of worker processes that exited unexpectedly and replace them, unless the executor is
+    shut down.
+    """
+
+    for worker in list(self._workers):
+      if not worker.exited and worker.process.is_alive():
+        continue
+      # Handle the messages that the worker sent before it exited, as it may have completed its task.
+      self._receive(worker)
+      with self._lock:
+        seq, worker.seq = worker.seq, None
+        if not self._shutdown and self._workers[worker.index] is worker:
+          if worker.index in self._idle:
+            self._idle.remove(worker.index)
+          worker.call_queue.close()
+          worker.result_conn.close()
+          worker.exited = True
+          self._workers[worker.index] = self._spawn_worker(worker.index)
+          self._idle.append(worker.index)
+          self._idle_cond.notify()
+      if seq is not None:
+        exc = RuntimeError(f'worker process {worker.process.name} exited unexpectedly with code {worker.process.exitcode}')
+        self._complete(seq, api.TaskStatus.FAILED, error=(type(exc), exc, None))
+
+  def _collect_loop(self) -> None:
+    next_check = time.monotonic() + _HEALTH_CHECK_INTERVAL
+    stop = False
+    while not stop:
+      with self._lock:
+        workers = {worker.result_conn: worker for worker in self._workers if not worker.exited}
+      timeout = max(0.0, next_check - time.monotonic())
+      for conn in multiprocessing.connection.wait([self._wakeup_reader, *workers], timeout):
+        if conn is self._wakeup_reader:
+          stop = self._wakeup_reader.recv() or stop
+          continue
+        worker = workers[conn]
+        self._receive(worker)
+        if worker.exited:
+          next_check = time.monotonic()
+      # NOTE: The workers are checked regardless of the traffic on the connections. When stopping, all
+      #       workers have exited and the tasks that they did not complete are failed.
+      if stop or time.monotonic() >= next_check:
+        self._check_workers()
+        next_check = time.monotonic() + _HEALTH_CHECK_INTERVAL
+
+  def _forward_cancel(self, task: _ProcessTask[t.Any]) -> None:
+    with self._lock:
+      for worker in self._workers:
+        if worker.seq == task._seq:
+          with worker.cancel_seq.get_lock():
+            worker.cancel_seq.value = task._seq
+            worker.cancel_event.set()
+
+  def execute(
+    self,
+    runnable: api.Runnable[T],
+    name: t.Optional[str] = None,
+    at: t.Optional[float] = None,
+  ) -> Task[T]:
+    """
+    Queue a task for execution in a worker process. The *runnable* is pickled immediately, so any
+    error in pickling it is raised from this method.
+    """
+
+    assert isinstance(runnable, api.Runnable), f'expected instance of Runnable, got {type(runnable).__name__} instead'
+    if self._shutdown:
+      raise RuntimeError('task manager is shut down')
+
+    payload = pickle.dumps(runnable)
+    with self._lock:
+      self._seq += 1
+      task = _ProcessTask(runnable, name or repr(runnable), self, self._seq)
+      self._tasks[task._seq] = task
+      self._payloads[task._seq] = payload
+      if not self._started:
+        self._dispatcher.start()
+        self._collector.start()
+        self._started = True
+
+    task._update(api.TaskStatus.QUEUED)
+    self._queue.put(at or time.time(), task)
+    return task
+
+  def get_worker_count(self) -> int:
+    return len(self._workers)
+
+  def get_idle_worker_count(self) -> int:
+    with self._lock:
+      return sum(1 for worker in self._workers if worker.seq is None)
+
+  def shutdown(self, cancel_running_tasks: bool = True, block: bool = True) -> None:
+    """
+    Shut down the executor. Tasks that have not been dispatched to a worker process yet are marked as
+    #api.TaskStatus.IGNORED.
+    """
+
+    with self._idle_cond:
+      if self._shutdown:
+        raise RuntimeError('shut down already initiated or completed')
+      self._shutdown = True
+      self._idle_cond.notify_all()
+      running = [self._tasks[w.seq] for w in self._workers if w.seq is not None and w.seq in self._tasks]
+
+    logger.info('Sending shutdown signal to workers')
+
+    if cancel_running_tasks:
+      for task in running:
+        task.cancel()
+
+    # Stop the dispatcher before the workers, so it does not dispatch tasks or spawn workers after that.
+    # Use the current time to jump in front of pending tasks.
+    self._queue.put_stop(0)
+    if self._started:
+      self._dispatcher.join()
+    for queued in self._queue.drain():
+      self._complete(t.cast(_ProcessTask[t.Any], queued)._seq, api.TaskStatus.IGNORED)
+    for worker in self._workers:
+      worker.call_queue.put(None)
+
+    def _join() -> None:
+      for worker in self._workers:
+        worker.process.join()
+      with self._lock:
+        self._wakeup(stop=True)
+      if self._started:
+        self._collector.join()
+
+    if block:
+      _join()
+    else:
+      threading.Thread(target=_join, name=f'{self.name}-Shutdown', daemon=True).start()
+
+  def join(self) -> None:
+    self._queue.join_total()
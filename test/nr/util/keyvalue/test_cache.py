@@ -0,0 +1,99 @@
+
+import time
+import typing as t
+
+import pytest
+
+from nr.util.keyvalue import CachedKeyValueStore, KeyValueStore
+from nr.util.keyvalue.sqlite import SqliteDatastore
+
+
+class DictStore(KeyValueStore):
+  """ A store that does not check expiration itself, so expired values can only be hidden by the cache. """
+
+  def __init__(self) -> None:
+    self.data: t.Dict[str, t.Tuple[bytes, t.Optional[int]]] = {}
+    self.reads = 0
+
+  def get(self, key: str) -> bytes:
+    return self.get_with_expiration(key)[0]
+
+  def get_with_expiration(self, key: str) -> t.Tuple[bytes, t.Optional[int]]:
+    self.reads += 1
+    return self.data[key]
+
+  def set(self, key: str, data: bytes, exp: t.Optional[int] = None) -> None:
+    self.data[key] = (data, exp)
+
+  def delete(self, key: str) -> None:
+    self.data.pop(key, None)
+
+  def keys(self, prefix: str = '') -> t.Iterable[str]:
+    return [key for key in self.data if key.startswith(prefix)]
+
+  def count(self, prefix: str = '') -> int:
+    return len(list(self.keys(prefix)))
+
+
+def test_cache_hits_and_invalidation():
+  kv = CachedKeyValueStore(SqliteDatastore(':memory:').get_namespace('foobar'))
+  kv.set('a', b'1')
+  assert kv.get('a') == b'1'
+  assert kv.get('a') == b'1'
+  assert kv.get_stats()['hits'] == 1 and kv.get_stats()['misses'] == 1
+
+  kv.set('a', b'2')
+  assert kv.get('a') == b'2'
+  kv.delete('a')
+  with pytest.raises(KeyError):
+    kv.get('a')
+
+  kv.set_many({'b': b'1', 'c': b'2'})
+  assert kv.get('b') == b'1'
+  assert kv.get_many(['b', 'c', 'd']) == {'b': b'1', 'c': b'2'}
+  kv.delete_many(['b'])
+  assert kv.get_many(['b', 'c']) == {'c': b'2'}
+
+
+def test_cache_eviction():
+  store = DictStore()
+  kv = CachedKeyValueStore(store, max_entries=2, max_bytes=10)
+  for key in 'abc':
+    kv.set(key, b'12')
+
+  kv.get('a')
+  kv.get('b')
+  kv.get('a')  # Makes "b" the least recently used entry.
+  kv.get('c')
+  assert kv.get_stats() == {'hits': 1, 'misses': 3, 'evictions': 1, 'entries': 2, 'bytes': 4}
+  store.reads = 0
+  kv.get('a')
+  kv.get('b')
+  assert store.reads == 1
+
+  kv.set('big', b'x' * 11)
+  kv.get('big')
+  assert kv.get_stats()['entries'] == 2
+
+  kv.set('d', b'x' * 9)
+  kv.get('d')
+  assert kv.get_stats()['entries'] == 1
+  assert kv.get_stats()['bytes'] == 9
+
+
+def test_cache_expiration():
+  store = DictStore()
+  kv = CachedKeyValueStore(store)
+  kv.set('a', b'1', int(time.time()) - 1)
+  kv.set('b', b'2', int(time.time()) + 3600)
+  for _ in range(2):
+    assert kv.get('a') == b'1'
+    assert kv.get('b') == b'2'
+  assert store.reads == 3
+
+  kv = CachedKeyValueStore(store, max_age=0.05)
+  kv.get('b')
+  kv.get('b')
+  time.sleep(0.1)
+  kv.get('b')
+  assert kv.get_stats()['hits'] == 1 and kv.get_stats()['misses'] == 2
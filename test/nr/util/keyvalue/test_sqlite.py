@@ -1,4 +1,7 @@
 
+import threading
+import time
+
 import pytest
 
 from nr.util.keyvalue.sqlite import SqliteDatastore
@@ -19,3 +22,164 @@ def test_sqlite_datastore():
   assert list(kv.keys()) == ['spam']
   assert list(kv.keys('spa')) == ['spam']
   assert list(kv.keys('bar')) == []
+
+
+def test_sqlite_datastore_pooled(tmp_path):
+  ds = SqliteDatastore(str(tmp_path / 'data.db'), pooled=True)
+  kv = ds.get_namespace('foobar')
+  for i in range(100):
+    kv.set(f'key-{i}', str(i).encode())
+
+  errors = []
+
+  def reader() -> None:
+    try:
+      for i in range(100):
+        assert kv.get(f'key-{i}') == str(i).encode()
+      assert sorted(kv.keys()) == sorted(f'key-{i}' for i in range(100))
+    except BaseException as exc:
+      errors.append(exc)
+
+  threads = [threading.Thread(target=reader) for _ in range(8)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  assert errors == []
+
+  # Writes are visible to the read connection of the writing thread.
+  kv.set('key-0', b'updated')
+  assert kv.get('key-0') == b'updated'
+  kv.delete('key-0')
+  with pytest.raises(KeyError):
+    kv.get('key-0')
+
+  ds.close()
+
+
+def test_sqlite_datastore_pooled_rejects_memory():
+  with pytest.raises(ValueError):
+    SqliteDatastore(':memory:', pooled=True)
+
+
+def test_sqlite_datastore_bulk():
+  ds = SqliteDatastore(':memory:')
+  kv = ds.get_namespace('foobar')
+
+  kv.set_many({f'key-{i}': str(i).encode() for i in range(1200)})
+  kv.set_many([('short', b'lived')], -1)
+  assert kv.get('key-1199') == b'1199'
+
+  result = kv.get_many([f'key-{i}' for i in range(0, 1300, 2)] + ['short'])
+  assert result == {f'key-{i}': str(i).encode() for i in range(0, 1200, 2)}
+
+  kv.delete_many(f'key-{i}' for i in range(1000))
+  assert sorted(kv.get_many(f'key-{i}' for i in range(1200))) == sorted(f'key-{i}' for i in range(1000, 1200))
+
+
+def test_sqlite_datastore_transaction():
+  ds = SqliteDatastore(':memory:')
+  kv = ds.get_namespace('foobar')
+
+  with kv.transaction():
+    kv.set('a', b'1')
+    kv.set('b', b'2')
+    assert kv.get('a') == b'1'
+  assert kv.get_many(['a', 'b']) == {'a': b'1', 'b': b'2'}
+
+  with pytest.raises(ZeroDivisionError):
+    with kv.transaction():
+      kv.set('a', b'changed')
+      kv.delete('b')
+      1 / 0
+  assert kv.get_many(['a', 'b']) == {'a': b'1', 'b': b'2'}
+
+  # A nested transaction can be rolled back without affecting the outer one.
+  with kv.transaction():
+    kv.set('c', b'3')
+    with pytest.raises(ZeroDivisionError):
+      with kv.transaction():
+        kv.set('d', b'4')
+        1 / 0
+    with kv.transaction():
+      kv.set('e', b'5')
+  assert kv.get_many(['c', 'd', 'e']) == {'c': b'3', 'e': b'5'}
+
+  # Namespaces created in an aborted transaction are created again on the next write.
+  transaction = ds.transaction()
+  ds.set('other', 'a', b'1')
+  transaction.abort()
+  assert 'other' not in list(ds.get_namespaces())
+  ds.set('other', 'a', b'1')
+  assert ds.get('other', 'a') == b'1'
+
+  with pytest.raises(RuntimeError):
+    transaction.commit()
+
+
+def test_sqlite_datastore_pooled_transaction(tmp_path):
+  ds = SqliteDatastore(str(tmp_path / 'data.db'), pooled=True)
+  kv = ds.get_namespace('foobar')
+  kv.set('a', b'1')
+
+  seen = []
+  reader = lambda: seen.append(kv.get('a'))
+
+  with kv.transaction():
+    kv.set('a', b'2')
+    assert kv.get('a') == b'2'
+    thread = threading.Thread(target=reader)
+    thread.start()
+    thread.join()
+
+  assert seen == [b'1']
+  assert kv.get('a') == b'2'
+  ds.close()
+
+
+def test_sqlite_datastore_expiry():
+  ds = SqliteDatastore(':memory:')
+  kv = ds.get_namespace('foobar')
+  kv.set_many({f'old-{i}': b'' for i in range(25)}, -1)
+  kv.set('new', b'', 3600)
+  kv.set('forever', b'')
+  kv.set('a_b', b'')
+  kv.set('axb', b'')
+
+  assert sorted(kv.keys()) == ['a_b', 'axb', 'forever', 'new']
+  assert list(kv.keys('a_')) == ['a_b']
+
+  with ds._locked_cursor() as cursor:
+    cursor.execute('''SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'foobar' ''')
+    assert ('foobar:exp',) in cursor.fetchall()
+  assert list(ds.get_namespaces()) == ['foobar']
+
+  assert ds.expunge('foobar', limit=10) == 10
+  assert ds.expunge(limit=10) == 10
+  assert ds.expunge() == 5
+  assert ds.expunge() == 0
+  assert kv.get_many(['new', 'forever']) == {'new': b'', 'forever': b''}
+
+
+def test_sqlite_datastore_background_expiry():
+  ds = SqliteDatastore(':memory:')
+  kv = ds.get_namespace('foobar')
+  kv.set_many({f'old-{i}': b'' for i in range(50)}, -1)
+  kv.set('new', b'')
+
+  ds.start_expiry(interval=0.01, batch_size=20)
+  with pytest.raises(RuntimeError):
+    ds.start_expiry()
+  deadline = time.monotonic() + 5
+  while time.monotonic() < deadline:
+    with ds._locked_cursor() as cursor:
+      cursor.execute('SELECT COUNT(*) FROM foobar')
+      if cursor.fetchone()[0] == 1:
+        break
+    time.sleep(0.01)
+  ds.stop_expiry()
+
+  with ds._locked_cursor() as cursor:
+    cursor.execute('SELECT key FROM foobar')
+    assert cursor.fetchall() == [('new',)]
+  ds.close()
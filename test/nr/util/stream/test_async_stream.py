@@ -0,0 +1,65 @@
+import asyncio
+import typing as t
+
+import pytest
+
+from nr.util.stream import AsyncStream
+
+
+async def agen(values: t.Iterable[int]) -> t.AsyncIterator[int]:
+  for value in values:
+    await asyncio.sleep(0)
+    yield value
+
+
+def test_async_stream_map():
+  async def double(x: int) -> int:
+    await asyncio.sleep(0)
+    return x * 2
+
+  assert asyncio.run(AsyncStream(agen(range(5))).map(double).collect()) == [0, 2, 4, 6, 8]
+  assert asyncio.run(AsyncStream(range(5)).map(lambda x: x + 1).collect()) == [1, 2, 3, 4, 5]
+
+
+def test_async_stream_map_concurrency():
+  active = 0
+  max_active = 0
+
+  async def func(x: int) -> int:
+    nonlocal active, max_active
+    active += 1
+    max_active = max(max_active, active)
+    await asyncio.sleep(0.01 * (5 - x))
+    active -= 1
+    return x
+
+  assert asyncio.run(AsyncStream(range(5)).map(func, concurrency=3).collect()) == [0, 1, 2, 3, 4]
+  assert max_active == 3
+
+  with pytest.raises(ValueError):
+    AsyncStream(range(5)).map(func, concurrency=0)
+
+
+def test_async_stream_filter():
+  async def is_even(x: int) -> bool:
+    return x % 2 == 0
+
+  assert asyncio.run(AsyncStream(agen(range(10))).filter(is_even, concurrency=4).collect()) == [0, 2, 4, 6, 8]
+
+
+def test_async_stream_batch():
+  assert asyncio.run(AsyncStream(agen(range(7))).batch(3).collect()) == [[0, 1, 2], [3, 4, 5], [6]]
+  assert asyncio.run(AsyncStream(agen(range(7))).batch(3, sum).collect()) == [3, 12, 6]
+
+
+def test_async_stream_groupby():
+  values = [1, 1, 2, 3, 3, 3, 1]
+  assert asyncio.run(AsyncStream(agen(values)).groupby(lambda x: x).collect()) == \
+      [(1, [1, 1]), (2, [2]), (3, [3, 3, 3]), (1, [1])]
+  assert asyncio.run(AsyncStream(agen(values)).groupby(lambda x: x, len).collect()) == [(1, 2), (2, 1), (3, 3), (1, 1)]
+
+
+def test_async_stream_distinct():
+  values = [1, 5, 6, 5, 3, 8, 1, 3, 9, 0]
+  assert asyncio.run(AsyncStream(agen(values)).distinct().collect()) == [1, 5, 6, 3, 8, 9, 0]
+  assert asyncio.run(AsyncStream(agen(values)).distinct(lambda x: x % 3).collect(set)) == {1, 5, 6}
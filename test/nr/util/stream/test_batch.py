@@ -0,0 +1,31 @@
+import array
+
+import pytest
+
+from nr.util.stream import Stream
+
+
+def test_batch_array_fallback():
+  batches = Stream(range(7)).batch(3, dtype='q', use_numpy=False).collect()
+  assert batches == [array.array('q', [0, 1, 2]), array.array('q', [3, 4, 5]), array.array('q', [6])]
+
+  with pytest.raises(ValueError):
+    Stream(range(7)).batch(3, list, dtype='q')
+
+
+def test_map_batches_array_fallback():
+  result = Stream(range(5)).map_batches(lambda a: array.array('d', (x * 2 for x in a)), 2, use_numpy=False).collect()
+  assert result == [0.0, 2.0, 4.0, 6.0, 8.0]
+
+
+def test_batch_numpy():
+  numpy = pytest.importorskip('numpy')
+
+  batches = Stream(range(7)).batch(3, dtype='float64').map(lambda a: a.tolist()).collect()
+  assert batches == [[0.0, 1.0, 2.0], [3.0, 4.0, 5.0], [6.0]]
+
+  buffers = Stream(range(7)).batch(3, dtype='float64', reuse=True).map(lambda a: a.base is not None).collect()
+  assert buffers == [True, True, True]
+
+  result = Stream(range(5)).map_batches(lambda a: numpy.multiply(a, 2, out=a), 2).collect()
+  assert result == [0.0, 2.0, 4.0, 6.0, 8.0]
@@ -0,0 +1,47 @@
+import pytest
+
+from nr.util.stream import BloomFilter, LRUSet, Stream
+
+
+@pytest.mark.parametrize('error_rate', [0.001, 0.01, 0.05])
+def test_bloom_filter(error_rate: float):
+  # NOTE: Integers hash to themselves, so unlike strings the result does not vary between runs.
+  bf: BloomFilter[int] = BloomFilter(2000, error_rate)
+  for i in range(2000):
+    bf.add(i)
+  assert all(i in bf for i in range(2000))
+  false_positives = sum(i in bf for i in range(2000, 22000))
+  assert false_positives <= 1.5 * error_rate * 20000
+  assert len(bf) == 2000
+
+
+def test_bloom_filter_invalid_arguments():
+  with pytest.raises(ValueError):
+    BloomFilter(100, 1.5)
+  with pytest.raises(ValueError):
+    BloomFilter(0)
+
+
+def test_lru_set():
+  s = LRUSet(3, [1, 2, 3])
+  assert list(s) == [1, 2, 3]
+  assert 1 in s
+  s.add(4)
+  assert list(s) == [3, 1, 4]
+  s.discard(1)
+  assert list(s) == [3, 4]
+
+
+def test_distinct_window():
+  values = [1, 1, 2, 1, 3, 3, 4, 5, 1]
+  assert Stream(values).distinct(window=2).collect() == [1, 2, 3, 4, 5, 1]
+  assert Stream(values).distinct(skip=LRUSet(2)).collect() == [1, 2, 3, 4, 5, 1]
+
+
+def test_distinct_bloom_filter():
+  values = list(range(100)) * 3
+  assert Stream(values).distinct(capacity=100, error_rate=0.0001).collect() == list(range(100))
+  assert Stream(values).distinct(skip=BloomFilter(100, 0.0001)).collect() == list(range(100))
+
+  with pytest.raises(ValueError):
+    Stream(values).distinct(window=10, capacity=100)
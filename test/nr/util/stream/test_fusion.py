@@ -0,0 +1,27 @@
+import typing as t
+
+from nr.util.stream import Stream
+
+
+def test_fused_stages():
+  calls: t.List[str] = []
+  def f(x: int) -> int:
+    calls.append(f'f{x}')
+    return x + 1
+  def p(x: int) -> bool:
+    calls.append(f'p{x}')
+    return x % 2 == 0
+
+  stream = Stream([1, 2, None, 3, 'a']).dropnone().of_type(int).map(f).filter(p)
+  assert stream.next() == 2
+  assert calls == ['f1', 'p2']
+  assert stream.map(str).collect() == ['4']
+  assert calls == ['f1', 'p2', 'f2', 'p3', 'f3', 'p4']
+
+
+def test_fused_stages_share_source():
+  s1 = Stream(range(10)).map(lambda x: x * 10)
+  assert s1.next() == 0
+  s2 = s1.filter(lambda x: x > 30)
+  assert s2.next() == 40
+  assert s1.next() == 50
@@ -0,0 +1,57 @@
+import concurrent.futures
+import operator
+import threading
+import time
+import typing as t
+
+import pytest
+
+from nr.util.stream import Stream
+
+
+def test_pmap():
+  values = list(range(20))
+  assert Stream(values).pmap(lambda x: x * 2, workers=4).collect() == [x * 2 for x in values]
+
+  def slow_for_small(x: int) -> int:
+    time.sleep(0.05 if x == 0 else 0)
+    return x
+  result = Stream(range(4)).pmap(slow_for_small, workers=4, ordered=False).collect()
+  assert sorted(result) == [0, 1, 2, 3]
+  assert result[-1] == 0
+
+
+def test_pmap_window():
+  consumed = 0
+  def source() -> t.Iterator[int]:
+    nonlocal consumed
+    for i in range(100):
+      consumed += 1
+      yield i
+
+  stream = Stream(source()).pmap(lambda x: x, workers=2, window=3)
+  assert stream.next() == 0
+  assert consumed == 4
+
+
+def test_pmap_with_executor():
+  with concurrent.futures.ThreadPoolExecutor(2) as executor:
+    assert Stream(range(5)).pmap(lambda x: threading.current_thread().name, backend=executor).distinct().count() <= 2
+    assert Stream(range(5)).pmap(operator.neg, backend=executor).collect() == [0, -1, -2, -3, -4]
+
+
+def test_pmap_process_backend():
+  assert Stream(range(5)).pmap(operator.neg, workers=2, backend='process').collect() == [0, -1, -2, -3, -4]
+
+
+def test_pmap_propagates_errors():
+  with pytest.raises(ZeroDivisionError):
+    Stream([1, 0, 2]).pmap(lambda x: 1 // x).collect()
+
+
+def test_pfilter():
+  assert Stream(range(10)).pfilter(lambda x: x % 2 == 0, workers=3).collect() == [0, 2, 4, 6, 8]
+
+
+def test_pflatmap():
+  assert ''.join(Stream(['abc', 'def']).pflatmap(lambda x: x, workers=2)) == 'abcdef'
@@ -0,0 +1,39 @@
+import pytest
+
+from nr.util.stream import Reducer, Stream
+
+EVENTS = [('a', 3), ('a', 1), ('b', 5), ('a', 2), ('c', 7), ('b', 1)]
+
+
+def test_reducer_as_collector():
+  values = [3, 1, 4, 1, 5]
+  assert Stream(values).collect(Reducer.count()) == 5
+  assert Stream(values).collect(Reducer.sum()) == 14
+  assert Stream(values).collect(Reducer.min()) == 1
+  assert Stream(values).collect(Reducer.max()) == 5
+  assert Stream(values).collect(Reducer.of(lambda a, x: a * x, lambda: 1)) == 60
+  assert Stream(values).collect(Reducer.zip(Reducer.count(), Reducer.sum(), Reducer.list())) == (5, 14, values)
+  assert Stream([]).collect(Reducer.max()) is None
+
+
+def test_groupby_sorted_with_reducer():
+  result = Stream(EVENTS).sortby(lambda x: x[0]).groupby(lambda x: x[0], Reducer.sum(lambda x: x[1])).collect()
+  assert result == [('a', 6), ('b', 6), ('c', 7)]
+
+  result = Stream(EVENTS).groupby(lambda x: x[0], Reducer.count()).collect()
+  assert result == [('a', 2), ('b', 1), ('a', 1), ('c', 1), ('b', 1)]
+  assert Stream([]).groupby(lambda x: x, Reducer.count()).collect() == []
+
+
+def test_groupby_hash():
+  result = Stream(EVENTS).groupby(lambda x: x[0], Reducer.max(lambda x: x[1]), strategy='hash').collect()
+  assert result == [('a', ('a', 3)), ('b', ('b', 5)), ('c', ('c', 7))]
+
+  result = Stream(EVENTS).groupby(lambda x: x[0], strategy='hash').collect()
+  assert result == [('a', [EVENTS[0], EVENTS[1], EVENTS[3]]), ('b', [EVENTS[2], EVENTS[5]]), ('c', [EVENTS[4]])]
+
+  result = Stream(EVENTS).groupby(lambda x: x[0], len, strategy='hash').collect()
+  assert result == [('a', 3), ('b', 2), ('c', 1)]
+
+  with pytest.raises(ValueError):
+    Stream(EVENTS).groupby(lambda x: x[0], strategy='foo')  # type: ignore
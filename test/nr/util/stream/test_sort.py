@@ -0,0 +1,26 @@
+import random
+
+from nr.util.stream import Stream
+from nr.util.stream._sort import external_sort
+
+
+def test_external_sort():
+  values = [random.randint(0, 100) for _ in range(5000)]
+  assert list(external_sort(values, buffer_size=300)) == sorted(values)
+  assert list(external_sort(values, buffer_size=300, reverse=True)) == sorted(values, reverse=True)
+  assert list(external_sort(values[:10], buffer_size=300)) == sorted(values[:10])
+  assert list(external_sort([], buffer_size=300)) == []
+
+
+def test_external_sort_is_stable():
+  values = [(random.randint(0, 10), i) for i in range(2000)]
+  assert list(external_sort(values, key=lambda x: x[0], buffer_size=64)) == sorted(values, key=lambda x: x[0])
+  assert list(external_sort(values, key=lambda x: x[0], reverse=True, buffer_size=64)) == \
+      sorted(values, key=lambda x: x[0], reverse=True)
+
+
+def test_sortby_buffer_size(tmp_path):
+  values = [{'a': random.random()} for _ in range(1000)]
+  result = Stream(values).sortby('a', buffer_size=100, tempdir=str(tmp_path)).collect()
+  assert result == sorted(values, key=lambda x: x['a'])
+  assert Stream([3, 1, 2]).sort(reverse=True, buffer_size=2).collect() == [3, 2, 1]
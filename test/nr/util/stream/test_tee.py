@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from nr.util.stream import Reducer, Stream
+from nr.util.stream._tee import tee
+
+
+def test_tee():
+  a, b, c = Stream(range(5)).tee(3)
+  assert a.collect() == [0, 1, 2, 3, 4]
+  assert b.next() == 0
+  assert c.collect() == [0, 1, 2, 3, 4]
+  assert b.collect() == [1, 2, 3, 4]
+
+
+def test_tee_bounded():
+  a, b = Stream(range(10)).tee(2, maxsize=3)
+  assert [a.next(), a.next(), a.next()] == [0, 1, 2]
+  with pytest.raises(BufferError):
+    a.next()
+  assert b.next() == 0
+  assert a.next() == 3
+
+
+def test_tee_closed_stream_does_not_hold_back():
+  a, b = Stream(range(10)).tee(2, maxsize=3)
+  del b
+  assert a.collect() == list(range(10))
+
+
+def test_tee_blocking():
+  a, b = Stream(range(1000)).tee(2, maxsize=10, block=True)
+  result = []
+  thread = threading.Thread(target=lambda: result.append(b.collect()))
+  thread.start()
+  assert a.collect() == list(range(1000))
+  thread.join()
+  assert result == [list(range(1000))]
+
+
+def test_broadcast():
+  values = list(range(100))
+  assert Stream(values).broadcast(Reducer.count(), Reducer.sum()) == (100, 4950)
+  assert Stream(values).broadcast(Reducer.max(), sorted, Reducer.min(), set, maxsize=4) == (99, values, 0, set(values))
+  assert Stream(values).broadcast(list, lambda it: next(iter(it))) == (values, 0)
+
+
+def test_broadcast_error():
+  def fail(it):
+    next(iter(it))
+    raise ValueError('oops')
+  with pytest.raises(ValueError):
+    Stream(range(100)).broadcast(list, fail, maxsize=4)
+
+
+def test_tee_next_after_close():
+  a, b = tee(range(3), 2)
+  a.close()
+  assert list(a) == []
+  assert list(b) == [0, 1, 2]
+
+
+def test_tee_garbage_collected_while_pulling_from_source():
+  refs = []
+  result = []
+
+  def source():
+    yield 1
+    # Dropping the last reference closes the other iterator while the first one pulls from the source.
+    refs.clear()
+    yield 2
+
+  def consume():
+    result.extend(first)
+
+  first, second = tee(source())
+  refs.append(second)
+  del second
+  thread = threading.Thread(target=consume, daemon=True)
+  thread.start()
+  thread.join(2)
+  assert not thread.is_alive()
+  assert result == [1, 2]
@@ -0,0 +1,35 @@
+import pytest
+
+from nr.util.stream import Reducer, Stream, Window
+
+TIMESTAMPS = [0, 1, 4, 5, 6, 12, 13, 30]
+
+
+def test_tumbling_window():
+  result = Stream(TIMESTAMPS).tumbling_window(5, lambda x: x).collect()
+  assert result == [Window(0, 5, [0, 1, 4]), Window(5, 10, [5, 6]), Window(10, 15, [12, 13]), Window(30, 35, [30])]
+
+  result = Stream(TIMESTAMPS).tumbling_window(5, lambda x: x, Reducer.count()).map(lambda w: w.value).collect()
+  assert result == [3, 2, 2, 1]
+
+
+def test_sliding_window():
+  result = Stream(TIMESTAMPS).sliding_window(10, 5, lambda x: x, Reducer.count()).collect()
+  assert result == [
+    Window(-5, 5, 3),
+    Window(0, 10, 5),
+    Window(5, 15, 4),
+    Window(10, 20, 2),
+    Window(25, 35, 1),
+    Window(30, 40, 1),
+  ]
+
+
+def test_session_window():
+  result = Stream(TIMESTAMPS).session_window(3, lambda x: x, Reducer.list()).collect()
+  assert result == [Window(0, 9, [0, 1, 4, 5, 6]), Window(12, 16, [12, 13]), Window(30, 33, [30])]
+
+
+def test_window_requires_ordered_timestamps():
+  with pytest.raises(ValueError):
+    Stream([1, 3, 2]).tumbling_window(5, lambda x: x).collect()
@@ -0,0 +1,124 @@
+import asyncio
+import dataclasses
+import time
+import typing as t
+
+import pytest
+
+from nr.util.task import AsyncioExecutor, DefaultExecutor, Runnable, Task, TaskStatus
+
+
+@dataclasses.dataclass
+class AsyncSquare(Runnable[int]):
+  value: int
+  delay: float = 0.0
+
+  async def run(self, task: 'Task') -> int:  # type: ignore
+    await asyncio.sleep(self.delay)
+    return self.value ** 2
+
+
+@dataclasses.dataclass
+class AsyncFail(Runnable[None]):
+
+  async def run(self, task: 'Task') -> None:  # type: ignore
+    raise ValueError('bad')
+
+
+@dataclasses.dataclass
+class Concurrency(Runnable[None]):
+  counter: t.List[int]
+
+  async def run(self, task: 'Task') -> None:  # type: ignore
+    self.counter[0] += 1
+    self.counter[1] = max(self.counter[1], self.counter[0])
+    await asyncio.sleep(0.05)
+    self.counter[0] -= 1
+
+
+@dataclasses.dataclass
+class Sleeper(Runnable[None]):
+  duration: float
+
+  def run(self, task: 'Task') -> None:
+    task.sleep(self.duration)
+
+
+def test_asyncio_executor_runs_coroutines():
+  executor = AsyncioExecutor('Test')
+  tasks = [executor.execute(AsyncSquare(i, 0.01)) for i in range(10)]
+  failed = executor.execute(AsyncFail())
+  executor.join()
+  assert [task.result for task in tasks] == [i ** 2 for i in range(10)]
+  assert all(task.worker_id == 'Test-EventLoop' for task in tasks)
+  assert failed.status == TaskStatus.FAILED
+  executor.shutdown()
+
+
+def test_asyncio_executor_max_concurrency():
+  counter = [0, 0]
+  executor = AsyncioExecutor('Test', max_concurrency=2)
+  for _ in range(6):
+    executor.execute(Concurrency(counter))
+  executor.join()
+  assert counter == [0, 2]
+  executor.shutdown()
+
+
+def test_asyncio_executor_cancel_and_shutdown():
+  executor = AsyncioExecutor('Test')
+  t1 = executor.execute(AsyncSquare(1, 10))
+  t2 = executor.execute(AsyncSquare(2), at=time.time() + 10)
+  time.sleep(0.05)
+  tstart = time.perf_counter()
+  t1.cancel()
+  executor.shutdown()
+  assert time.perf_counter() - tstart < 1
+  assert t1.status == TaskStatus.CANCELLED
+  assert t2.status == TaskStatus.IGNORED
+  with pytest.raises(RuntimeError):
+    executor.execute(AsyncSquare(3))
+
+
+def test_asyncio_executor_in_running_loop():
+  async def main() -> t.List[t.Optional[int]]:
+    executor = AsyncioExecutor('Test', loop=asyncio.get_event_loop())
+    t1 = executor.execute(AsyncSquare(3, 0.01))
+    t2 = executor.execute(AsyncFail())
+    result = await t1
+    with pytest.raises(ValueError):
+      await t2
+    with pytest.raises(RuntimeError):
+      executor.join()
+    executor.shutdown(block=False)
+    return [result]
+
+  assert asyncio.run(main()) == [9]
+
+
+def test_await_thread_pool_task():
+  executor = DefaultExecutor('Test', 1)
+
+  async def main() -> t.Tuple[TaskStatus, TaskStatus]:
+    t1 = executor.execute(Sleeper(0.1))
+    await t1
+    t2 = executor.execute(Sleeper(0.1))
+    await asyncio.wait_for(t2, timeout=5)
+    return t1.status, t2.status
+
+  assert asyncio.run(main()) == (TaskStatus.SUCCEEDED, TaskStatus.SUCCEEDED)
+  executor.shutdown()
+
+
+def test_cancelled_await_removes_callback():
+  executor = DefaultExecutor('Test', 1)
+
+  async def main() -> None:
+    t1 = executor.execute(Sleeper(0.5))
+    with pytest.raises(asyncio.TimeoutError):
+      await asyncio.wait_for(t1, timeout=0.05)
+    assert not t1.callbacks._generic
+
+  asyncio.run(main())
+  executor.join()
+  executor.shutdown()
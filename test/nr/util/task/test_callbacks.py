@@ -0,0 +1,63 @@
+import concurrent.futures
+import threading
+import typing as t
+
+from nr.util.task import DefaultExecutor, Runnable, Task, TaskStatus
+from nr.util.task._default import Task as DefaultTask
+
+
+class Noop(Runnable[None]):
+
+  def run(self, task: 'Task') -> None:
+    pass
+
+
+class Sleeper(Runnable[None]):
+
+  def run(self, task: 'Task') -> None:
+    task.sleep(0.2)
+
+
+def test_task_callbacks_by_status_and_condition():
+  calls: t.List[str] = []
+  task: DefaultTask[None] = DefaultTask(Noop(), 'noop')
+  task.callbacks.on('start', lambda task: calls.append(f'start:{task.status.name}'), once=False)
+  task.callbacks.on('end', lambda task: calls.append(f'end:{task.status.name}'))
+  task.callbacks.on(TaskStatus.FAILED, lambda task: calls.append('failed'))
+  task.callbacks.on([TaskStatus.QUEUED, TaskStatus.RUNNING], lambda task: calls.append('group'), group='g')
+  task.callbacks.add(lambda task: task.status.completed, lambda task: calls.append('completed'))
+  task.callbacks.remove(group='g')
+
+  task._update(TaskStatus.QUEUED)
+  task._update(TaskStatus.RUNNING)
+  task._update(TaskStatus.SUCCEEDED)
+  assert calls == ['start:RUNNING', 'start:SUCCEEDED', 'end:SUCCEEDED', 'completed']
+
+  # Callbacks whose condition already matches run immediately.
+  task.callbacks.on('end', lambda task: calls.append('late'))
+  assert calls[-1] == 'late'
+
+
+def test_task_callbacks_on_callback_executor():
+  threads: t.List[str] = []
+  done = threading.Event()
+  with concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix='Callbacks') as callback_executor:
+    executor = DefaultExecutor('Test', 1, callback_executor=callback_executor)
+    task = executor.execute(Sleeper())
+    task.callbacks.on(TaskStatus.SUCCEEDED, lambda task: (threads.append(threading.current_thread().name), done.set()))
+    assert done.wait(2)
+    executor.shutdown()
+  assert len(threads) == 1
+  assert threads[0].startswith('Callbacks')
+
+
+def test_task_callbacks_on_shut_down_callback_executor():
+  calls: t.List[str] = []
+  callback_executor = concurrent.futures.ThreadPoolExecutor(1)
+  callback_executor.shutdown()
+  task: DefaultTask[None] = DefaultTask(Noop(), 'noop', callback_executor=callback_executor)
+  task.callbacks.on('end', lambda task: calls.append(task.status.name))
+  task._update(TaskStatus.QUEUED)
+  task._update(TaskStatus.SUCCEEDED)
+  assert task.status == TaskStatus.SUCCEEDED
+  assert calls == ['SUCCEEDED']
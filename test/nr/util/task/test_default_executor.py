@@ -1,8 +1,13 @@
 
 import dataclasses
+import threading
 import time
+import typing as t
 
-from nr.util.task import DefaultExecutor, Runnable, Task, TaskStatus
+import pytest
+
+from nr.util.task import DefaultExecutor, Runnable, Task, TaskMetrics, TaskRejectedError, TaskStatus
+from nr.util.task._default import Task as DefaultTask, TaskPriorityQueue
 
 
 @dataclasses.dataclass
@@ -14,7 +19,7 @@ class Sleeper(Runnable[None]):
 
 
 def test_default_executor_shutdown_no_active_cancel():
-  executor = DefaultExecutor('Test', 2)
+  executor = DefaultExecutor('Test', 1)
   t1 = executor.execute(Sleeper(0.5), 'one')
   t2 = executor.execute(Sleeper(0.5), 'two')
   executor.shutdown(False)
@@ -38,3 +43,185 @@ def test_default_executor_task_join():
   t1 = executor.execute(Sleeper(0.1))
   t1.join()
   assert t1.status == TaskStatus.SUCCEEDED
+
+
+@dataclasses.dataclass
+class Recorder(Runnable[None]):
+  name: str
+  log: t.List[str]
+
+  def run(self, task: 'Task') -> None:
+    self.log.append(self.name)
+
+
+def test_default_executor_scheduled_tasks_run_in_order():
+  log: t.List[str] = []
+  executor = DefaultExecutor('Test', 2)
+  now = time.time()
+  t1 = executor.execute(Recorder('late', log), at=now + 0.3)
+  t2 = executor.execute(Recorder('early', log), at=now + 0.1)
+  t3 = executor.execute(Recorder('now', log))
+  for task in (t1, t2, t3):
+    assert task.join(2)
+  assert log == ['now', 'early', 'late']
+  assert time.time() - now >= 0.3
+  executor.shutdown()
+
+
+def test_task_priority_queue_does_not_spin():
+  queue = TaskPriorityQueue()
+  queue.put(time.time() + 10, _task())
+  threads = [threading.Thread(target=queue.get, daemon=True) for _ in range(4)]
+  for thread in threads:
+    thread.start()
+  cpu_start = time.process_time()
+  time.sleep(0.5)
+  assert time.process_time() - cpu_start < 0.1
+  for _ in threads:
+    queue.put_stop(0)
+  for thread in threads:
+    thread.join(1)
+    assert not thread.is_alive()
+
+
+def _task() -> DefaultTask:
+  return DefaultTask(Sleeper(0), 'sleeper')
+
+
+def test_default_executor_execute_many():
+  log: t.List[str] = []
+  executor = DefaultExecutor('Test', 4)
+  late = executor.execute_many([Recorder('late', log)], at=time.time() + 0.2)
+  tasks = executor.execute_many(Recorder(str(i), log) for i in range(100))
+  executor.join()
+  assert executor.get_worker_count() == 4
+  assert [t.cast(Recorder, task.runnable).name for task in tasks] == [str(i) for i in range(100)]
+  assert all(task.status == TaskStatus.SUCCEEDED for task in tasks + late)
+  assert sorted(log) == sorted([str(i) for i in range(100)] + ['late'])
+  assert log[-1] == 'late'
+  executor.shutdown()
+
+
+def test_default_executor_spawns_workers_for_queued_tasks():
+  executor = DefaultExecutor('Test', 4)
+  tasks = [executor.execute(Sleeper(0.2)) for _ in range(3)]
+  assert executor.get_worker_count() == 3
+  tasks += [executor.execute(Sleeper(0.2)) for _ in range(3)]
+  assert executor.get_worker_count() == 4
+  executor.join()
+  assert all(task.status == TaskStatus.SUCCEEDED for task in tasks)
+  executor.shutdown()
+
+
+def test_default_executor_scales_with_due_tasks():
+  executor = DefaultExecutor('Test', 4, idle_timeout=0.1)
+  later = executor.execute_many([Sleeper(0) for _ in range(4)], at=time.time() + 3600)
+  assert executor.get_worker_count() == 1
+  soon = executor.execute_many([Sleeper(0.2) for _ in range(4)], at=time.time() + 0.2)
+  assert executor.get_worker_count() == 1
+  deadline = time.perf_counter() + 2
+  while not all(task.status.completed for task in soon) and time.perf_counter() < deadline:
+    time.sleep(0.05)
+  assert all(task.status == TaskStatus.SUCCEEDED for task in soon)
+  assert executor.get_worker_count() == 4
+
+  # Idle workers are reaped even though tasks are scheduled for later, except for the last one.
+  deadline = time.perf_counter() + 2
+  while executor.get_worker_count() > 1 and time.perf_counter() < deadline:
+    time.sleep(0.05)
+  assert executor.get_worker_count() == 1
+  assert all(task.status == TaskStatus.QUEUED for task in later)
+  executor.shutdown()
+
+
+def test_default_executor_reaps_idle_workers():
+  executor = DefaultExecutor('Test', 4, min_workers=1, idle_timeout=0.1)
+  assert executor.get_worker_count() == 1
+  tasks = executor.execute_many(Sleeper(0.1) for _ in range(4))
+  assert executor.get_worker_count() == 4
+  executor.join()
+  deadline = time.perf_counter() + 2
+  while executor.get_worker_count() > 1 and time.perf_counter() < deadline:
+    time.sleep(0.05)
+  assert executor.get_worker_count() == 1
+  tasks += [executor.execute(Sleeper(0)) for _ in range(2)]
+  executor.join()
+  assert all(task.status == TaskStatus.SUCCEEDED for task in tasks)
+  executor.shutdown()
+
+
+def test_default_executor_bounded_queue_blocks():
+  executor = DefaultExecutor('Test', 1, queue_size=2, submit_timeout=0.2)
+  tasks = [executor.execute(Sleeper(0.3)) for _ in range(3)]  # One running, two queued.
+  with pytest.raises(TaskRejectedError):
+    executor.execute(Sleeper(0))
+  assert executor.get_rejected_count() == 1
+  tstart = time.perf_counter()
+  tasks.append(executor.execute(Sleeper(0)))  # Blocks until the first task completes.
+  assert time.perf_counter() - tstart < 0.3
+  executor.join()
+  assert all(task.status == TaskStatus.SUCCEEDED for task in tasks)
+  executor.shutdown()
+
+
+def test_default_executor_bounded_queue_reject_and_caller_runs():
+  metrics = TaskMetrics()
+  executor = DefaultExecutor('Test', 1, metrics=metrics, queue_size=1, rejection_policy='reject')
+  executor.execute(Sleeper(0.2))
+  time.sleep(0.05)
+  executor.execute(Sleeper(0))
+  with pytest.raises(TaskRejectedError):
+    executor.execute(Sleeper(0))
+  with pytest.raises(TaskRejectedError):
+    executor.execute_many([Sleeper(0)])
+  executor.join()
+  executor.shutdown()
+  assert metrics.snapshot()['tasks']['rejected'] == 2
+
+  log: t.List[str] = []
+  executor = DefaultExecutor('Test', 1, queue_size=1, rejection_policy='caller_runs')
+  executor.execute(Sleeper(0.2))
+  time.sleep(0.05)
+  tasks = executor.execute_many(Recorder(str(i), log) for i in range(3))
+  assert tasks[0].status in (TaskStatus.QUEUED, TaskStatus.RUNNING)
+  assert tasks[1].status == TaskStatus.SUCCEEDED
+  assert tasks[1].worker_id == threading.current_thread().name
+  executor.join()
+  assert sorted(log) == ['0', '1', '2']
+  executor.shutdown()
+
+
+def test_default_executor_caller_runs_blocks_for_scheduled_tasks():
+  log: t.List[str] = []
+  executor = DefaultExecutor('Test', 1, queue_size=1, rejection_policy='caller_runs')
+  executor.execute(Sleeper(0.2))
+  time.sleep(0.05)
+  executor.execute(Sleeper(0))
+  at = time.time() + 0.1
+  task = executor.execute(Recorder('scheduled', log), at=at)
+  assert task.status == TaskStatus.QUEUED
+  executor.join()
+  assert log == ['scheduled']
+  assert task.worker_id != threading.current_thread().name
+  assert t.cast(float, task.started_at) >= at
+  executor.shutdown()
+
+
+def test_default_executor_execute_concurrently_with_shutdown():
+  executor = DefaultExecutor('Test', 4)
+  put = executor._queue.put
+
+  # Shut down the executor from another thread after execute() has queued the task, but before it spawns
+  # a worker for it.
+  def put_and_shutdown(at: float, task: DefaultTask) -> None:
+    put(at, task)
+    thread = threading.Thread(target=executor.shutdown, kwargs={'block': False})
+    thread.start()
+    thread.join()
+
+  executor._queue.put = put_and_shutdown  # type: ignore
+  task = executor.execute(Sleeper(0))
+
+  # No worker may be spawned after shutdown() has sent the stop signals, it would never receive one.
+  assert executor.get_worker_count() == 0
+  assert task.status == TaskStatus.QUEUED
@@ -0,0 +1,97 @@
+import dataclasses
+import threading
+import time
+import typing as t
+
+import pytest
+
+from nr.util.digraph import DiGraph
+from nr.util.task import DefaultExecutor, Runnable, Task, TaskStatus, execute_graph
+
+
+@dataclasses.dataclass
+class Step(Runnable[None]):
+  name: str
+  log: t.List[t.Tuple[str, str, float]]
+  duration: float = 0.0
+  fail: bool = False
+
+  def run(self, task: 'Task') -> None:
+    self.log.append(('start', self.name, time.perf_counter()))
+    task.sleep(self.duration)
+    if self.fail:
+      raise ValueError(self.name)
+    self.log.append(('end', self.name, time.perf_counter()))
+
+
+def _graph(log: t.List[t.Tuple[str, str, float]], edges: str, **kwargs: Step) -> DiGraph[str, Runnable, None]:
+  graph: DiGraph[str, Runnable, None] = DiGraph()
+  for name in sorted(set(edges.replace(' ', '').replace('>', ''))):
+    graph.add_node(name, kwargs.get(name) or Step(name, log, 0.1))
+  for edge in edges.split():
+    graph.add_edge(edge[0], edge[2], None)
+  return graph
+
+
+def _events(log: t.List[t.Tuple[str, str, float]]) -> t.List[t.Tuple[str, str]]:
+  return [(event, name) for event, name, _ in log]
+
+
+def test_execute_graph_runs_independent_branches_in_parallel():
+  log: t.List[t.Tuple[str, str, float]] = []
+  executor = DefaultExecutor('Test', 4)
+  run = execute_graph(executor, _graph(log, 'a>b a>c b>d c>d'))
+  assert run.join(5)
+  assert run.succeeded()
+  events = _events(log)
+  assert events.index(('end', 'a')) < events.index(('start', 'b'))
+  assert events.index(('end', 'a')) < events.index(('start', 'c'))
+  assert events.index(('start', 'c')) < events.index(('end', 'b'))
+  assert events.index(('end', 'b')) < events.index(('start', 'd'))
+  assert events.index(('end', 'c')) < events.index(('start', 'd'))
+  assert set(run.tasks) == {'a', 'b', 'c', 'd'}
+  executor.shutdown()
+
+
+def test_execute_graph_skips_descendants_of_failed_nodes():
+  log: t.List[t.Tuple[str, str, float]] = []
+  executor = DefaultExecutor('Test', 4)
+  graph = _graph(log, 'a>b b>d a>c c>e', b=Step('b', log, fail=True))
+  run = execute_graph(executor, graph)
+  assert run.join(5)
+  assert not run.succeeded()
+  assert run.failed == ['b']
+  assert run.skipped == {'d'}
+  assert run.tasks['e'].status == TaskStatus.SUCCEEDED
+  executor.shutdown()
+
+
+def test_execute_graph_fail_fast():
+  log: t.List[t.Tuple[str, str, float]] = []
+  executor = DefaultExecutor('Test', 4)
+  graph = _graph(log, 'a>b b>d a>c c>e', b=Step('b', log, 0.2, fail=True), c=Step('c', log, 10))
+  tstart = time.perf_counter()
+  run = execute_graph(executor, graph, fail_fast=True)
+  assert run.join(5)
+  assert time.perf_counter() - tstart < 2
+  assert run.tasks['c'].status == TaskStatus.CANCELLED
+  assert run.skipped == {'d', 'e'}
+  executor.shutdown()
+
+
+def test_execute_graph_cancel():
+  log: t.List[t.Tuple[str, str, float]] = []
+  executor = DefaultExecutor('Test', 4)
+  run = execute_graph(executor, _graph(log, 'a>b', a=Step('a', log, 10)))
+  time.sleep(0.1)
+  run.cancel()
+  assert run.join(2)
+  assert run.tasks['a'].status == TaskStatus.CANCELLED
+  assert run.skipped == {'b'}
+  executor.shutdown()
+
+
+def test_execute_graph_rejects_cycles():
+  log: t.List[t.Tuple[str, str, float]] = []
+  with pytest.raises(RuntimeError):
+    execute_graph(DefaultExecutor('Test', 1), _graph(log, 'a>b b>c c>b'))
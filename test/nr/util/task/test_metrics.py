@@ -0,0 +1,77 @@
+import dataclasses
+import time
+import typing as t
+
+import pytest
+
+from nr.util.task import DefaultExecutor, Histogram, MetricsExporter, Runnable, Task, TaskMetrics, TaskStatus
+
+
+@dataclasses.dataclass
+class Sleeper(Runnable[None]):
+  duration: float
+
+  def run(self, task: 'Task') -> None:
+    task.sleep(self.duration)
+
+
+class Fail(Runnable[None]):
+
+  def run(self, task: 'Task') -> None:
+    raise ValueError('bad')
+
+
+class Recorder(MetricsExporter):
+
+  def __init__(self) -> None:
+    self.snapshots: t.List[t.Dict[str, t.Any]] = []
+
+  def export(self, snapshot: t.Dict[str, t.Any]) -> None:
+    self.snapshots.append(snapshot)
+
+
+def test_histogram():
+  histogram = Histogram([1, 2, 5, 10])
+  assert histogram.percentile(0.5) is None
+  for value in [0.5, 1.5, 1.5, 3, 20]:
+    histogram.observe(value)
+  snapshot = histogram.snapshot()
+  assert snapshot['count'] == 5
+  assert snapshot['sum'] == pytest.approx(26.5)
+  assert (snapshot['min'], snapshot['max']) == (0.5, 20)
+  assert snapshot['p50'] == 2
+  assert snapshot['p99'] == 20
+  assert snapshot['buckets'] == {1: 1, 2: 2, 5: 1, 10: 0, float('inf'): 1}
+  with pytest.raises(ValueError):
+    Histogram([2, 1])
+
+
+def test_default_executor_metrics():
+  exporter = Recorder()
+  metrics = TaskMetrics([exporter])
+  executor = DefaultExecutor('Test', 2, metrics=metrics)
+  tasks = [executor.execute(Sleeper(0.1)) for _ in range(4)]
+  failed = executor.execute(Fail())
+  failed.callbacks.on(TaskStatus.FAILED, lambda task: task.consume_error())
+  executor.join()
+
+  for task in tasks:
+    assert task.queued_at is not None and task.started_at is not None and task.finished_at is not None
+    assert task.queued_at <= task.started_at <= task.finished_at
+
+  metrics.export()
+  snapshot, = exporter.snapshots
+  assert snapshot['tasks'] == {
+    'submitted': 5, 'succeeded': 4, 'failed': 1, 'cancelled': 0, 'ignored': 0, 'rejected': 0, 'caller_runs': 0,
+  }
+  assert snapshot['queue_depth'] == 0
+  assert snapshot['running'] == 0
+  assert snapshot['wait_time']['count'] == 5
+  assert snapshot['run_time']['count'] == 5
+  assert snapshot['run_time']['max'] >= 0.1
+  assert set(snapshot['workers']) == {'Test-Worker-0', 'Test-Worker-1'}
+  assert sum(w['busy_seconds'] for w in snapshot['workers'].values()) >= 0.4
+  assert 0 < snapshot['busy_ratio'] <= 1
+
+  executor.shutdown()
+  assert metrics.snapshot()['workers'] == {}
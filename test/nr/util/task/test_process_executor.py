@@ -0,0 +1,127 @@
+import dataclasses
+import os
+import time
+
+import pytest
+
+from nr.util.task import ProcessExecutor, RemoteError, Runnable, Task, TaskStatus
+from nr.util.task._process import RemoteTraceback
+
+
+@dataclasses.dataclass
+class Square(Runnable[int]):
+  value: int
+
+  def run(self, task: 'Task') -> int:
+    return self.value ** 2
+
+
+@dataclasses.dataclass
+class Fail(Runnable[None]):
+  message: str
+
+  def run(self, task: 'Task') -> None:
+    raise ValueError(self.message)
+
+
+class UnpicklableError(Exception):
+
+  def __reduce__(self):
+    raise TypeError('cannot pickle')
+
+
+class FailUnpicklable(Runnable[None]):
+
+  def run(self, task: 'Task') -> None:
+    raise UnpicklableError('oops')
+
+
+@dataclasses.dataclass
+class Sleeper(Runnable[bool]):
+  duration: float
+
+  def run(self, task: 'Task') -> bool:
+    return task.sleep(self.duration)
+
+
+class Crash(Runnable[None]):
+
+  def run(self, task: 'Task') -> None:
+    os._exit(3)
+
+
+def test_process_executor_result_and_worker_id():
+  executor = ProcessExecutor('Test', 2)
+  tasks = [executor.execute(Square(i)) for i in range(5)]
+  executor.join()
+  assert [task.status for task in tasks] == [TaskStatus.SUCCEEDED] * 5
+  assert [task.result for task in tasks] == [0, 1, 4, 9, 16]
+  assert all(task.worker_id.startswith('Test-Worker-') for task in tasks)
+  executor.shutdown()
+
+
+def test_process_executor_error():
+  executor = ProcessExecutor('Test', 1)
+  t1 = executor.execute(Fail('bad value'))
+  t2 = executor.execute(FailUnpicklable())
+  executor.join()
+  assert t1.status == TaskStatus.FAILED
+  with pytest.raises(ValueError) as excinfo:
+    t1.result
+  assert isinstance(excinfo.value.__cause__, RemoteTraceback)
+  assert 'bad value' in str(excinfo.value.__cause__)
+  assert t2.status == TaskStatus.FAILED
+  with pytest.raises(RemoteError):
+    t2.result
+  executor.shutdown()
+
+
+def test_process_executor_cancel():
+  executor = ProcessExecutor('Test', 1)
+  t1 = executor.execute(Sleeper(10))
+  t2 = executor.execute(Sleeper(10))
+  while t1.status != TaskStatus.RUNNING:
+    time.sleep(0.01)
+  tstart = time.perf_counter()
+  t2.cancel()
+  t1.cancel()
+  executor.join()
+  assert time.perf_counter() - tstart < 2
+  assert t1.status == TaskStatus.CANCELLED
+  assert t2.status == TaskStatus.IGNORED
+  executor.shutdown()
+
+
+def test_process_executor_worker_crash():
+  executor = ProcessExecutor('Test', 1)
+  # Let the worker import this module first, so it crashes before it reports that the task is running.
+  executor.execute(Square(2))
+  executor.join()
+  t1 = executor.execute(Crash())
+  t2 = executor.execute(Square(3))
+  executor.join()
+  assert t1.status == TaskStatus.FAILED
+  assert t2.status == TaskStatus.SUCCEEDED
+  assert t2.result == 9
+  executor.shutdown()
+
+
+def test_process_executor_shutdown_ignores_queued_tasks():
+  executor = ProcessExecutor('Test', 1)
+  t1 = executor.execute(Sleeper(10))
+  t2 = executor.execute(Square(3))
+  t3 = executor.execute(Square(4), at=time.time() + 60)
+  while t1.status != TaskStatus.RUNNING:
+    time.sleep(0.01)
+  executor.shutdown()
+  assert t1.status == TaskStatus.CANCELLED
+  assert t2.status == TaskStatus.IGNORED
+  assert t3.status == TaskStatus.IGNORED
+  executor.join()
+
+
+def test_process_executor_unpicklable_runnable():
+  executor = ProcessExecutor('Test', 1)
+  with pytest.raises(Exception):
+    executor.execute(Square(lambda: None))  # type: ignore
+  executor.shutdown()